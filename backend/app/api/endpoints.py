@@ -1,14 +1,24 @@
 # app/api/endpoints.py
 from fastapi import APIRouter, Depends, HTTPException, Body
 from sqlalchemy.ext.asyncio import AsyncSession
-from elasticsearch import AsyncElasticsearch
-from typing import Dict, Any
+from elasticsearch import AsyncElasticsearch, ApiError, ConnectionError as ESConnectionError, ConnectionTimeout
+from typing import Dict, Any, Optional
 
 from app.schemas import schemas
 from app.services.kafka_service import KafkaService
 from app.services.analysis_service import analysis_service
-# from app.services.incident_service import incident_service
-from app.core.database import get_db_session, get_es_client
+from app.ml.predictor import get_shadow_report
+from app.services.window_aggregator import window_aggregator
+from app.services.flow_state import flow_state_table
+from app.services.log_router import log_router
+from app.services.rule_engine import rule_engine
+from app.services.threat_intel import threat_intel
+from app.core.ip_allowlist import ip_allowlist
+from app.services.es_writer import es_writer
+from app.services.es_projection import source_projector
+from app.services.incident_service import incident_service
+from app.services.process_tree import process_tree
+from app.core.database import get_db_session, get_es_client, get_incident_es_client
 from src.core.config import settings
 
 router = APIRouter()
@@ -41,37 +51,119 @@ async def get_realtime_threat_statistics():
     stats = await analysis_service.get_threat_statistics()
     return {"statistics": stats}
 
+@router.get("/statistics/shadow")
+async def get_shadow_model_statistics():
+    """
+    Shadow 후보 모델의 클래스별 일치율과 지연 시간을 반환합니다.
+    """
+    return get_shadow_report()
+
+@router.get("/statistics/window")
+async def get_window_statistics(ip: Optional[str] = None, host: Optional[str] = None):
+    """
+    슬라이딩 윈도우 집계기 상태를 반환합니다. ip/host 를 지정하면 해당 키의 현재 윈도우 피처도 함께 반환합니다.
+    """
+    report = window_aggregator.report()
+    if ip or host:
+        report["features"] = window_aggregator.features({"source.ip": ip, "host.name": host})
+    return report
+
+@router.get("/statistics/flows")
+async def get_flow_state_statistics():
+    """
+    Packetbeat flow 상태 테이블 현황(활성 flow 수, 사유별 예측/병합 건수, 예측 비율)을 반환합니다.
+    """
+    return flow_state_table.report()
+
+@router.get("/statistics/packetbeat-types")
+async def get_packetbeat_type_statistics():
+    """
+    Packetbeat 문서 유형(flow, http, tls, dns 등)별 수신 건수를 반환합니다. (flow 만 트래픽 모델로 예측)
+    """
+    return {"counts": dict(analysis_service.packetbeat_type_counts)}
+
+@router.get("/statistics/log-routing")
+async def get_log_routing_statistics():
+    """
+    Winlogbeat 탐지기별 라우팅 건수와 예측 없이 색인만 수행한 건수(index_only)를 반환합니다.
+    """
+    return log_router.report()
+
+@router.get("/statistics/rules")
+async def get_rule_engine_statistics():
+    """
+    탐지 규칙별 일치 건수와 규칙 엔진이 평가한 이벤트 수를 반환합니다.
+    """
+    return rule_engine.report()
+
+@router.get("/statistics/threat-intel")
+async def get_threat_intel_statistics():
+    """
+    위협 인텔리전스 피드 적재 현황(IP/CIDR 수, 구성 요소별 메모리)과 조회/적중 건수를 반환합니다.
+    """
+    return threat_intel.report()
+
+@router.get("/statistics/ip-allowlist")
+async def get_ip_allowlist_statistics():
+    """
+    차단 금지 IP 대역 수와 조회/허용(차단 생략) 건수를 반환합니다.
+    """
+    return ip_allowlist.report()
+
+@router.get("/statistics/es-writer")
+async def get_es_writer_statistics():
+    """
+    ES bulk 색인 요청 수, 성공/실패/재시도 문서 수와 전송 바이트 수, 적용 중인 _source 프로젝션 설정을 반환합니다.
+    """
+    return {**es_writer.report(), "projection": source_projector.report()}
+
+@router.get("/statistics/process-tree")
+async def get_process_tree_statistics():
+    """
+    Sysmon 프로세스 트리에 유지 중인 프로세스 수, 제거/조회/적중 건수와 스냅샷 저장·적재 현황을 반환합니다.
+    """
+    return process_tree.report()
+
 # --- Incident Analysis Endpoints ---
 
-# @router.post("/incidents/path", response_model=schemas.IncidentResponse)
-# async def get_incident_path(
-#     query: Dict[str, Any] = Body(...),
-#     db: AsyncSession = Depends(get_db_session),
-#     es: AsyncElasticsearch = Depends(get_es_client)
-# ):
-#     """인시던트 공격 경로를 추적합니다."""
-#     result = await incident_service.trace_attack_path(query, es, db)
-#     return {"query": query, "result": result}
-
-# @router.post("/incidents/impact", response_model=schemas.IncidentResponse)
-# async def get_incident_impact(
-#     query: Dict[str, Any] = Body(...),
-#     db: AsyncSession = Depends(get_db_session),
-#     es: AsyncElasticsearch = Depends(get_es_client)
-# ):
-#     """인시던트 영향도를 분석합니다."""
-#     result = await incident_service.assess_impact(query, es, db)
-#     return {"query": query, "result": result}
-
-# @router.post("/incidents/timeline", response_model=schemas.IncidentResponse)
-# async def get_incident_timeline(
-#     query: Dict[str, Any] = Body(...),
-#     db: AsyncSession = Depends(get_db_session),
-#     es: AsyncElasticsearch = Depends(get_es_client)
-# ):
-#     """인시던트 타임라인을 분석합니다."""
-#     result = await incident_service.analyze_timeline(query, es, db)
-#     return {"query": query, "result": result}
+async def _run_incident_analysis(analysis, query: Dict[str, Any], es: AsyncElasticsearch, db: AsyncSession):
+    try:
+        return {"query": query, "result": await analysis(query, es, db)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ConnectionTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Elasticsearch request timed out: {e}")
+    except (ApiError, ESConnectionError) as e:
+        raise HTTPException(status_code=502, detail=f"Elasticsearch request failed: {e}")
+
+@router.post("/incidents/path", response_model=schemas.IncidentResponse)
+async def get_incident_path(
+    query: Dict[str, Any] = Body(...),
+    db: AsyncSession = Depends(get_db_session),
+    es: AsyncElasticsearch = Depends(get_incident_es_client)
+):
+    """인시던트 공격 경로를 추적합니다."""
+    return await _run_incident_analysis(incident_service.trace_attack_path, query, es, db)
+
+@router.post("/incidents/impact", response_model=schemas.IncidentResponse)
+async def get_incident_impact(
+    query: Dict[str, Any] = Body(...),
+    db: AsyncSession = Depends(get_db_session),
+    es: AsyncElasticsearch = Depends(get_incident_es_client)
+):
+    """인시던트 영향도를 분석합니다."""
+    return await _run_incident_analysis(incident_service.assess_impact, query, es, db)
+
+@router.post("/incidents/timeline", response_model=schemas.IncidentResponse)
+async def get_incident_timeline(
+    query: Dict[str, Any] = Body(...),
+    db: AsyncSession = Depends(get_db_session),
+    es: AsyncElasticsearch = Depends(get_incident_es_client)
+):
+    """인시던트 타임라인을 분석합니다."""
+    return await _run_incident_analysis(incident_service.analyze_timeline, query, es, db)
 
 # # --- Manual Remediation Endpoint ---
 
@@ -0,0 +1,113 @@
+# app/core/cpu_budget.py
+"""
+프로세스별 CPU 스레드 예산 관리.
+
+gunicorn 워커(기본 4개) 각각에서 XGBoost/sklearn(OpenMP), BLAS, asyncio 기본 Executor가
+모두 코어 수만큼 스레드를 만들면 8코어 노드에서 심한 과다 구독(oversubscription)이 발생합니다.
+하나의 설정(CPU_TOTAL_CORES, CPU_WORKER_COUNT)으로 워커당 스레드 수를 계산해 아래에 일괄 적용합니다.
+CPU_WORKER_COUNT 를 지정하지 않으면 gunicorn 이 워커 수로 사용하는 WEB_CONCURRENCY 를 따릅니다.
+
+- OpenMP/BLAS 스레드 환경 변수 (numpy 등 네이티브 라이브러리 import 전에 적용해야 함)
+- 모델의 n_jobs / nthread / thread_count 파라미터
+- asyncio 기본 Executor(asyncio.to_thread) 크기
+"""
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 네이티브 스레드 풀 크기를 제어하는 환경 변수 목록
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+# 모델별 스레드 수 파라미터 이름 (sklearn/LightGBM: n_jobs, XGBoost: nthread, CatBoost: thread_count)
+MODEL_THREAD_PARAMS = ("n_jobs", "nthread", "thread_count", "num_threads")
+
+
+@dataclass(frozen=True)
+class CpuBudget:
+    total_cores: int
+    workers: int
+    model_threads: int      # 모델 추론 및 OpenMP/BLAS 스레드 수
+    executor_workers: int   # asyncio 기본 Executor 스레드 수
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _web_concurrency() -> int:
+    try:
+        return int(os.environ.get("WEB_CONCURRENCY", "1"))
+    except ValueError:
+        return 1
+
+
+def compute_cpu_budget(total_cores: Optional[int] = None, workers: Optional[int] = None,
+                       executor_workers: Optional[int] = None) -> CpuBudget:
+    """코어 수와 워커 수로부터 워커(프로세스)당 스레드 예산을 계산합니다."""
+    total_cores = total_cores or settings.cpu_total_cores or _available_cores()
+    workers = max(1, workers or settings.cpu_worker_count or _web_concurrency())
+    model_threads = max(1, total_cores // workers)
+    executor_workers = executor_workers or settings.cpu_executor_workers or model_threads + 2
+    return CpuBudget(total_cores=total_cores, workers=workers,
+                     model_threads=model_threads, executor_workers=executor_workers)
+
+
+def apply_thread_limits(budget: CpuBudget):
+    """
+    OpenMP/BLAS 스레드 수를 제한합니다.
+    환경 변수는 네이티브 라이브러리가 로드될 때 읽히므로 numpy/sklearn import 전에 호출해야 하며,
+    이미 로드된 경우를 대비해 threadpoolctl(있을 경우)로도 제한합니다.
+    """
+    if not settings.cpu_budget_enabled:
+        return
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(budget.model_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=budget.model_threads)
+    except ImportError:
+        pass
+
+
+def configure_model_threads(model: Any, threads: int):
+    """모델(및 Pipeline 단계)의 스레드 수 파라미터를 예산에 맞게 설정합니다."""
+    if not settings.cpu_budget_enabled or model is None:
+        return
+    if hasattr(model, "get_params") and hasattr(model, "set_params"):
+        params = model.get_params(deep=False)
+        updates = {name: threads for name in MODEL_THREAD_PARAMS if name in params}
+        if updates:
+            model.set_params(**updates)
+    for _, step in getattr(model, "steps", []):
+        configure_model_threads(step, threads)
+
+
+def install_default_executor(budget: CpuBudget, loop: Optional[asyncio.AbstractEventLoop] = None):
+    """asyncio.to_thread 등이 사용하는 기본 Executor 크기를 예산에 맞게 교체합니다."""
+    if not settings.cpu_budget_enabled:
+        return
+    loop = loop or asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=budget.executor_workers, thread_name_prefix="cpu-budget"))
+    logger.info(
+        f"CPU 예산 적용: cores={budget.total_cores}, workers={budget.workers}, "
+        f"model_threads={budget.model_threads}, executor_workers={budget.executor_workers}"
+    )
+
+
+# 프로세스 전역 예산
+cpu_budget = compute_cpu_budget()
@@ -6,6 +6,7 @@ from elasticsearch import AsyncElasticsearch
 import logging # 로깅 모듈 임포트
 
 from src.core.config import settings
+from src.core.es_client import es_client, dashboard_es_client, incident_es_client
 
 # 로거 설정 (선택 사항이지만 디버깅에 유용)
 logging.basicConfig(level=logging.INFO)
@@ -38,18 +39,9 @@ except Exception as e:
     AsyncSessionLocal = None
     Base = declarative_base()
 
-es_client: AsyncElasticsearch = None # 초기화 전 None으로 명시적 선언
 # --- Elasticsearch Setup ---
-try:
-    es_client = AsyncElasticsearch(hosts=settings.elasticsearch_hosts.split(','),
-    timeout=0.5,            # 요청 최대 대기 시간(초)
-    max_retries=2,         # 재시도 횟수
-    retry_on_timeout=True  # 타임아웃 시 재시도 활성화
-    )
-    print("Elasticsearch 비동기 클라이언트 초기화 성공.")
-except Exception as e:
-    logger.error(f"Elasticsearch 클라이언트 초기화 실패: {e}", exc_info=True) # 오류와 트레이스백 함께 로깅
-    es_client = None
+# 클라이언트는 src/core/es_client.py 에서 app/ 과 src/ 가 공유하는 연결 풀 하나로 생성합니다.
+# (이 모듈의 es_client 는 기본 클라이언트이며, 조회에는 용도별 뷰를 사용)
 
 # --- Dependency for FastAPI ---
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
@@ -65,8 +57,16 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
 
 async def get_es_client() -> AsyncElasticsearch:
     """
-    FastAPI 의존성 주입을 위한 Elasticsearch 클라이언트 생성기
+    FastAPI 의존성 주입을 위한 Elasticsearch 클라이언트 생성기 (대시보드 조회용 timeout 적용)
+    """
+    if not dashboard_es_client:
+        raise RuntimeError("Elasticsearch 클라이언트를 초기화할 수 없습니다.")
+    return dashboard_es_client
+
+async def get_incident_es_client() -> AsyncElasticsearch:
+    """
+    인시던트 분석 API 용 Elasticsearch 클라이언트 (여러 페이지를 읽는 집계/PIT 조회용 긴 timeout 적용)
     """
-    if not es_client:
+    if not incident_es_client:
         raise RuntimeError("Elasticsearch 클라이언트를 초기화할 수 없습니다.")
-    return es_client
\ No newline at end of file
+    return incident_es_client
\ No newline at end of file
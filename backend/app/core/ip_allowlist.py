@@ -0,0 +1,76 @@
+# app/core/ip_allowlist.py
+"""
+차단 금지(allowlist) IP 대역.
+
+내부 flow 의 source.ip 는 게이트웨이, DNS, 백엔드 서버 등 우리 쪽 주소인 경우가 많아
+그대로 block_ip 명령을 발행하면 자체 인프라를 차단하게 됩니다.
+IP_ALLOWLIST_CIDRS(쉼표 구분)와 IP_ALLOWLIST_PATH(한 줄에 IP 또는 CIDR 하나) 의 대역을
+CidrTrie 에 적재하고, 차단 명령 발행 직전에 정수 조회로 확인합니다.
+(공격 출처 IP 선택에는 적용하지 않으므로 탐지/기록은 그대로 남습니다)
+"""
+import logging
+from typing import Any, Dict, Iterable
+
+from app.core.ip_sets import CidrTrie
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 설정과 관계없이 항상 차단하지 않는 대역 (루프백, 미지정 주소)
+BUILTIN_ALLOWLIST = ("127.0.0.0/8", "0.0.0.0/32", "::1/128", "::/128")
+
+
+class IpAllowlist:
+    """
+    :param cidrs: 허용할 IP / CIDR 문자열 목록
+    """
+    def __init__(self, cidrs: Iterable[str] = ()):
+        self._trie = CidrTrie()
+        self.entries = 0
+        self.invalid = 0
+        self.stats = {"lookups": 0, "allowed": 0}
+        for cidr in BUILTIN_ALLOWLIST:
+            self._trie.add_cidr(cidr)
+        self.add_all(cidrs)
+
+    def add_all(self, cidrs: Iterable[str]):
+        for cidr in cidrs:
+            cidr = cidr.split("#", 1)[0].strip()
+            if not cidr:
+                continue
+            if self._trie.add_cidr(cidr):
+                self.entries += 1
+            else:
+                self.invalid += 1
+                logger.warning(f"⚠️ 잘못된 allowlist 항목을 무시합니다: {cidr}")
+
+    @classmethod
+    def from_settings(cls) -> "IpAllowlist":
+        allowlist = cls(settings.ip_allowlist_cidrs.split(","))
+        if settings.ip_allowlist_path:
+            try:
+                with open(settings.ip_allowlist_path, "r", encoding="utf-8") as f:
+                    allowlist.add_all(f)
+            except OSError as e:
+                logger.error(f"❌ allowlist 파일 읽기 실패: {settings.ip_allowlist_path} ({e})")
+        if allowlist.entries:
+            logger.info(f"✅ 차단 금지 IP 대역 {allowlist.entries}개 적재 완료")
+        return allowlist
+
+    def contains(self, ip: Any) -> bool:
+        """IP 가 차단 금지 대역에 속하면 True. (IP 형식이 아니면 False)"""
+        self.stats["lookups"] += 1
+        if self._trie.lookup_ip(ip) is None:
+            return False
+        self.stats["allowed"] += 1
+        return True
+
+    __contains__ = contains
+
+    def report(self) -> Dict[str, Any]:
+        return {"entries": self.entries, "builtin": len(BUILTIN_ALLOWLIST), "invalid": self.invalid,
+                "memory_bytes": self._trie.memory_bytes(), **self.stats}
+
+
+# 프로세스 전역 차단 금지 목록
+ip_allowlist = IpAllowlist.from_settings()
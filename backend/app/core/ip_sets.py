@@ -0,0 +1,193 @@
+# app/core/ip_sets.py
+"""
+대용량 IP / CIDR 집합 자료구조.
+
+- parse_ip()   : IP 문자열을 (버전, 정수) 로 변환 (inet_pton 기반)
+- BloomFilter  : 대부분의 조회(목록에 없는 IP)를 비트 검사 몇 번으로 빠르게 거르는 확률적 집합
+- SortedIpSet  : 정확한 IP 목록. Bloom filter 양성 결과를 이진 탐색으로 확인 (IPv4 는 4바이트 배열)
+- CidrTrie     : 8비트 보폭(stride) 다중 비트 트라이. IPv4 는 최대 4단계, IPv6 는 최대 16단계 조회
+"""
+import math
+import socket
+import sys
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_INET = {4: socket.AF_INET, 6: socket.AF_INET6}
+_BITS = {4: 32, 6: 128}
+
+
+def parse_ip(ip: Any) -> Optional[Tuple[int, int]]:
+    """IP 문자열을 (4|6, 정수 값) 으로 변환합니다. 올바른 IP 가 아니면 None 을 반환합니다."""
+    if not isinstance(ip, str) or not ip:
+        return None
+    version = 6 if ":" in ip else 4
+    if version == 6 and "%" in ip:
+        ip = ip.split("%", 1)[0]  # 링크 로컬 주소의 zone index 제거 (fe80::1%eth0)
+    try:
+        return version, int.from_bytes(socket.inet_pton(_INET[version], ip), "big")
+    except (OSError, ValueError):
+        return None
+
+
+def parse_cidr(text: str) -> Optional[Tuple[int, int, int]]:
+    """
+    "10.0.0.0/8" 또는 단일 IP 문자열을 (버전, 네트워크 정수 값, 프리픽스 길이) 로 변환합니다.
+    호스트 비트가 설정된 경우("10.0.0.1/8")에는 네트워크 주소로 정규화합니다.
+    """
+    address, _, prefix = text.strip().partition("/")
+    parsed = parse_ip(address)
+    if parsed is None:
+        return None
+    version, value = parsed
+    bits = _BITS[version]
+    try:
+        length = int(prefix) if prefix else bits
+    except ValueError:
+        return None
+    if not 0 <= length <= bits:
+        return None
+    host_bits = bits - length
+    return version, (value >> host_bits) << host_bits, length
+
+
+def ip_key_bytes(version: int, value: int) -> bytes:
+    return value.to_bytes(4 if version == 4 else 16, "big") + (b"\x04" if version == 4 else b"\x06")
+
+
+class BloomFilter:
+    """
+    :param capacity: 예상 원소 수
+    :param error_rate: 목표 오탐(false positive) 확률
+    """
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: bytes):
+        # 128비트 해시 하나를 두 개의 64비트 해시로 나눠 k 개 위치를 만드는 double hashing
+        digest = blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: bytes):
+        bits = self.bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self.bits)
+
+
+class SortedIpSet:
+    """정렬된 배열 기반 정확한 IP 집합. (IPv4: array('I') 4바이트/항목, IPv6: 정렬된 int 리스트)"""
+    def __init__(self, v4: Iterable[int] = (), v6: Iterable[int] = ()):
+        self.v4 = array("I", sorted(set(v4)))
+        self.v6: List[int] = sorted(set(v6))
+
+    def __len__(self) -> int:
+        return len(self.v4) + len(self.v6)
+
+    def contains(self, version: int, value: int) -> bool:
+        return self.index(version, value) >= 0
+
+    def index(self, version: int, value: int) -> int:
+        """값의 정렬 배열 내 위치를 반환합니다. (없으면 -1, 같은 위치의 부가 배열 조회용)"""
+        values = self.v4 if version == 4 else self.v6
+        i = bisect_left(values, value)
+        return i if i < len(values) and values[i] == value else -1
+
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self.v4) + sys.getsizeof(self.v6) + sum(sys.getsizeof(v) for v in self.v6)
+
+
+class CidrTrie:
+    """
+    IPv4 / IPv6 CIDR 프리픽스 트라이 (8비트 보폭).
+
+    각 노드는 (자식 dict, 종단 dict) 이며, 바이트 단위가 아닌 프리픽스(/20 등)는
+    해당 단계의 바이트 값 여러 개로 확장해 저장합니다. 조회는 IP 정수에서 바이트를 시프트로 꺼내
+    dict 조회만으로 수행하며, 처음 일치한(가장 짧은) 프리픽스의 값을 반환합니다.
+    """
+    def __init__(self):
+        self._roots: Dict[int, Tuple[dict, dict]] = {4: ({}, {}), 6: ({}, {})}
+        self._match_all: Dict[int, Any] = {}  # /0 프리픽스
+        self.prefix_count = 0
+
+    def add(self, version: int, network: int, length: int, value: Any = True):
+        self.prefix_count += 1
+        if length == 0:
+            self._match_all.setdefault(version, value)
+            return
+        bits = _BITS[version]
+        nbytes = (length + 7) // 8
+        children, terminals = self._roots[version]
+        for level in range(nbytes - 1):
+            byte = (network >> (bits - 8 * (level + 1))) & 0xFF
+            if byte in terminals:
+                return  # 이미 더 짧은 프리픽스가 이 범위를 포함
+            node = children.get(byte)
+            if node is None:
+                node = children[byte] = ({}, {})
+            children, terminals = node
+        last_byte = (network >> (bits - 8 * nbytes)) & 0xFF
+        free_bits = 8 * nbytes - length
+        for byte in range(last_byte, last_byte + (1 << free_bits)):
+            terminals.setdefault(byte, value)
+
+    def add_cidr(self, text: str, value: Any = True) -> bool:
+        parsed = parse_cidr(text)
+        if parsed is None:
+            return False
+        self.add(*parsed, value=value)
+        return True
+
+    def lookup(self, version: int, value: int) -> Any:
+        """정수 IP 값을 포함하는 프리픽스의 값을 반환합니다. (없으면 None)"""
+        if self._match_all:
+            matched = self._match_all.get(version)
+            if matched is not None:
+                return matched
+        shift = _BITS[version] - 8
+        children, terminals = self._roots[version]
+        while True:
+            byte = (value >> shift) & 0xFF
+            matched = terminals.get(byte)
+            if matched is not None:
+                return matched
+            node = children.get(byte)
+            if node is None or shift == 0:
+                return None
+            children, terminals = node
+            shift -= 8
+
+    def lookup_ip(self, ip: Any) -> Any:
+        parsed = parse_ip(ip)
+        return self.lookup(*parsed) if parsed else None
+
+    def __contains__(self, ip: Any) -> bool:
+        return self.lookup_ip(ip) is not None
+
+    def memory_bytes(self) -> int:
+        """트라이 노드(dict)들이 사용하는 대략적인 메모리 크기"""
+        total, stack = 0, [node for node in self._roots.values()]
+        while stack:
+            children, terminals = stack.pop()
+            total += sys.getsizeof(children) + sys.getsizeof(terminals) + 56  # 노드 튜플
+            stack.extend(children.values())
+        return total
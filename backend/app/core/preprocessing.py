@@ -2,9 +2,14 @@
 
 import numpy as np
 import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
 from src.core.config import settings
 from app.schemas.schemas import LogFeatures
 
+logger = logging.getLogger(__name__)
+
 # 설정 파일에서 columns.json 경로를 가져옴
 with open(settings.log_columns_path, "r", encoding="utf-8") as f:
     MODEL_COLUMNS = json.load(f)
@@ -43,65 +48,204 @@ def extract_value(log, dotted_key):
             return None
     return val
 
+# --- 컴파일된 필드 추출 계획(Extraction Plan) ---
+# 모듈 로드 시 한 번만 MODEL_COLUMNS의 키 경로를 튜플로 분해하고,
+# 공통 접두 경로(예: winlog.event_data.*)를 공유하는 트리로 묶습니다.
+# 이벤트마다 필요한 하위 트리만 한 번씩 순회하므로 컬럼마다 split('.')을 반복하지 않습니다.
+
+def _resolve_source_path(col: str):
+    """
+    모델 컬럼에 대응하는 원본 로그 경로를 찾습니다.
+    columns.json의 'System.Version'처럼 매핑 키('System_Version')와 표기가 다른 컬럼도 찾습니다.
+    """
+    return COLUMN_MAPPING.get(col) or COLUMN_MAPPING.get(col.replace('.', '_'))
+
+def _compile_extraction_plan(columns: List[str]):
+    """
+    컬럼 목록을 (key, (이 경로에서 값을 받는 컬럼들, 하위 노드들)) 형태의 불변 트리로 컴파일합니다.
+    """
+    root: Dict[str, Any] = {}
+    for col in columns:
+        path = _resolve_source_path(col)
+        if not path:
+            continue
+        keys = tuple(path.split('.'))
+        node = root
+        for depth, key in enumerate(keys):
+            entry = node.setdefault(key, {"columns": [], "children": {}})
+            if depth == len(keys) - 1:
+                entry["columns"].append(col)
+            node = entry["children"]
+
+    def freeze(children: Dict[str, Any]) -> Tuple:
+        return tuple(
+            (key, (tuple(entry["columns"]), freeze(entry["children"])))
+            for key, entry in children.items()
+        )
+    return freeze(root)
+
+def _check_extraction_plan(columns: List[str]) -> Dict[str, List[str]]:
+    """시작 시 매핑되지 않은 컬럼과 스키마 불일치를 점검하고 경고를 남깁니다."""
+    schema_fields = {f for f in LogFeatures.model_fields if not f.endswith('_missing')}
+    report = {
+        "unmapped_columns": [c for c in columns if not _resolve_source_path(c)],
+        "alias_resolved_columns": [c for c in columns if c not in COLUMN_MAPPING and _resolve_source_path(c)],
+        "columns_not_in_schema": [c for c in columns if c not in schema_fields and c.replace('.', '_') not in schema_fields],
+        "schema_fields_not_in_columns": sorted(schema_fields - {c.replace('.', '_') for c in columns}),
+    }
+    if report["unmapped_columns"]:
+        logger.warning(f"⚠️ 원본 로그 경로가 매핑되지 않은 모델 컬럼 (항상 결측 처리됨): {report['unmapped_columns']}")
+    if report["alias_resolved_columns"]:
+        logger.warning(f"⚠️ 매핑 키와 표기가 달라 별칭으로 연결된 모델 컬럼: {report['alias_resolved_columns']}")
+    if report["columns_not_in_schema"] or report["schema_fields_not_in_columns"]:
+        logger.warning(
+            f"⚠️ columns.json 과 LogFeatures 스키마 불일치: 스키마에 없는 컬럼={report['columns_not_in_schema']}, "
+            f"columns.json에 없는 필드={report['schema_fields_not_in_columns']}"
+        )
+    return report
+
+EXTRACTION_PLAN = _compile_extraction_plan(MODEL_COLUMNS)
+EXTRACTION_PLAN_REPORT = _check_extraction_plan(MODEL_COLUMNS)
+_EMPTY_MAPPED = dict.fromkeys(MODEL_COLUMNS)
+
+def _walk_plan(plan: Tuple, node: Dict[str, Any], mapped: Dict[str, Any]):
+    for key, (columns, children) in plan:
+        value = node.get(key)
+        if value is None:
+            continue
+        for col in columns:
+            mapped[col] = value
+        if children and isinstance(value, dict):
+            _walk_plan(children, value, mapped)
+
 def map_sysmon_to_model_columns(log_dict):
-    """원본 로그를 모델이 사용하는 피처 이름으로 매핑합니다."""
-    mapped = {}
-    for col in MODEL_COLUMNS:
-        sysmon_key = COLUMN_MAPPING.get(col)
-        mapped[col] = extract_value(log_dict, sysmon_key) if sysmon_key else None
+    """원본 로그를 모델이 사용하는 피처 이름으로 매핑합니다. (컴파일된 추출 계획으로 한 번만 순회)"""
+    mapped = _EMPTY_MAPPED.copy()
+    if isinstance(log_dict, dict):
+        _walk_plan(EXTRACTION_PLAN, log_dict, mapped)
     return mapped
 
-def fill_and_mask_missing_features(mapped_log):
+# --- 단일 순회 평탄화(Flat View) ---
+# 이벤트를 한 번만 순회해 "점(.) 경로 -> 값" 평면 딕셔너리를 만들고,
+# ES 문서 메타데이터, 모델 피처, IP 추출 등 모든 소비자가 이 뷰에서 dict.get 한 번으로 값을 읽습니다.
+
+def _flatten_into(node: Dict[str, Any], prefix: str, out: Dict[str, Any]):
+    for key, value in node.items():
+        path = prefix + key
+        if type(value) is dict and value:
+            _flatten_into(value, path + '.', out)
+        else:
+            out[path] = value  # 리프 값 (리스트, 빈 딕셔너리 포함)
+
+def flatten_event(doc: Dict[str, Any]) -> Dict[str, Any]:
     """
-    [최종 수정 2] 새로 발견된 Keywords, ActivityID, EventID 타입을 처리하도록 개선합니다.
+    중첩된 이벤트를 리프 값만 담은 평면 딕셔너리로 변환합니다.
+    (e.g., {"winlog": {"event_data": {"SourceIp": "1.2.3.4"}}} -> {"winlog.event_data.SourceIp": "1.2.3.4"})
+    이미 점 표기 키로 전달된 필드("host.name" 등)도 같은 경로로 합쳐집니다.
     """
-    processed = {}
-    
-    # Pydantic 오류에 맞춰 실제 모델이 요구하는 타입으로 수정
-    FIELD_TYPES = {
-        # 기존 타입 정의
-        "System_Version": "int", "port": "str", "ProcessId": "str",
-        "RecordNumber": "int", "ExecutionProcessID": "int", "ThreadID": "int",
-        "SourceProcessId": "int",
-        "EventID": "str", 
-        "Keywords": "list",
-        "ActivityID": "dict" 
-    }
-    DEFAULT_TYPE = "str"
-    DEFAULT_VALUES = {"str": "", "int": 0, "list": [], "dict": {}}
-
-    for col in [f for f in LogFeatures.model_fields if not f.endswith('_missing')]:
-        val = mapped_log.get(col)
-        missing_flag = 1 if val is None or val == '' else 0
-        expected_type = FIELD_TYPES.get(col, DEFAULT_TYPE)
-
-        # 1. 값이 없을 경우, 기대 타입에 맞는 기본값 사용
-        if missing_flag == 1:
-            val = DEFAULT_VALUES.get(expected_type, "")
-        
-        # 2. 값이 있는데 타입이 다른 경우, 강제 변환
+    flat: Dict[str, Any] = {}
+    if isinstance(doc, dict):
+        _flatten_into(doc, "", flat)
+    return flat
+
+# (모델 컬럼, 평면 뷰 경로) 목록. 매핑되지 않은 컬럼의 경로는 None 이므로 항상 결측 처리됩니다.
+FLAT_COLUMN_PATHS = tuple((col, _resolve_source_path(col)) for col in MODEL_COLUMNS)
+
+def map_flat_to_model_columns(flat: Dict[str, Any]) -> Dict[str, Any]:
+    """flatten_event 로 만든 평면 뷰를 모델이 사용하는 피처 이름으로 매핑합니다."""
+    get = flat.get
+    return {col: get(path) for col, path in FLAT_COLUMN_PATHS}
+
+# --- 스키마 컴파일 변환기(Converter) ---
+# LogFeatures 스키마를 모듈 로드 시 한 번만 (필드, 결측 플래그 필드, 원본 키, 변환 함수, 기본값 생성자) 튜플로 컴파일합니다.
+
+# Pydantic 오류에 맞춰 실제 모델이 요구하는 타입으로 수정
+FIELD_TYPES = {
+    # 기존 타입 정의
+    "System_Version": "int", "port": "str", "ProcessId": "str",
+    "RecordNumber": "int", "ExecutionProcessID": "int", "ThreadID": "int",
+    "SourceProcessId": "int",
+    "EventID": "str",
+    "Keywords": "list",
+    "ActivityID": "dict"
+}
+DEFAULT_TYPE = "str"
+
+def _convert_int(val):
+    try:
+        return int(val)
+    except (ValueError, TypeError):
+        return 0
+
+def _convert_str(val):
+    return val if type(val) is str else str(val)
+
+@lru_cache(maxsize=4096)
+def _parse_list_literal(val: str):
+    """
+    "['Audit Success']" 같은 문자열을 실제 리스트로 변환합니다. (eval 대신 json.loads 사용)
+    Keywords 값은 종류가 많지 않으므로 파싱 결과를 캐시합니다.
+    """
+    try:
+        parsed = json.loads(val.replace("'", '"'))
+    except (json.JSONDecodeError, TypeError):
+        return (val,)  # 변환 실패 시, 문자열 자체를 요소로 갖는 리스트로 만듦
+    return tuple(parsed) if isinstance(parsed, list) else parsed
+
+def _convert_list(val):
+    if isinstance(val, list):
+        return val
+    if isinstance(val, str):
+        parsed = _parse_list_literal(val)
+        return list(parsed) if isinstance(parsed, tuple) else parsed  # 캐시된 값이 변경되지 않도록 복사
+    return []  # 문자열이 아니면서 리스트도 아니면 빈 리스트로 초기화
+
+def _convert_dict(val):
+    return val if isinstance(val, dict) else {}
+
+_CONVERTERS = {"int": _convert_int, "str": _convert_str, "list": _convert_list, "dict": _convert_dict}
+_DEFAULT_FACTORIES = {"int": int, "str": str, "list": list, "dict": dict}
+
+def _source_key(field: str) -> str:
+    """스키마 필드 값을 읽을 매핑 결과의 키를 찾습니다. ('System_Version' -> 'System.Version')"""
+    if field in MODEL_COLUMNS:
+        return field
+    return next((c for c in MODEL_COLUMNS if c.replace('.', '_') == field), field)
+
+def _compile_feature_plan():
+    plan = []
+    for field in LogFeatures.model_fields:
+        if field.endswith('_missing'):
+            continue
+        expected_type = FIELD_TYPES.get(field, DEFAULT_TYPE)
+        plan.append((field, f"{field}_missing", _source_key(field),
+                     _CONVERTERS[expected_type], _DEFAULT_FACTORIES[expected_type]))
+    return tuple(plan)
+
+FEATURE_PLAN = _compile_feature_plan()
+
+def _fill_row(mapped_log: Dict[str, Any], row: Dict[str, Any]) -> Dict[str, Any]:
+    """컴파일된 변환기로 값과 결측 플래그를 출력 행(row)에 직접 기록합니다."""
+    get = mapped_log.get
+    for field, missing_field, source_key, convert, default in FEATURE_PLAN:
+        val = get(source_key)
+        if val is None or val == '':
+            # 값이 없을 경우, 기대 타입에 맞는 기본값 사용
+            row[field] = default()
+            row[missing_field] = 1
         else:
-            if expected_type == "int":
-                try:
-                    val = int(val)
-                except (ValueError, TypeError):
-                    val = 0
-            elif expected_type == "str":
-                val = str(val)
-            elif expected_type == "list":
-                if isinstance(val, str):
-                    try:
-                        # "['Audit Success']" 같은 문자열을 실제 리스트로 변환
-                        # eval 대신 더 안전한 json.loads 사용
-                        val = json.loads(val.replace("'", '"'))
-                    except (json.JSONDecodeError, TypeError):
-                        val = [val] # 변환 실패 시, 문자열 자체를 요소로 갖는 리스트로 만듦
-                elif not isinstance(val, list):
-                     val = [] # 문자열이 아니면서 리스트도 아니면 빈 리스트로 초기화
-            elif expected_type == "dict" and not isinstance(val, dict):
-                val = {}
-        
-        processed[col] = val
-        processed[f"{col}_missing"] = missing_flag
-        
-    return processed
\ No newline at end of file
+            # 값이 있는데 타입이 다른 경우, 강제 변환
+            row[field] = convert(val)
+            row[missing_field] = 0
+    return row
+
+def fill_and_mask_missing_features(mapped_log):
+    """
+    결측치를 타입별 기본값으로 채우고, 각 필드의 결측 여부를 `<필드>_missing` 플래그로 기록합니다.
+    """
+    return _fill_row(mapped_log, {})
+
+def fill_and_mask_missing_features_batch(mapped_logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """매핑된 로그 리스트 전체를 한 번의 호출로 변환합니다."""
+    fill_row = _fill_row
+    return [fill_row(mapped_log, {}) for mapped_log in mapped_logs]
@@ -1,4 +1,9 @@
 # app/main.py
+
+# --- CPU 스레드 예산 (numpy/sklearn 등 네이티브 라이브러리가 로드되기 전에 적용) ---
+from app.core.cpu_budget import cpu_budget, apply_thread_limits, install_default_executor
+apply_thread_limits(cpu_budget)
+
 import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,6 +16,11 @@ from app.api import updates, dashboard, agent_downloader, agent_registration
 from app.consumers.winlogbeat_consumer import run_winlogbeat_consumer
 from app.consumers.traffic_consumer import run_traffic_consumer
 from app.services.kafka_service import KafkaService
+from app.ml.inference_server import inference_client
+from app.services.threat_intel import threat_intel
+from app.services.process_tree import process_tree
+from app.services.es_index_manager import es_index_manager
+from app.services.es_writer import spill_replayer
 from app.core.database import es_client, Base, async_engine
 
 # FastAPI 애플리케이션 생성
@@ -43,17 +53,31 @@ background_tasks = set()
 async def startup_event():
     """애플리케이션 시작 시 실행되는 이벤트 핸들러"""
     print("애플리케이션 시작...")
+    install_default_executor(cpu_budget)
     
     # Elasticsearch 연결 확인
     if not await es_client.ping():
         raise RuntimeError("Elasticsearch에 연결할 수 없습니다.")
     print("Elasticsearch 연결 확인 완료.")
 
+    # 일 단위 롤오버 인덱스용 ILM 정책 및 인덱스 템플릿 설치
+    await es_index_manager.setup(es_client)
+
     # DB 테이블 생성
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     print("데이터베이스 테이블 확인/생성 완료.")
 
+    # 위협 인텔리전스 피드 적재 (Consumer 시작 전에 차단 목록을 준비)
+    await threat_intel.start()
+
+    # 프로세스 트리 스냅샷 적재 (재시작 전에 기록된 프로세스의 조상 체인 유지)
+    await process_tree.start()
+
+    # ES spill 버퍼 열기 및 재색인 태스크 시작 (이전 실행에서 남은 세그먼트도 재색인)
+    if spill_replayer is not None:
+        await spill_replayer.start()
+
     # Kafka Producer 초기화
     await KafkaService.get_producer()
 
@@ -74,6 +98,11 @@ async def shutdown_event():
     """애플리케이션 종료 시 실행되는 이벤트 핸들러"""
     print("애플리케이션 종료 절차 시작...")
     await KafkaService.close_producer()
+    await inference_client.close()
+    await threat_intel.stop()
+    await process_tree.stop()
+    if spill_replayer is not None:
+        await spill_replayer.stop()
     await es_client.close()
     print("모든 리소스가 정상적으로 종료되었습니다.")
 
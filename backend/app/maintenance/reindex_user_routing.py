@@ -0,0 +1,177 @@
+# app/maintenance/reindex_user_routing.py
+"""
+routing 없이 색인된 기존 일 단위 인덱스를 user_id routing 으로 재색인하는 마이그레이션 도구.
+
+ES_USER_ROUTING_ENABLED 를 켜면 새 문서는 user_id 를 routing 값으로 색인되지만, 그 전에 색인된 문서는 _id 기준으로
+모든 샤드에 흩어져 있어 routing 조회 시 누락됩니다. (그래서 ES_USER_ROUTING_SINCE 이전 구간은 routing 없이 조회)
+이 도구는 ES_USER_ROUTING_SINCE(없으면 오늘) 이전 날짜의 `<base>-YYYY.MM.DD` 인덱스마다
+1. 원본 인덱스에 쓰기 차단(index.blocks.write)을 걸고
+2. `<인덱스>-routed` 로 _reindex 하면서 painless 스크립트로 ctx._routing = user_id 를 지정한 뒤
+3. 문서 수가 같은지 확인하고, 원본 삭제와 같은 이름의 별칭 추가를 한 번의 aliases 요청으로 원자적으로 수행합니다.
+조회/쓰기 코드는 인덱스 이름을 그대로 사용하므로 별칭으로 바뀌어도 수정할 필요가 없습니다.
+새 인덱스의 ILM 보존 기간은 원본의 생성 시각(index.lifecycle.origination_date)부터 계산합니다.
+
+쓰기를 차단하므로 오늘(현재 색인 중인) 인덱스는 대상에서 제외합니다. 모든 대상 인덱스를 재색인한 뒤
+ES_USER_ROUTING_SINCE 를 비우면 전체 구간의 사용자 조회가 routing 으로 샤드 하나만 검색합니다.
+--include-legacy 를 주면 롤오버 이전 고정 인덱스(<base>)도 ILM 정책 없이 같은 방식으로 재색인합니다.
+고정 인덱스는 조회 대상(indices_for_range)에 항상 포함되므로, 존재하는데 재색인하지 않았으면
+ES_USER_ROUTING_SINCE 를 비우라고 안내하지 않습니다. (legacy_pending)
+
+    cd backend
+    python -m app.maintenance.reindex_user_routing --dry-run
+    python -m app.maintenance.reindex_user_routing --days 30 --requests-per-second 5000
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from elasticsearch import AsyncElasticsearch
+
+from src.core.config import settings
+from src.core.es_client import es_client
+from app.services.es_index_manager import es_index_manager
+
+logger = logging.getLogger(__name__)
+
+ROUTED_SUFFIX = "-routed"
+ROUTING_SCRIPT = {
+    "lang": "painless",
+    "source": "if (ctx._source.user_id != null) { ctx._routing = String.valueOf(ctx._source.user_id); }",
+}
+
+
+def candidate_indices(bases: List[str], days: int, until: date, include_legacy: bool) -> List[str]:
+    """until 이전 days 일 동안의 일 단위 인덱스 이름 목록을 오래된 날짜부터 반환합니다. (고정 인덱스가 있으면 맨 앞)"""
+    names = list(bases) if include_legacy else []
+    if not es_index_manager.enabled:
+        return names  # 일 단위 인덱스를 쓰지 않으면 고정 인덱스만 대상 (색인 중인 인덱스이므로 --include-legacy 로만 지정)
+    for offset in range(days, 0, -1):
+        day = datetime.combine(until - timedelta(days=offset), datetime.min.time(), tzinfo=timezone.utc)
+        names += [es_index_manager.write_index(base, day) for base in bases]
+    return names
+
+
+async def _wait_for_task(es: AsyncElasticsearch, task_id: str, poll_interval: float) -> Dict[str, Any]:
+    while True:
+        task = await es.tasks.get(task_id=task_id)
+        if task.get("completed"):
+            return task
+        status = task.get("task", {}).get("status", {})
+        logger.info(f"ℹ️ 재색인 진행 중: {status.get('created', 0)}/{status.get('total', 0)}건")
+        await asyncio.sleep(poll_interval)
+
+
+async def migrate_index(es: AsyncElasticsearch, name: str, legacy: bool, dry_run: bool,
+                        requests_per_second: Optional[float], poll_interval: float) -> str:
+    """인덱스 하나를 routing 으로 재색인하고 결과 상태를 반환합니다."""
+    info = await es.indices.get(index=name, ignore_unavailable=True)
+    if not info:
+        return "missing"
+    if name not in info:
+        return "already_migrated"  # 이미 별칭(-> <name>-routed)으로 바뀐 인덱스
+
+    source_count = (await es.count(index=name))["count"]
+    target = name + ROUTED_SUFFIX
+    if dry_run:
+        logger.info(f"ℹ️ [dry-run] {name} -> {target} ({source_count}건)")
+        return "planned"
+
+    await es.indices.put_settings(index=name, settings={"index.blocks.write": True})
+    try:
+        if legacy:
+            # 고정 인덱스는 원래 ILM 정책이 없으므로 <base>-* 템플릿의 정책을 적용하지 않음
+            target_settings = {"index.lifecycle.name": ""}
+        else:
+            creation_date = info[name]["settings"]["index"]["creation_date"]
+            target_settings = {"index.lifecycle.origination_date": int(creation_date)}
+        if await es.indices.exists(index=target):
+            await es.indices.delete(index=target)  # 이전 실행에서 중단된 재색인 결과
+        await es.indices.create(index=target, settings=target_settings)
+
+        response = await es.reindex(
+            source={"index": name},
+            dest={"index": target, "op_type": "create"},
+            script=ROUTING_SCRIPT,
+            slices="auto",
+            requests_per_second=requests_per_second or -1,
+            wait_for_completion=False,
+        )
+        task = await _wait_for_task(es, response["task"], poll_interval)
+        result = task.get("response", {})
+        if task.get("error") or result.get("failures"):
+            raise RuntimeError(f"재색인 실패: {task.get('error') or result.get('failures')[:3]}")
+
+        await es.indices.refresh(index=target)
+        target_count = (await es.count(index=target))["count"]
+        if target_count != source_count:
+            raise RuntimeError(f"문서 수 불일치: 원본 {source_count}건, 재색인 {target_count}건")
+
+        # 원본 삭제와 별칭 추가를 원자적으로 수행 (조회/쓰기 대상 이름은 그대로 유지)
+        await es.indices.update_aliases(actions=[
+            {"remove_index": {"index": name}},
+            {"add": {"index": target, "alias": name, "is_write_index": True}},
+        ])
+    except Exception:
+        await es.indices.put_settings(index=name, settings={"index.blocks.write": False})
+        raise
+    logger.info(f"✅ {name} 재색인 완료: {target_count}건 -> {target} (별칭 {name})")
+    return "migrated"
+
+
+async def run(args: argparse.Namespace) -> Dict[str, str]:
+    today = datetime.now(timezone.utc).date()
+    since = es_index_manager.user_routing_since
+    until = min(since, today) if since else today
+    bases = args.base or list(es_index_manager.bases)
+    names = candidate_indices(bases, args.days, until, args.include_legacy)
+    es = es_client.options(request_timeout=args.request_timeout)
+
+    results = {}
+    try:
+        if not args.include_legacy:
+            # 재색인하지 않는 고정 인덱스가 routing 없이 남아 있는지 확인 (별칭이면 이미 재색인된 것)
+            for base in bases:
+                info = await es.indices.get(index=base, ignore_unavailable=True)
+                if base in info:
+                    results[base] = "legacy_pending"
+        for name in names:
+            legacy = name in bases
+            try:
+                results[name] = await migrate_index(es, name, legacy, args.dry_run, args.requests_per_second, args.poll_interval)
+            except Exception as e:
+                logger.error(f"❌ {name} 재색인 실패 (원본 유지): {e}")
+                results[name] = f"failed: {e}"
+    finally:
+        await es_client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", action="append", help="대상 기본 인덱스 (여러 번 지정 가능, 기본값: Winlogbeat/Packetbeat)")
+    parser.add_argument("--days", type=int, default=settings.es_index_retention_days, help="ES_USER_ROUTING_SINCE(또는 오늘) 이전 며칠을 재색인할지")
+    parser.add_argument("--include-legacy", action="store_true", help="롤오버 이전 고정 인덱스(<base>)도 재색인")
+    parser.add_argument("--requests-per-second", type=float, default=None, help="재색인 속도 제한 (기본값: 제한 없음)")
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--request-timeout", type=float, default=300.0)
+    parser.add_argument("--dry-run", action="store_true", help="대상 인덱스와 문서 수만 출력")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    results = asyncio.run(run(args))
+    for name, status in results.items():
+        print(f"{name}: {status}")
+    if args.dry_run or any(status.startswith("failed") for status in results.values()):
+        return
+    pending = [name for name, status in results.items() if status == "legacy_pending"]
+    if pending:
+        print(f"고정 인덱스 {', '.join(pending)} 가 아직 routing 없이 남아 있습니다. "
+              "--include-legacy 로 재색인하기 전에는 ES_USER_ROUTING_SINCE 를 비우지 마세요.")
+    else:
+        print("모든 대상 인덱스를 재색인했습니다. ES_USER_ROUTING_SINCE 를 비우면 전체 구간 조회에 routing 이 적용됩니다.")
+
+
+if __name__ == "__main__":
+    main()
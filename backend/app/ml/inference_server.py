@@ -0,0 +1,313 @@
+# app/ml/inference_server.py
+"""
+여러 API/Consumer 워커가 공유하는 로컬 배치 추론 서버.
+
+- 서버는 별도 프로세스로 실행되며 모델을 한 번만 로드합니다.
+    python -m app.ml.inference_server
+- 워커는 Unix 소켓으로 요청을 보내고, 서버는 모든 워커의 요청을
+  최대 대기 시간(max_wait) 안에서 하나의 큰 배치로 합쳐 예측합니다.
+- 클라이언트는 요청 ID별 Future로 결과를 돌려받습니다.
+
+소켓은 같은 호스트(컨테이너)의 신뢰된 프로세스 간 통신 전용이므로
+메시지는 길이 접두(4바이트) + pickle 프레임으로 주고받습니다.
+"""
+import os
+import sys
+import asyncio
+import itertools
+import logging
+import pickle
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# --- 프로젝트 경로 설정 (스크립트로 직접 실행할 때를 대비) ---
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.core.config import settings
+
+if __name__ == "__main__":
+    # 추론 서버 프로세스: OpenMP/BLAS 스레드 환경 변수는 numpy/sklearn 이 로드될 때 읽히므로 import 전에 적용
+    # (추론 서버는 모든 워커의 예측을 전담하므로 노드의 코어 전체를 사용)
+    from app.core.cpu_budget import compute_cpu_budget, apply_thread_limits
+    apply_thread_limits(compute_cpu_budget(workers=1))
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">I")
+KIND_LOG = "log"
+KIND_TRAFFIC = "traffic"
+
+
+class InferenceServerError(RuntimeError):
+    """추론 서버가 요청 처리 중 오류를 반환함 (워커는 로컬 예측으로 대체)"""
+
+
+# --- 프레임 입출력 헬퍼 ---
+
+async def _read_frame(reader: asyncio.StreamReader) -> Any:
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    return pickle.loads(await reader.readexactly(length))
+
+def _encode_frame(obj: Any) -> bytes:
+    body = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(body)) + body
+
+
+# --- 서버 측 마이크로 배처 ---
+
+@dataclass
+class _PendingRequest:
+    payload: Any
+    size: int
+    future: asyncio.Future = field(repr=False)
+
+
+class _MicroBatcher:
+    """
+    하나의 모델(로그/트래픽)에 대한 요청을 모아 배치로 예측합니다.
+    첫 요청이 도착한 시점부터 max_wait 동안, 또는 max_batch_size에 도달할 때까지 요청을 합칩니다.
+    """
+    def __init__(
+        self,
+        name: str,
+        predict_fn: Callable[[Any], Any],
+        merge_fn: Callable[[List[Any]], Any],
+        max_batch_size: int,
+        max_wait: float,
+    ):
+        self.name = name
+        self.predict_fn = predict_fn
+        self.merge_fn = merge_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue: "asyncio.Queue[_PendingRequest]" = asyncio.Queue()
+        self.stats = {"requests": 0, "batches": 0, "rows": 0}
+
+    def submit(self, payload: Any, size: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait(_PendingRequest(payload=payload, size=size, future=future))
+        return future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self.queue.get()
+            pending, total = [first], first.size
+            deadline = loop.time() + self.max_wait
+
+            # 마감 시간 또는 최대 배치 크기까지 다른 워커의 요청을 합칩니다.
+            while total < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                total += item.size
+
+            try:
+                merged = self.merge_fn([p.payload for p in pending])
+                results = await asyncio.to_thread(self.predict_fn, merged)
+            except Exception as e:
+                logger.error(f"❌ 추론 서버 {self.name} 배치 예측 실패: {e}")
+                for p in pending:
+                    if not p.future.done():
+                        p.future.set_exception(e)
+                continue
+
+            # 합쳐진 결과를 요청별로 다시 나눠 돌려줍니다.
+            offset = 0
+            for p in pending:
+                if not p.future.done():
+                    p.future.set_result(results[offset:offset + p.size])
+                offset += p.size
+
+            self.stats["requests"] += len(pending)
+            self.stats["batches"] += 1
+            self.stats["rows"] += total
+
+
+class InferenceServer:
+    """
+    Unix 소켓으로 예측 요청을 받아 모델별 마이크로 배처에 전달하는 서버.
+    """
+    def __init__(
+        self,
+        socket_path: str = settings.inference_socket_path,
+        max_batch_size: int = settings.inference_max_batch_size,
+        max_wait_ms: int = settings.inference_max_wait_ms,
+    ):
+        from app.ml.predictor import get_predictor
+        from app.core.cpu_budget import compute_cpu_budget, apply_thread_limits
+
+        self.socket_path = socket_path
+        # 추론 서버는 모든 워커의 예측을 전담하므로 노드의 코어 전체를 사용합니다. (모델 로드 전에 적용)
+        budget = compute_cpu_budget(workers=1)
+        apply_thread_limits(budget)
+        predictor = get_predictor()  # 모델은 이 프로세스에서 한 번만 로드됩니다.
+        predictor.configure_threads(budget.model_threads)
+        max_wait = max_wait_ms / 1000
+        self.batchers: Dict[str, _MicroBatcher] = {
+            KIND_LOG: _MicroBatcher(
+                KIND_LOG, predictor.predict_log_threat_batch,
+                lambda payloads: list(itertools.chain.from_iterable(payloads)),
+                max_batch_size, max_wait,
+            ),
+            KIND_TRAFFIC: _MicroBatcher(
+                KIND_TRAFFIC, predictor.predict_traffic_threat_batch,
+                lambda payloads: pd.concat(payloads, ignore_index=True),
+                max_batch_size, max_wait,
+            ),
+        }
+
+    async def _handle_request(self, request_id: int, kind: str, payload: Any,
+                              writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        try:
+            batcher = self.batchers[kind]
+            result = await batcher.submit(payload, len(payload))
+            response = (request_id, True, result)
+        except Exception as e:
+            response = (request_id, False, repr(e))
+        async with write_lock:
+            writer.write(_encode_frame(response))
+            await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                request_id, kind, payload = await _read_frame(reader)
+                task = asyncio.create_task(self._handle_request(request_id, kind, payload, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass  # 워커 연결 종료
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        batch_tasks = [asyncio.create_task(b.run()) for b in self.batchers.values()]
+        logger.info(f"🚀 추론 서버 시작: socket={self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in batch_tasks:
+                task.cancel()
+
+
+# --- 워커(클라이언트) 측 ---
+
+class InferenceClient:
+    """
+    추론 서버에 연결하는 워커 측 클라이언트.
+    하나의 연결을 여러 코루틴이 공유하며, 응답은 요청 ID별 Future로 전달됩니다.
+    """
+    def __init__(self, socket_path: str = settings.inference_socket_path,
+                 request_timeout: float = settings.inference_request_timeout):
+        self.socket_path = socket_path
+        self.request_timeout = request_timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _ensure_connected(self):
+        if self.connected:
+            return
+        async with self._connect_lock:
+            if self.connected:
+                return
+            self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+            self._reader_task = asyncio.create_task(self._read_responses())
+            logger.info(f"추론 서버 연결 성공: socket={self.socket_path}")
+
+    async def _read_responses(self):
+        try:
+            while True:
+                request_id, ok, result = await _read_frame(self._reader)
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(InferenceServerError(f"추론 서버 오류: {result}"))
+        except (asyncio.IncompleteReadError, ConnectionResetError) as e:
+            self._fail_pending(ConnectionError(f"추론 서버 연결이 끊어졌습니다: {e}"))
+        finally:
+            if self._writer:
+                self._writer.close()
+            self._writer = None
+
+    def _fail_pending(self, exc: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(exc)
+        self._pending.clear()
+
+    async def _request(self, kind: str, payload: Any) -> Any:
+        await self._ensure_connected()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            async with self._write_lock:
+                # 락을 기다리는 동안 _read_responses 가 연결을 정리했을 수 있으므로 락 안에서 writer 를 다시 확인
+                writer = self._writer
+                if writer is None or writer.is_closing():
+                    raise ConnectionError("추론 서버 연결이 끊어졌습니다.")
+                writer.write(_encode_frame((request_id, kind, payload)))
+                await writer.drain()
+            return await asyncio.wait_for(future, self.request_timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def predict_log_threat_batch(self, processed_logs: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+        if not processed_logs:
+            return []
+        return await self._request(KIND_LOG, processed_logs)
+
+    async def predict_traffic_threat_batch(self, features_batch_df: pd.DataFrame) -> np.ndarray:
+        if features_batch_df.empty:
+            return np.array([])
+        return await self._request(KIND_TRAFFIC, features_batch_df)
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
+        self._writer = None
+
+
+inference_client = InferenceClient()
+
+
+# --- 스크립트 실행 ---
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(InferenceServer().serve_forever())
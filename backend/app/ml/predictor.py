@@ -4,10 +4,12 @@ import joblib
 import json
 import numpy as np
 import pandas as pd
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Optional
 
 from src.core.config import settings
 from app.schemas.schemas import TrafficFeatures, LogFeatures
+from app.ml.shadow import ShadowEvaluator
+from app.core.cpu_budget import cpu_budget, configure_model_threads
 from app.core.preprocessing import (
     map_sysmon_to_model_columns,
     fill_and_mask_missing_features
@@ -39,14 +41,31 @@ class Predictor:
             self.log_label_map = {0: "DCOM 공격", 1: "DLL 하이재킹", 2: "WMI 공격", 3: "방어 회피 (MSBuild)", 4: "원격 서비스 공격", 5: "원격 서비스 공격 (WinRM)", 6: "원격 서비스 악용 (Zerologon)", 7: "정상", 8: "지속성 (계정 생성)", 9: "스케줄 작업 공격"}
             print("Winlogbeat 로그 분석 모델 로드 완료.", flush=True)
 
+            # --- Winlogbeat Cascade 1단계 모델 로드 (선택) ---
+            self.log_cascade_stage = None
+            self.log_cascade_threshold = settings.log_cascade_benign_threshold
+            self.log_cascade_stats = {"cleared": 0, "escalated": 0}
+            if settings.log_cascade_enabled and settings.log_cascade_model_path:
+                self.set_log_cascade_stage(joblib.load(settings.log_cascade_model_path))
+                print(f"Winlogbeat Cascade 1단계 모델 로드 완료. (임계값: {self.log_cascade_threshold})", flush=True)
+
             # --- Packetbeat 모델 로드 ---
             self.traffic_model = joblib.load(settings.traffic_model_path)
             self.traffic_imputer = joblib.load(settings.traffic_imputer_path)
             self.traffic_scaler = joblib.load(settings.traffic_scaler_path)
             self.traffic_label_encoder = joblib.load(settings.traffic_encoder_path)
             self.traffic_feature_order = list(TrafficFeatures.model_fields.keys())
+            # 모델이 학습한 입력 컬럼 (윈도우 집계 피처 등 모델이 모르는 추가 컬럼은 예측 시 제외)
+            self.traffic_input_columns = list(getattr(self.traffic_imputer, "feature_names_in_", self.traffic_feature_order))
             print("Packetbeat 트래픽 분석 모델 로드 완료.", flush=True)
 
+            # --- 워커당 CPU 예산에 맞춰 모델 스레드 수 설정 ---
+            self.configure_threads(cpu_budget.model_threads)
+
+            # --- Shadow 후보 모델 로드 (선택) ---
+            self.log_shadow = self._load_log_shadow(settings.shadow_log_model_path)
+            self.traffic_shadow = self._load_traffic_shadow(settings.shadow_traffic_model_path)
+
         except Exception as e:
             print(f"모델 로딩 중 심각한 오류 발생: {e}", flush=True)
             raise RuntimeError("ML 모델 초기화에 실패했습니다.") from e
@@ -54,6 +73,56 @@ class Predictor:
         self._initialized = True
         print("ML Predictor 초기화 완료.", flush=True)
 
+    # --- Shadow 모드 ---
+
+    @staticmethod
+    def _load_candidate(path: str) -> Dict[str, Any]:
+        """후보 모델 아티팩트를 로드합니다. 단일 모델 또는 {"model": ..., 전처리기...} 딕셔너리를 지원합니다."""
+        artifact = joblib.load(path)
+        return artifact if isinstance(artifact, dict) else {"model": artifact}
+
+    def _load_log_shadow(self, path: str) -> Optional[ShadowEvaluator]:
+        if not path:
+            return None
+        candidate = self._load_candidate(path)
+        scaler = candidate.get("scaler", self.log_scaler)
+        label_map = candidate.get("label_map", self.log_label_map)
+        model = candidate["model"]
+
+        def predict(X_batch: pd.DataFrame) -> List[str]:
+            scaled = scaler.transform(X_batch)
+            if hasattr(model, "predict_proba"):
+                indices = np.argmax(model.predict_proba(scaled), axis=1)
+            else:
+                indices = model.predict(scaled)
+            return [label_map.get(int(i), "Unknown") for i in indices]
+
+        print(f"Winlogbeat Shadow 후보 모델 로드 완료: {path}", flush=True)
+        return ShadowEvaluator("log", predict, settings.shadow_sample_rate, settings.shadow_queue_size)
+
+    def _load_traffic_shadow(self, path: str) -> Optional[ShadowEvaluator]:
+        if not path:
+            return None
+        candidate = self._load_candidate(path)
+        imputer = candidate.get("imputer", self.traffic_imputer)
+        scaler = candidate.get("scaler", self.traffic_scaler)
+        label_encoder = candidate.get("label_encoder", self.traffic_label_encoder)
+        model = candidate["model"]
+
+        def predict(features_batch_df: pd.DataFrame) -> List[str]:
+            imputed_df = pd.DataFrame(imputer.transform(features_batch_df), columns=features_batch_df.columns)
+            return list(label_encoder.inverse_transform(model.predict(scaler.transform(imputed_df))))
+
+        print(f"Packetbeat Shadow 후보 모델 로드 완료: {path}", flush=True)
+        return ShadowEvaluator("traffic", predict, settings.shadow_sample_rate, settings.shadow_queue_size)
+
+    def shadow_report(self) -> Dict[str, Any]:
+        """Shadow 평가 현황(클래스별 일치율, 지연 시간, 드롭 수)을 반환합니다."""
+        return {
+            "log": self.log_shadow.report() if self.log_shadow else None,
+            "traffic": self.traffic_shadow.report() if self.traffic_shadow else None,
+        }
+
     def predict_log_threat(self, log_data: Dict[str, Any]) -> Tuple[str, float]:
         """단일 로그 예측 시, batch 메서드를 호출하도록 변경"""
         return self.predict_log_threat_batch([log_data])[0]
@@ -65,37 +134,91 @@ class Predictor:
 
     # 아래 두 개의 batch 메서드가 이번 오류의 해결점입니다. ---
 
-    def predict_log_threat_batch(self, processed_logs: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    def configure_threads(self, threads: int):
+        """로드된 모델들의 n_jobs/nthread 등 스레드 수 파라미터를 설정합니다."""
+        configure_model_threads(self.log_model, threads)
+        configure_model_threads(self.traffic_model, threads)
+        if self.log_cascade_stage:
+            configure_model_threads(self.log_cascade_stage["model"], threads)
+
+    def set_log_cascade_stage(self, stage: Optional[Dict[str, Any]], threshold: Optional[float] = None):
+        """
+        Cascade 1단계 모델을 설정합니다.
+        stage는 {"model": predict_proba를 지원하는 경량 분류기, "features": 사용할 피처 목록, "benign_class": 정상 클래스 값} 형태입니다.
+        None을 전달하면 단일 단계(전체 모델) 예측으로 돌아갑니다.
+        """
+        if stage is not None:
+            model = stage["model"]
+            classes = list(getattr(model, "classes_", [0, 1]))
+            stage = {**stage, "benign_column": classes.index(stage.get("benign_class", 1))}
+        self.log_cascade_stage = stage
+        if threshold is not None:
+            self.log_cascade_threshold = threshold
+
+    def _encode_log_batch(self, processed_logs: List[Dict[str, Any]]) -> pd.DataFrame:
+        """전처리된 로그 피처들을 검증하고, 모델 입력용 수치 DataFrame으로 변환합니다."""
+        numeric_dicts = []
+        for log in processed_logs:
+            numeric_dict = {}
+            dumped_log = LogFeatures(**log).model_dump()
+            for field_name in self.log_base_feature_columns:
+                # 스키마 밖의 추가 피처(윈도우 집계 등)는 모델 컬럼에 포함된 경우에만 원본 dict에서 읽음
+                value = dumped_log[field_name] if field_name in dumped_log else log.get(field_name)
+                if isinstance(value, str): numeric_dict[field_name] = len(value)
+                elif isinstance(value, (list, dict)): numeric_dict[field_name] = len(value)
+                else: numeric_dict[field_name] = value
+            numeric_dicts.append(numeric_dict)
+        return pd.DataFrame(numeric_dicts, columns=self.log_base_feature_columns)
+
+    def _classify_log_matrix(self, X_batch: pd.DataFrame) -> List[Tuple[str, float]]:
+        """수치 DataFrame을 스케일링한 뒤 전체 다중 분류 모델로 예측합니다."""
+        x_scaled_batch = self.log_scaler.transform(X_batch)
+        preds_proba_batch = self.log_model.predict_proba(x_scaled_batch)
+
+        results = []
+        for pred_proba in preds_proba_batch:
+            pred_index = int(np.argmax(pred_proba))
+            pred_score = float(pred_proba[pred_index])
+            label_name = self.log_label_map.get(pred_index, "Unknown")
+            results.append((label_name, pred_score))
+        return results
+
+    def _cascade_benign_proba(self, X_batch: pd.DataFrame) -> np.ndarray:
+        """Cascade 1단계 모델로 각 로그가 정상일 확률을 계산합니다. (소수 피처만 사용)"""
+        stage = self.log_cascade_stage
+        subset = X_batch[stage["features"]].fillna(0).to_numpy()
+        return stage["model"].predict_proba(subset)[:, stage["benign_column"]]
+
+    def predict_log_threat_batch(self, processed_logs: List[Dict[str, Any]], use_cascade: Optional[bool] = None) -> List[Tuple[str, float]]:
         """
         모든 전처리가 완료된 로그 피처 리스트를 받아 일괄 예측을 수행합니다.
+        Cascade가 설정되어 있으면 1단계에서 확실한 정상 로그를 걸러내고, 나머지만 전체 모델로 예측합니다.
         """
         try:
-            valid_logs = [LogFeatures(**log) for log in processed_logs]
-            numeric_dicts = []
-            for log_features in valid_logs:
-                numeric_dict = {}
-                dumped_log = log_features.model_dump()
-                for field_name in self.log_base_feature_columns:
-                    value = dumped_log.get(field_name)
-                    if isinstance(value, str): numeric_dict[field_name] = len(value)
-                    elif isinstance(value, (list, dict)): numeric_dict[field_name] = len(value)
-                    else: numeric_dict[field_name] = value
-                numeric_dicts.append(numeric_dict)
-            if not numeric_dicts: return []
-
-            X_batch = pd.DataFrame(numeric_dicts, columns=self.log_base_feature_columns)
-            
-            x_scaled_batch = self.log_scaler.transform(X_batch)
+            X_batch = self._encode_log_batch(processed_logs)
+            if X_batch.empty: return []
 
-            preds_proba_batch = self.log_model.predict_proba(x_scaled_batch)
-            
-            results = []
-            for pred_proba in preds_proba_batch:
-                pred_index = int(np.argmax(pred_proba))
-                pred_score = float(pred_proba[pred_index])
-                label_name = self.log_label_map.get(pred_index, "Unknown")
-                results.append((label_name, pred_score))
-                
+            if use_cascade is None:
+                use_cascade = self.log_cascade_stage is not None
+            if not use_cascade or self.log_cascade_stage is None:
+                results = self._classify_log_matrix(X_batch)
+                if self.log_shadow:
+                    self.log_shadow.offer(X_batch, [label for label, _ in results])
+                return results
+
+            benign_proba = self._cascade_benign_proba(X_batch)
+            cleared = benign_proba >= self.log_cascade_threshold
+            results: List[Tuple[str, float]] = [("정상", float(p)) for p in benign_proba]
+
+            uncertain_idx = np.flatnonzero(~cleared)
+            if len(uncertain_idx) > 0:
+                for i, result in zip(uncertain_idx, self._classify_log_matrix(X_batch.iloc[uncertain_idx])):
+                    results[i] = result
+
+            self.log_cascade_stats["cleared"] += int(cleared.sum())
+            self.log_cascade_stats["escalated"] += len(uncertain_idx)
+            if self.log_shadow:
+                self.log_shadow.offer(X_batch, [label for label, _ in results])
             return results
         except Exception as e:
             print(f"Winlogbeat 로그 일괄 예측 중 오류 발생: {e}", flush=True)
@@ -104,16 +227,36 @@ class Predictor:
     def predict_traffic_threat_batch(self, features_batch_df: pd.DataFrame) -> np.ndarray:
         """
         정제된 트래픽 DataFrame 배치를 받아 위협 여부를 일괄 예측합니다.
+        모델이 학습한 컬럼만 학습 순서대로 선택하며, 없는 컬럼은 결측치로 채워 imputer가 처리합니다.
         """
         try:
+            features_batch_df = features_batch_df.reindex(columns=self.traffic_input_columns)
             imputed_data = self.traffic_imputer.transform(features_batch_df)
             imputed_df = pd.DataFrame(imputed_data, columns=features_batch_df.columns)
             scaled_data = self.traffic_scaler.transform(imputed_df)
             prediction_numeric = self.traffic_model.predict(scaled_data)
             prediction_labels = self.traffic_label_encoder.inverse_transform(prediction_numeric)
+            if self.traffic_shadow:
+                self.traffic_shadow.offer(features_batch_df, prediction_labels)
             return prediction_labels
         except Exception as e:
             print(f"Packetbeat 트래픽 일괄 예측 중 오류 발생: {e}", flush=True)
             return np.array(["Prediction Error"] * len(features_batch_df))
 
-predictor = Predictor()
\ No newline at end of file
+
+def get_predictor() -> Predictor:
+    """
+    프로세스 내 싱글톤 Predictor를 반환합니다.
+    모델은 최초 호출 시점에 한 번만 로드되므로, 추론 서버를 사용하는 워커는 모델을 로드하지 않습니다.
+    """
+    return Predictor()
+
+
+def get_shadow_report() -> Dict[str, Any]:
+    """
+    이 프로세스에 로드된 Predictor의 Shadow 평가 현황을 반환합니다.
+    모델이 아직 로드되지 않았다면(예: 추론 서버 사용 시) 모델을 새로 로드하지 않고 빈 결과를 반환합니다.
+    """
+    if Predictor._instance is None or not Predictor._instance._initialized:
+        return {"log": None, "traffic": None}
+    return Predictor._instance.shadow_report()
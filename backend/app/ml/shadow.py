@@ -0,0 +1,103 @@
+# app/ml/shadow.py
+"""
+후보(candidate) 모델을 운영 경로 밖에서 평가하는 Shadow 모드.
+
+운영 Predictor가 예측한 배치 중 일부(sample_rate)를 제한된 크기의 큐에 넣고,
+백그라운드 스레드가 후보 모델로 다시 예측하여 클래스별 일치율과 지연 시간을 기록합니다.
+큐가 가득 차면 배치를 버리므로(drop) 운영 예측 경로에 지연을 추가하지 않습니다.
+"""
+import logging
+import queue
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowEvaluator:
+    """
+    :param name: 평가 대상 이름 (예: "log", "traffic")
+    :param candidate_predict: 피처 배치를 받아 레이블 목록을 반환하는 후보 모델 예측 함수
+    :param sample_rate: 운영 배치 중 shadow 평가로 보낼 비율 (0.0 ~ 1.0)
+    :param queue_size: 대기 큐 최대 길이. 가득 차면 새 배치를 버립니다.
+    """
+    def __init__(self, name: str, candidate_predict: Callable[[Any], Sequence[str]],
+                 sample_rate: float = 0.1, queue_size: int = 64, latency_window: int = 1000):
+        self.name = name
+        self.candidate_predict = candidate_predict
+        self.sample_rate = sample_rate
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._class_stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"samples": 0, "agreements": 0, "latency_ms": 0.0})
+        self._batch_latencies: deque = deque(maxlen=latency_window)
+        self._counters = {"offered": 0, "sampled": 0, "dropped": 0, "evaluated_batches": 0, "errors": 0}
+        self._worker = threading.Thread(target=self._run, name=f"shadow-{name}", daemon=True)
+        self._worker.start()
+
+    def offer(self, features: Any, primary_labels: Sequence[str]) -> bool:
+        """
+        운영 예측 결과를 shadow 평가 대상으로 제출합니다. (non-blocking)
+        샘플링에서 제외되거나 큐가 가득 차면 False를 반환합니다.
+        """
+        self._counters["offered"] += 1
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        try:
+            self._queue.put_nowait((features, list(primary_labels)))
+        except queue.Full:
+            self._counters["dropped"] += 1
+            return False
+        self._counters["sampled"] += 1
+        return True
+
+    def _run(self):
+        while True:
+            features, primary_labels = self._queue.get()
+            try:
+                start = time.perf_counter()
+                candidate_labels = self.candidate_predict(features)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+            except Exception as e:
+                self._counters["errors"] += 1
+                logger.error(f"❌ Shadow 모델({self.name}) 예측 실패: {e}")
+                continue
+
+            per_row_ms = elapsed_ms / max(1, len(primary_labels))
+            with self._lock:
+                self._counters["evaluated_batches"] += 1
+                self._batch_latencies.append(elapsed_ms)
+                for primary, candidate in zip(primary_labels, candidate_labels):
+                    stats = self._class_stats[str(primary)]
+                    stats["samples"] += 1
+                    stats["agreements"] += int(str(primary) == str(candidate))
+                    stats["latency_ms"] += per_row_ms
+
+    def report(self) -> Dict[str, Any]:
+        """클래스별 일치율/평균 지연 시간과 큐 상태를 반환합니다."""
+        with self._lock:
+            latencies = list(self._batch_latencies)
+            per_class = {
+                label: {
+                    "samples": int(stats["samples"]),
+                    "agreement_rate": stats["agreements"] / stats["samples"] if stats["samples"] else 0.0,
+                    "avg_latency_ms_per_event": stats["latency_ms"] / stats["samples"] if stats["samples"] else 0.0,
+                }
+                for label, stats in self._class_stats.items()
+            }
+        total = sum(v["samples"] for v in per_class.values())
+        agreed = sum(v["agreement_rate"] * v["samples"] for v in per_class.values())
+        return {
+            "name": self.name,
+            "sample_rate": self.sample_rate,
+            "queue_depth": self._queue.qsize(),
+            **self._counters,
+            "overall_agreement_rate": agreed / total if total else 0.0,
+            "batch_latency_p50_ms": float(np.percentile(latencies, 50)) if latencies else 0.0,
+            "batch_latency_p99_ms": float(np.percentile(latencies, 99)) if latencies else 0.0,
+            "per_class": per_class,
+        }
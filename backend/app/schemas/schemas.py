@@ -144,9 +144,9 @@ class IngestionResponse(BaseModel):
 class ThreatStatResponse(BaseModel):
     statistics: Dict[str, int]
 
-# class IncidentResponse(BaseModel):
-#     query: Dict[str, Any]
-#     result: Dict[str, Any]
+class IncidentResponse(BaseModel):
+    query: Dict[str, Any]
+    result: Dict[str, Any]
 
 class AttackEventResponse(BaseModel):
     id: int
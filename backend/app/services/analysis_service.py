@@ -5,20 +5,31 @@ import asyncio
 import time
 import hashlib
 import logging
+from collections import Counter
 from datetime import datetime, timezone
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Awaitable
 
 import pandas as pd
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from elasticsearch.helpers import async_bulk
 
 # --- 애플리케이션 내부 모듈 임포트 ---
 from app.core.redis_client import redis_client
-from app.core.preprocessing import map_sysmon_to_model_columns, fill_and_mask_missing_features
-from app.core.database import AsyncSessionLocal, es_client
+from app.core.preprocessing import flatten_event, map_flat_to_model_columns, fill_and_mask_missing_features_batch
+from app.core.database import AsyncSessionLocal
 from src.core.config import settings
-from app.ml.predictor import predictor
+from app.ml.predictor import get_predictor
+from app.ml.inference_server import inference_client, InferenceServerError
+from app.services.window_aggregator import window_aggregator, evaluate_window_rules, FAILED_LOGON_EVENT_ID
+from app.services.flow_state import flow_state_table
+from app.services.log_router import log_router
+from app.services.rule_engine import rule_engine
+from app.services.threat_intel import threat_intel, THREAT_INTEL_LABEL
+from app.core.ip_allowlist import ip_allowlist
+from app.services.es_index_manager import es_index_manager
+from app.services.es_writer import es_writer, BulkResult
+from app.services.es_projection import source_projector
+from app.services.process_tree import process_tree
 from app.models.models import AttackLog, AttackTraffic
 from app.schemas.schemas import RawTrafficData
 
@@ -40,6 +51,8 @@ WINLOG_IP_CANDIDATES = [
 ]
 # 유효하지 않은 IP 주소로 간주할 값들의 집합
 INVALID_IPS = {"-", "::1", "127.0.0.1"}
+# 트래픽 모델로 예측할 Packetbeat 문서 유형 (http/tls/dns 등 프로토콜 트랜잭션은 색인만 수행)
+PACKETBEAT_MODEL_TYPES = {"flow"}
 
 # --- 유틸리티 함수(Utility Functions) ---
 
@@ -62,21 +75,41 @@ def _get_nested_value(data: Dict[str, Any], path: str) -> Any:
             return None
     return val
 
-def get_ip_from_log(log_data: Dict[str, Any], candidates: List[str]) -> Optional[str]:
+def get_ip_from_log(flat_log: Dict[str, Any], candidates: List[str]) -> Optional[str]:
     """
-    주어진 로그 데이터와 후보 경로 목록에서 유효한 IP 주소를 찾습니다.
+    주어진 로그의 평면 뷰와 후보 경로 목록에서 유효한 IP 주소를 찾습니다.
     첫 번째로 발견되는 유효한 IP 주소를 반환합니다.
+    차단 금지 대역도 그대로 반환합니다. (공격 출처 기록은 유지하고, 차단 여부는 _publish_block_ip 에서 확인)
 
-    :param log_data: IP 주소를 찾을 로그 데이터(딕셔너리)
+    :param flat_log: flatten_event 로 평탄화한 로그 데이터 (점 경로 -> 값)
     :param candidates: IP 주소 후보 필드 경로 리스트
     :return: 찾은 IP 주소 문자열 또는 None
     """
     for path in candidates:
-        ip = _get_nested_value(log_data, path)
+        ip = flat_log.get(path)
         if isinstance(ip, str) and ip not in INVALID_IPS:
             return ip
     return None
 
+def classify_packetbeat_doc(raw_doc: Dict[str, Any]) -> str:
+    """
+    Packetbeat 문서의 유형을 반환합니다. (type -> event.dataset 순으로 확인)
+    유형 필드가 없는 문서는 flow 정보나 패킷 카운터가 있으면 flow 로, 아니면 "unknown" 으로 분류합니다.
+    """
+    doc_type = raw_doc.get("type") or _get_nested_value(raw_doc, "event.dataset")
+    if isinstance(doc_type, str) and doc_type:
+        return doc_type.lower()
+    if "flow" in raw_doc or _get_nested_value(raw_doc, "source.packets") is not None:
+        return "flow"
+    return "unknown"
+
+def _to_port(value: Any) -> Optional[int]:
+    """목적지 포트 값을 정수로 변환합니다. (문자열 "445" 와 정수 445 를 같은 포트로 집계하기 위함)"""
+    try:
+        return int(value) if value not in (None, "") else None
+    except (ValueError, TypeError):
+        return None
+
 # --- 서비스 클래스(Service Class) ---
 
 class AnalysisService:
@@ -87,79 +120,191 @@ class AnalysisService:
     - 머신러닝 모델을 사용하여 위협을 예측합니다.
     - 탐지된 공격 정보를 데이터베이스에 저장하고 대응 조치를 생성합니다.
     """
+    def __init__(self):
+        # Packetbeat 문서 유형별 처리 건수 (예측 대상 여부와 관계없이 수신한 모든 문서)
+        self.packetbeat_type_counts: Counter = Counter()
+        # Winlogbeat 탐지기 등록부: 라우팅 표(log_router)의 탐지기 이름 -> 로그 정보 배치를 받아 (레이블, 점수) 목록을 반환하는 함수
+        self.log_detectors: Dict[str, Callable[[List[Dict[str, Any]]], Awaitable[List[tuple]]]] = {
+            "log_model": self._detect_with_log_model,
+        }
+        unknown = log_router.detectors - set(self.log_detectors)
+        if unknown:
+            logger.warning(f"⚠️ 등록되지 않은 탐지기가 라우팅 표에 있습니다. 해당 이벤트는 색인만 수행됩니다: {sorted(unknown)}")
+
+    # --- 예측 실행 헬퍼 ---
+
+    async def _predict_log_batch(self, processed_logs: List[Dict[str, Any]]) -> List[tuple]:
+        """
+        로그 피처 배치를 예측합니다.
+        추론 서버가 활성화되어 있으면 서버에 요청하고, 연결할 수 없으면 프로세스 내 Predictor로 대체합니다.
+        """
+        if settings.inference_server_enabled:
+            try:
+                return await inference_client.predict_log_threat_batch(processed_logs)
+            except (OSError, ConnectionError, asyncio.TimeoutError, InferenceServerError) as e:
+                logger.warning(f"⚠️ 추론 서버 사용 불가, 로컬 예측으로 대체합니다: {e}")
+        # 동기 함수인 predictor를 비동기 이벤트 루프에서 차단 없이 실행
+        return await asyncio.to_thread(get_predictor().predict_log_threat_batch, processed_logs)
+
+    async def _predict_traffic_batch(self, batch_df: pd.DataFrame):
+        """트래픽 피처 배치를 예측합니다. (추론 서버 우선, 실패 시 로컬 예측)"""
+        if settings.inference_server_enabled:
+            try:
+                return await inference_client.predict_traffic_threat_batch(batch_df)
+            except (OSError, ConnectionError, asyncio.TimeoutError, InferenceServerError) as e:
+                logger.warning(f"⚠️ 추론 서버 사용 불가, 로컬 예측으로 대체합니다: {e}")
+        return await asyncio.to_thread(get_predictor().predict_traffic_threat_batch, batch_df)
+
+    # --- Winlogbeat 탐지기(Detector) ---
+
+    async def _detect_with_log_model(self, log_infos: List[Dict[str, Any]]) -> List[tuple]:
+        """범용 log_model 탐지기: 평면 뷰를 모델 피처로 변환(윈도우 집계 피처 포함)한 뒤 일괄 예측합니다."""
+        mapped_batch = [map_flat_to_model_columns(info["flat"]) for info in log_infos]
+        processed_features = fill_and_mask_missing_features_batch(mapped_batch)
+        # 윈도우 집계 피처 추가 (모델 컬럼에 포함된 경우에만 예측에 사용됨)
+        for processed, info in zip(processed_features, log_infos):
+            processed.update(info["window_features"])
+        return await self._predict_log_batch(processed_features)
+
+    async def _run_log_detectors(self, log_infos: List[Dict[str, Any]]) -> List[tuple]:
+        """로그를 라우팅된 탐지기별로 묶어 일괄 예측하고, 결과를 원래 순서로 되돌립니다."""
+        groups: Dict[str, List[int]] = {}
+        for i, info in enumerate(log_infos):
+            groups.setdefault(info["detector"], []).append(i)
+        predictions: List[tuple] = [("Prediction Error", 0.0)] * len(log_infos)
+        for detector, indices in groups.items():
+            results = await self.log_detectors[detector]([log_infos[i] for i in indices])
+            for i, result in zip(indices, results):
+                predictions[i] = result
+        return predictions
+
     async def process_winlogbeat_logs_batch(self, messages: List[dict]):
         """Kafka에서 받은 Winlogbeat 로그 메시지들을 일괄 처리합니다."""
         if not messages: return
 
-        es_actions, logs_to_process = [], []
-        # 1. 메시지 순회: ES 저장 작업 목록 생성 및 예측할 로그 분리
+        es_actions, raw_actions, logs_to_process = [], [], []
+        # 1. 메시지 순회: ES 저장 작업 목록 생성 및 채널/이벤트 ID 별 탐지기 라우팅
         for data in messages:
             log_data = data.get("log_data", {})
             if not log_data: continue
             
             log_id = str(uuid.uuid4()) # 각 로그에 고유 ID 부여
-            # Elasticsearch에 저장할 문서(document) 생성
-            es_doc = {
-                "@timestamp": log_data.get("@timestamp", datetime.now(timezone.utc).isoformat()),
+            # 이벤트를 한 번만 평탄화하여 이후 모든 필드 조회에 재사용
+            flat = flatten_event(log_data)
+            # Sysmon 프로세스 생성 관계 기록 (탐지 시 조상 체인 구성에 사용)
+            process_tree.observe(flat)
+            # Elasticsearch에 저장할 문서(document) 생성 (beat 메타데이터 등은 프로젝션으로 제거)
+            es_doc = source_projector.project({
+                "@timestamp": flat.get("@timestamp") or datetime.now(timezone.utc).isoformat(),
                 "agent_id": data.get("agent_id", "unknown"),
-                "hostname": data.get("host", {}).get("name"),
+                "hostname": flat.get("host.name"),
                 "log_source": "winlogbeat",
                 **log_data
-            }
-            es_actions.append({"_index": settings.es_index_winlogbeat, "_id": log_id, "_source": es_doc})
-            logs_to_process.append({"log_id": log_id, "log_data": log_data})
+            })
+            es_index = es_index_manager.write_index(settings.es_index_winlogbeat, es_doc["@timestamp"])
+            es_actions.append({"_index": es_index, "_id": log_id, "_routing": es_index_manager.routing(es_doc.get("user_id")), "_source": es_doc})
+            raw_event_doc = source_projector.raw_document(es_doc, log_data)
+            if raw_event_doc is not None:
+                raw_actions.append({"_index": es_index_manager.raw_index(settings.es_index_winlogbeat, es_doc["@timestamp"]), "_id": log_id, "_source": raw_event_doc})
+            window_keys = {"source.ip": get_ip_from_log(flat, WINLOG_IP_CANDIDATES), "host.name": flat.get("host.name")}
+            # 슬라이딩 윈도우 집계 갱신 (로그온 실패 수, Sysmon 네트워크 연결의 목적지 포트)
+            if settings.window_agg_enabled:
+                window_aggregator.update(
+                    window_keys,
+                    dst_port=_to_port(flat.get("winlog.event_data.DestinationPort")),
+                    failed_logon=str(flat.get("winlog.event_id")) == str(FAILED_LOGON_EVENT_ID),
+                )
+            # 위협 인텔리전스 차단 목록에 있는 출발지 IP는 피처 추출/예측 없이 바로 공격으로 처리
+            intel_feed = threat_intel.lookup(window_keys["source.ip"]) if threat_intel.enabled else None
+            if intel_feed:
+                logs_to_process.append({"log_id": log_id, "es_index": es_index, "flat": flat, "window_keys": window_keys, "detector": None, "intel_feed": intel_feed})
+                continue
+            # 담당 탐지기와 후보 탐지 규칙이 모두 없는 이벤트는 예측 없이 색인만 수행
+            channel, event_id = flat.get("winlog.channel"), flat.get("winlog.event_id")
+            detector = log_router.route(channel, event_id)
+            if detector not in self.log_detectors:
+                detector = None
+                if not rule_engine.candidates(channel, event_id): continue
+            logs_to_process.append({"log_id": log_id, "es_index": es_index, "flat": flat, "window_keys": window_keys, "detector": detector, "intel_feed": None})
 
-        # 2. Elasticsearch에 일괄 저장 (Bulk Insert)
+        # 2. Elasticsearch에 일괄 저장 (Bulk Insert, 원본 보관 인덱스도 함께 저장)
         if es_actions:
-            try:
-                await async_bulk(es_client, es_actions)
-                logger.info(f"✅ Winlogbeat 로그 {len(es_actions)}건 ES 저장 성공.")
-            except Exception as e:
-                logger.error(f"❌ Winlogbeat 로그 ES 배치 저장 실패: {e}")
-                return # ES 저장 실패 시 후속 처리 중단
+            result, _ = await asyncio.gather(es_writer.write(es_actions), self._write_raw_events(raw_actions, "Winlogbeat"))
+            if not result.failed:
+                spilled = f", spill 버퍼 보관 {result.spilled}건" if result.spilled else ""
+                logger.info(f"✅ Winlogbeat 로그 {result.succeeded}건 ES 저장 성공{spilled}. ({result.elapsed:.4f} 초)")
+            else:
+                logger.error(f"❌ Winlogbeat 로그 ES 저장 실패: 성공 {result.succeeded}건, 실패 {len(result.failed)}건 (예: {result.failed[0]['error']})")
+                if not result.succeeded and not result.spilled: return # ES 저장이 모두 실패하면 후속 처리 중단
+                # 저장에 실패한 로그는 es_log_id 로 참조할 수 없으므로 예측 대상에서 제외
+                failed_ids = result.failed_ids
+                logs_to_process = [info for info in logs_to_process if info["log_id"] not in failed_ids]
+
+        if not logs_to_process: return
 
         # 3. 데이터베이스 세션을 사용하여 예측 및 결과 저장
         async with AsyncSessionLocal() as db_session:
-            processed_features_for_prediction, log_info_map = [], []
-            
-            # 3-1. 예측을 위한 데이터 전처리
-            for log_info in logs_to_process:
-                # Sysmon 로그를 모델이 이해할 수 있는 컬럼으로 매핑
-                mapped_features = map_sysmon_to_model_columns(log_info["log_data"])
-                # 결측치 채우기 및 마스킹
-                processed_features = fill_and_mask_missing_features(mapped_features)
-                processed_features_for_prediction.append(processed_features)
-                log_info_map.append(log_info) # 예측 결과와 매칭하기 위해 원본 정보 저장
+            # 3-1. 윈도우 집계 피처 계산 (탐지기 입력 및 규칙 평가에 사용)
+            log_info_map = list(logs_to_process) # 예측 결과와 매칭하기 위해 원본 정보 저장
+            window_features = [window_aggregator.features(info["window_keys"]) if settings.window_agg_enabled else {}
+                               for info in log_info_map]
+            for info, features in zip(log_info_map, window_features):
+                info["window_features"] = features
 
-            if not processed_features_for_prediction: return
+            # 3-2. 위협 인텔리전스 적중 처리 후 나머지에 탐지 규칙 적용: 규칙에 일치한 이벤트는 모델 예측을 건너뜀
+            predictions = [(THREAT_INTEL_LABEL, 1.0) if info["intel_feed"] else None for info in log_info_map]
+            rule_targets = [i for i, prediction in enumerate(predictions) if prediction is None]
+            rule_hits = [None] * len(log_info_map)
+            for i, hit in zip(rule_targets, rule_engine.match_batch([log_info_map[i]["flat"] for i in rule_targets])):
+                if hit:
+                    rule_hits[i], predictions[i] = hit, (hit.label, hit.confidence)
+            to_detect = [i for i, info in enumerate(log_info_map) if predictions[i] is None and info["detector"]]
 
-            # 3-2. 머신러닝 모델 일괄 예측 실행
-            logger.info(f"🔮 총 {len(processed_features_for_prediction)}건의 로그에 대해 일괄 예측을 시작합니다.")
+            # 3-3. 탐지기별 일괄 예측 실행
+            logger.info(f"🔮 총 {len(to_detect)}건의 로그에 대해 일괄 예측을 시작합니다. "
+                        f"(차단 목록/규칙 탐지: {len(log_info_map) - predictions.count(None)}건, 색인만 수행: {len(es_actions) - len(to_detect)}건)")
             prediction_start_time = time.perf_counter()
-            # 동기 함수인 predictor를 비동기 이벤트 루프에서 차단 없이 실행
-            predictions = await asyncio.to_thread(predictor.predict_log_threat_batch, processed_features_for_prediction)
+            if to_detect:
+                detected = await self._run_log_detectors([log_info_map[i] for i in to_detect])
+                for i, result in zip(to_detect, detected):
+                    predictions[i] = result
             prediction_end_time = time.perf_counter()
             logger.info(f"⏱️ Winlogbeat 일괄 예측 시간: {prediction_end_time - prediction_start_time:.4f} 초")
 
             attack_logs_to_save = []
-            # 3-3. 예측 결과 처리
-            for original_info, (label, score) in zip(log_info_map, predictions):
+            # 3-4. 예측 결과 처리
+            for original_info, features, rule_hit, prediction in zip(log_info_map, window_features, rule_hits, predictions):
+                if prediction is None: continue # 규칙에 걸리지 않은 색인 전용 이벤트
+                label, score = prediction
                 try:
+                    # 모델이 정상으로 판정했더라도 윈도우 임계값 규칙에 걸리면 공격으로 처리 (키별 윈도우당 한 번)
+                    window_hit = None
+                    if label == "정상":
+                        flat = original_info["flat"]
+                        window_hit = evaluate_window_rules(
+                            features, original_info["window_keys"],
+                            failed_logon=str(flat.get("winlog.event_id")) == str(FAILED_LOGON_EVENT_ID),
+                            connection=flat.get("winlog.event_data.DestinationPort") is not None,
+                        )
+                        if window_hit:
+                            label, score = window_hit.label, 1.0
                     # 공격 조건: 레이블이 '정상'이 아니고, 신뢰도 점수가 임계값(0.8) 이상
                     is_attack = (label != "정상") and (label != "Prediction Error") and (score >= 0.8)
                     if is_attack:
-                        log_data, log_id = original_info["log_data"], original_info["log_id"]
+                        flat, log_id = original_info["flat"], original_info["log_id"]
                         logger.warning(f"⚠️ 공격 탐지됨 [Winlogbeat]: Type={label}, Score={score:.4f}")
                         
                         # Redis에 위협 통계 업데이트 및 대응 조치 발행
                         await redis_client.hincrby("threat_stats", label, 1)
-                        source_ip = get_ip_from_log(log_data, WINLOG_IP_CANDIDATES)
-                        dest_port_str = _get_nested_value(log_data, "winlog.event_data.DestinationPort")
+                        source_ip = get_ip_from_log(flat, WINLOG_IP_CANDIDATES)
+                        dest_port_str = flat.get("winlog.event_data.DestinationPort")
 
-                        if source_ip:
-                            await redis_client.publish(settings.redis_attack_channel, json.dumps({"action": "block_ip", "ip": source_ip}))
-                            logger.info(f"🚀 IP 차단 명령 생성: ip={source_ip}")
-                        if dest_port_str:
+                        # 탐지 전용 규칙(auto_block: false)은 차단하지 않음
+                        # 윈도우 규칙은 출발지 IP 집계에서만 IP 를 차단하고, 집계와 무관한 이 이벤트의 포트는 차단하지 않음
+                        auto_block = rule_hit.auto_block if rule_hit else True
+                        if source_ip and auto_block and (window_hit is None or window_hit.auto_block):
+                            await self._publish_block_ip(source_ip)
+                        if dest_port_str and auto_block and window_hit is None:
                             try:
                                 dest_port = int(dest_port_str)
                                 await redis_client.publish(settings.redis_attack_channel, json.dumps({"action": "block_port", "port": dest_port}))
@@ -169,12 +314,16 @@ class AnalysisService:
                         # DB에 저장할 AttackLog 객체 생성
                         attack_log_id = int(hashlib.sha1(log_id.encode()).hexdigest(), 16) % (10**12)
                         details = {
-                            "rule_name": _get_nested_value(log_data, "winlog.event_data.RuleName"),
-                            "process_guid": _get_nested_value(log_data, "winlog.event_data.ProcessGuid"),
-                            "process_path": _get_nested_value(log_data, "winlog.event_data.Image"),
-                            "user": log_data.get("user", {}).get("name"),
+                            "rule_name": flat.get("winlog.event_data.RuleName"),
+                            "process_guid": flat.get("winlog.event_data.ProcessGuid"),
+                            "process_path": flat.get("winlog.event_data.Image"),
+                            "process_chain": process_tree.chain(flat.get("winlog.event_data.ProcessGuid")),
+                            "user": flat.get("user.name"),
+                            "rule_id": rule_hit.id if rule_hit else None,
+                            "window_key": f"{window_hit.kind}={window_hit.key}" if window_hit else None,
+                            "threat_intel_feed": original_info["intel_feed"],
                             "es_log_id": log_id,
-                            "es_log_index": settings.es_index_winlogbeat
+                            "es_log_index": original_info["es_index"]
                         }
                         new_attack = AttackLog(
                             log_attack_id=attack_log_id,
@@ -182,8 +331,8 @@ class AnalysisService:
                             attack_type=label, severity="High",
                             confidence=round(score * 100, 2),
                             source_address=source_ip,
-                            hostname=log_data.get("host", {}).get("name"),
-                            user_id=log_data.get('user_id'),
+                            hostname=flat.get("host.name"),
+                            user_id=flat.get("user_id"),
                             description=details,
                             response_type="Auto-detected",
                             responded_at=datetime.now(timezone.utc),
@@ -195,7 +344,7 @@ class AnalysisService:
                 except Exception as e:
                     logger.error(f"❌ Winlog 결과 처리 중 오류 발생: {e}")
             
-            # 3-4. 탐지된 공격 로그들을 DB에 일괄 저장
+            # 3-5. 탐지된 공격 로그들을 DB에 일괄 저장
             if attack_logs_to_save:
                 db_save_start_time = time.perf_counter()
                 try:
@@ -260,55 +409,132 @@ class AnalysisService:
         # 이 메서드의 구조는 `process_winlogbeat_logs_batch`와 매우 유사합니다.
         if not messages: return
 
-        es_actions, traffic_to_process = [], []
-        # 1. ES 저장 목록 생성 및 처리할 트래픽 분리
+        es_actions, raw_actions, traffic_to_process, batch_type_counts = [], [], [], Counter()
+        # 1. ES 저장 목록 생성 및 문서 유형별 라우팅 (flow 만 예측 대상으로 분리)
         for data in messages:
             raw_doc = data.get("traffic_data", {})
             if not raw_doc: continue
             log_id = str(uuid.uuid4())
-            es_doc = {"@timestamp": raw_doc.get("@timestamp", datetime.now(timezone.utc).isoformat()), "agent_id": data.get("agent_id", "unknown"), "hostname": data.get("host", {}).get("name"), "log_source": "packetbeat", **raw_doc}
-            es_actions.append({"_index": settings.es_index_packetbeat, "_id": log_id, "_source": es_doc})
-            traffic_to_process.append({"log_id": log_id, "raw_traffic_doc": raw_doc})
+            doc_type = classify_packetbeat_doc(raw_doc)
+            batch_type_counts[doc_type] += 1
+            is_flow = doc_type in PACKETBEAT_MODEL_TYPES
+            index = settings.es_index_packetbeat
+            if not is_flow and settings.packetbeat_split_index_by_type:
+                index = f"{settings.es_index_packetbeat}-{doc_type}"
+            es_doc = source_projector.project({"@timestamp": raw_doc.get("@timestamp", datetime.now(timezone.utc).isoformat()), "agent_id": data.get("agent_id", "unknown"), "hostname": data.get("host", {}).get("name"), "log_source": "packetbeat", **raw_doc})
+            index = es_index_manager.write_index(index, es_doc["@timestamp"])
+            es_actions.append({"_index": index, "_id": log_id, "_routing": es_index_manager.routing(es_doc.get("user_id")), "_source": es_doc})
+            raw_event_doc = source_projector.raw_document(es_doc, raw_doc)
+            if raw_event_doc is not None:
+                raw_actions.append({"_index": es_index_manager.raw_index(settings.es_index_packetbeat, es_doc["@timestamp"]), "_id": log_id, "_source": raw_event_doc})
+            # 위협 인텔리전스 차단 목록 조회는 문서 유형과 관계없이 수행 (적중 시 모델 예측 없이 공격으로 처리)
+            intel_feed = threat_intel.lookup(_get_nested_value(raw_doc, "source.ip")) if threat_intel.enabled else None
+            # flow 레코드만 트래픽 피처 파이프라인으로 전달 (트랜잭션은 0으로 채운 무의미한 flow로 예측되지 않도록 색인만 수행)
+            if is_flow or intel_feed:
+                traffic_to_process.append({"log_id": log_id, "raw_traffic_doc": raw_doc, "intel_feed": intel_feed})
+
+        self.packetbeat_type_counts.update(batch_type_counts)
+        if batch_type_counts:
+            logger.info(f"📦 Packetbeat 문서 유형별 건수: {dict(batch_type_counts)} (예측 대상: {len(traffic_to_process)}건)")
 
-        # 2. Elasticsearch에 일괄 저장
+        # 2. Elasticsearch에 일괄 저장 (원본 보관 인덱스도 함께 저장)
         if es_actions:
-            try:
-                await async_bulk(es_client, es_actions)
-                logger.info(f"✅ Packetbeat 로그 {len(es_actions)}건 ES 저장 성공.")
-            except Exception as e:
-                logger.error(f"❌ Packetbeat 로그 ES 배치 저장 실패: {e}")
-                return
+            result, _ = await asyncio.gather(es_writer.write(es_actions), self._write_raw_events(raw_actions, "Packetbeat"))
+            if not result.failed:
+                spilled = f", spill 버퍼 보관 {result.spilled}건" if result.spilled else ""
+                logger.info(f"✅ Packetbeat 로그 {result.succeeded}건 ES 저장 성공{spilled}. ({result.elapsed:.4f} 초)")
+            else:
+                logger.error(f"❌ Packetbeat 로그 ES 저장 실패: 성공 {result.succeeded}건, 실패 {len(result.failed)}건 (예: {result.failed[0]['error']})")
+                if not result.succeeded and not result.spilled: return
+                failed_ids = result.failed_ids
+                traffic_to_process = [info for info in traffic_to_process if info["log_id"] not in failed_ids]
 
         # 3. 데이터베이스 세션을 사용하여 예측 및 결과 저장
         async with AsyncSessionLocal() as db_session:
-            features_df_list, traffic_info_map = [], []
+            features_df_list, traffic_info_map, intel_info_map = [], [], []
             # 3-1. 예측을 위한 데이터 전처리
             for traffic_info in traffic_to_process:
                 try:
                     cleaned_doc = self._sanitize_raw_packetbeat_data(traffic_info["raw_traffic_doc"])
                     extracted_fields = self._extract_traffic_fields(cleaned_doc)
                     raw_data = RawTrafficData.model_validate(extracted_fields) # Pydantic 모델로 데이터 유효성 검사
+                    if traffic_info["intel_feed"]:
+                        # 차단 목록 적중: flow 상태/윈도우/모델을 모두 건너뛰고 AttackTraffic 행에 필요한 피처만 계산
+                        intel_info_map.append({
+                            'log_id': traffic_info['log_id'], 'cleaned_doc': cleaned_doc, 'flow_id': None, 'previous_label': None,
+                            'intel_feed': traffic_info['intel_feed'],
+                            'features_dict': self._calculate_traffic_features(raw_data).to_dict('records')[0],
+                        })
+                        continue
+                    total_bytes = raw_data.TotLen_Fwd_Pkts + raw_data.TotLen_Bwd_Pkts
+                    # flow.id 별 주기적 업데이트 병합: 예측이 필요한 업데이트인지 결정 (ES 색인은 이미 완료됨)
+                    flow_id, decision = _get_nested_value(cleaned_doc, "flow.id"), None
+                    if settings.flow_state_enabled:
+                        decision = flow_state_table.observe(
+                            flow_id,
+                            packets=raw_data.Tot_Fwd_Pkts + raw_data.Tot_Bwd_Pkts,
+                            nbytes=total_bytes,
+                            final=bool(_get_nested_value(cleaned_doc, "flow.final")),
+                        )
+                    window_keys = {"source.ip": cleaned_doc["source"].get("ip"), "host.name": _get_nested_value(cleaned_doc, "host.name")}
+                    if settings.window_agg_enabled:
+                        window_aggregator.update(
+                            window_keys,
+                            nbytes=decision.delta_bytes if decision else total_bytes,  # 누적 카운터 중복 집계 방지
+                            dst_port=_to_port(raw_data.Dst_Port),
+                        )
+                    if decision and decision.reason is None:
+                        continue # 병합된 업데이트는 예측하지 않음
                     final_features_df = self._calculate_traffic_features(raw_data)
                     features_df_list.append(final_features_df)
-                    traffic_info_map.append({'log_id': traffic_info['log_id'], 'cleaned_doc': cleaned_doc, 'features_dict': final_features_df.to_dict('records')[0]})
+                    traffic_info_map.append({
+                        'log_id': traffic_info['log_id'], 'cleaned_doc': cleaned_doc, 'window_keys': window_keys,
+                        'flow_id': flow_id, 'previous_label': decision.previous_label if decision else None,
+                        'features_dict': final_features_df.to_dict('records')[0],
+                    })
                 except (ValidationError, Exception) as e:
                     logger.error(f"❌ Packetbeat 데이터 전처리 중 오류: {e}")
 
-            if not features_df_list: return
+            if not features_df_list and not intel_info_map: return
 
             # 3-2. 머신러닝 모델 일괄 예측 실행
-            batch_df = pd.concat(features_df_list, ignore_index=True) # 개별 DataFrame들을 하나로 합쳐 배치 처리
-            
-            logger.info(f"🔮 총 {len(batch_df)}건의 트래픽에 대해 일괄 예측을 시작합니다.")
-            prediction_start_time = time.perf_counter()
-            predictions = await asyncio.to_thread(predictor.predict_traffic_threat_batch, batch_df)
-            prediction_end_time = time.perf_counter()
-            logger.info(f"⏱️ Packetbeat 일괄 예측 시간: {prediction_end_time - prediction_start_time:.4f} 초")
+            window_features, predictions = [], []
+            if features_df_list:
+                batch_df = pd.concat(features_df_list, ignore_index=True) # 개별 DataFrame들을 하나로 합쳐 배치 처리
+                # 윈도우 집계 피처 추가 (Predictor는 모델이 학습한 컬럼만 선택하므로 모르는 컬럼은 무시됨)
+                window_features = [window_aggregator.features(info["window_keys"]) if settings.window_agg_enabled else {}
+                                   for info in traffic_info_map]
+                if settings.window_agg_enabled:
+                    batch_df = pd.concat([batch_df, pd.DataFrame(window_features)], axis=1)
+
+                logger.info(f"🔮 총 {len(batch_df)}건의 트래픽에 대해 일괄 예측을 시작합니다.")
+                prediction_start_time = time.perf_counter()
+                # Predictor/추론 서버는 np.ndarray 를 반환하므로 위협 인텔리전스 적중 레이블을 이어 붙일 수 있도록 list 로 변환
+                predictions = list(await self._predict_traffic_batch(batch_df))
+                prediction_end_time = time.perf_counter()
+                logger.info(f"⏱️ Packetbeat 일괄 예측 시간: {prediction_end_time - prediction_start_time:.4f} 초")
+            if intel_info_map:
+                logger.info(f"🔮 위협 인텔리전스 차단 목록 적중 {len(intel_info_map)}건은 예측 없이 공격으로 처리합니다.")
+                traffic_info_map += intel_info_map
+                window_features += [{}] * len(intel_info_map)
+                predictions += [THREAT_INTEL_LABEL] * len(intel_info_map)
             
             attack_traffics_to_save = []
             # 3-3. 예측 결과 처리
-            for item_info, label in zip(traffic_info_map, predictions):
+            for item_info, features, label in zip(traffic_info_map, window_features, predictions):
                 try:
+                    # flow 자체가 네트워크 연결 이벤트이므로 포트 스캔/폭주 규칙을 평가 (키별 윈도우당 한 번)
+                    window_hit = None
+                    if label == "Benign" and features:
+                        window_hit = evaluate_window_rules(features, item_info["window_keys"], connection=True)
+                        if window_hit:
+                            label = window_hit.label
+                    if settings.flow_state_enabled:
+                        flow_state_table.record_label(item_info['flow_id'], label)
+                        # 같은 flow 가 이미 같은 공격으로 판정된 경우 중복 대응/공격 행을 만들지 않음
+                        if label == item_info['previous_label'] and label != "Benign":
+                            logger.info(f"ℹ️ 이미 탐지된 flow 재판정 [Packetbeat]: flow_id={item_info['flow_id']}, Type={label}")
+                            continue
                     is_attack = (label != "Benign") and (label != "Prediction Error")
                     if is_attack:
                         logger.warning(f"⚠️ 공격 탐지됨 [Packetbeat]: Type={label}")
@@ -319,10 +545,9 @@ class AnalysisService:
                         source_ip = cleaned_doc.get("source", {}).get("ip")
                         dest_port = cleaned_doc.get("destination", {}).get("port")
 
-                        if source_ip:
-                            await redis_client.publish(settings.redis_attack_channel, json.dumps({"action": "block_ip", "ip": source_ip}))
-                            logger.info(f"🚀 IP 차단 명령 생성: ip={source_ip}")
-                        if dest_port is not None:
+                        if source_ip and (window_hit is None or window_hit.auto_block):
+                            await self._publish_block_ip(source_ip)
+                        if dest_port is not None and window_hit is None:
                             await redis_client.publish(settings.redis_attack_channel, json.dumps({"action": "block_port", "port": dest_port}))
                             logger.info(f"🚀 포트 차단 명령 생성: port={dest_port}")
                         
@@ -370,6 +595,22 @@ class AnalysisService:
                 db_save_end_time = time.perf_counter()
                 logger.info(f"⏱️ Packetbeat DB 저장 시간: {db_save_end_time - db_save_start_time:.4f} 초")
 
+    async def _write_raw_events(self, raw_actions: List[dict], source: str) -> Optional[BulkResult]:
+        """원본 보관 인덱스에 저장합니다. 보관용이므로 실패해도 탐지 처리는 계속합니다."""
+        if not raw_actions: return None
+        result = await es_writer.write(raw_actions)
+        if result.failed:
+            logger.warning(f"⚠️ {source} 원본 보관 인덱스 저장 실패: {len(result.failed)}건 (예: {result.failed[0]['error']})")
+        return result
+
+    async def _publish_block_ip(self, ip: str):
+        """IP 차단 명령을 발행합니다. 차단 금지 대역의 IP는 발행하지 않습니다."""
+        if ip_allowlist.contains(ip):
+            logger.info(f"ℹ️ 차단 금지 대역의 IP라 차단 명령을 생략합니다: ip={ip}")
+            return
+        await redis_client.publish(settings.redis_attack_channel, json.dumps({"action": "block_ip", "ip": ip}))
+        logger.info(f"🚀 IP 차단 명령 생성: ip={ip}")
+
     async def get_threat_statistics(self) -> dict:
         """Redis에서 위협 통계 데이터를 가져옵니다."""
         try:
@@ -0,0 +1,353 @@
+# app/services/es_index_manager.py
+"""
+Winlogbeat / Packetbeat 원본 로그의 일 단위 롤오버 인덱스 관리.
+
+고정 인덱스(ES_INDEX_WINLOGBEAT, ES_INDEX_PACKETBEAT) 하나에 계속 쌓으면 인덱스가 끝없이 커지고
+대시보드 쿼리가 항상 전체 기간을 검색합니다. 이벤트의 @timestamp 날짜로 `<base>-YYYY.MM.DD` 인덱스에 저장하고,
+- 시작 시 ILM 정책(hot -> delete)과 명시적 매핑을 담은 인덱스 템플릿(`<base>-*`)을 설치하며
+- 조회 시에는 시간 범위와 겹치는 날짜의 인덱스만 대상으로 지정합니다.
+
+롤오버 이전에 고정 인덱스에 저장된 데이터도 조회되도록 조회 대상에는 기존 `<base>` 인덱스를 함께 포함하며,
+존재하지 않는 인덱스는 ignore_unavailable=True 로 무시합니다.
+
+원본 보관 인덱스(ES_RAW_INDEX_ENABLED)가 켜져 있으면 전체 원본 이벤트를 `<base>-raw-YYYY.MM.DD` 에 함께 저장합니다.
+이 인덱스는 best_compression 코덱을 쓰고 필드를 색인하지 않으며(_source 보관용), 별도의 보존 기간을 가집니다.
+대시보드 조회 대상에는 포함되지 않습니다.
+
+사용자별 routing(ES_USER_ROUTING_ENABLED)이 켜져 있으면 문서를 user_id 를 routing 값으로 색인하여 한 사용자의 문서를
+샤드 하나에 모으고, 사용자 단위 조회도 같은 routing 값을 지정해 모든 샤드 대신 그 샤드 하나만 검색합니다.
+routing 없이 색인된 기존 인덱스는 routing 조회 시 일부 문서가 누락되므로, ES_USER_ROUTING_SINCE 이전 구간은
+routing 없이 조회하며, app/maintenance/reindex_user_routing.py 로 기존 인덱스를 재색인한 뒤 이 값을 비웁니다.
+
+롤오버를 끄면 고정 인덱스가 없을 때 같은 명시적 매핑으로 만듭니다. 이미 동적 매핑(text + .keyword)으로 만들어진
+고정 인덱스가 있으면 매핑을 바꿀 수 없으므로, 사용자 조건은 user_id / user_id.keyword 를 모두 검사하고(user_id_filter)
+source.ip 집계는 두 매핑을 합친 runtime 필드로 수행합니다(source_ip_aggregation).
+"""
+import logging
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from elasticsearch import AsyncElasticsearch
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_DATE_FORMAT = "%Y.%m.%d"
+_ISO_DATE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})")
+_TIME_RANGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# --- 인덱스 매핑 ---
+# 필터/집계에 쓰는 필드는 keyword/ip/숫자로 고정하고, 동적 매핑되는 나머지 문자열은 text+keyword 다중 필드 대신 keyword 하나로 저장
+_KEYWORD = {"type": "keyword"}
+_IP = {"type": "ip", "ignore_malformed": True}
+_LONG = {"type": "long"}
+_INTEGER = {"type": "integer"}
+_LENIENT_INTEGER = {"type": "integer", "ignore_malformed": True}  # "-" 등 숫자가 아닌 값은 색인만 건너뜀 (문서는 저장)
+_NOT_INDEXED_TEXT = {"type": "text", "index": False}  # _source 에만 보관 (검색 불가)
+
+DYNAMIC_TEMPLATES = [
+    {"strings_as_keyword": {"match_mapping_type": "string", "mapping": {"type": "keyword", "ignore_above": 1024}}},
+]
+
+COMMON_PROPERTIES = {
+    "@timestamp": {"type": "date"},
+    "user_id": _KEYWORD,
+    "agent_id": _KEYWORD,
+    "hostname": _KEYWORD,
+    "log_source": _KEYWORD,
+    "event_source": _KEYWORD,
+    "host": {"properties": {"name": _KEYWORD}},
+    "source": {"properties": {"ip": _IP, "port": _INTEGER, "packets": _LONG, "bytes": _LONG}},
+    "destination": {"properties": {"ip": _IP, "port": _INTEGER, "packets": _LONG, "bytes": _LONG}},
+    "message": _NOT_INDEXED_TEXT,
+    "event": {"properties": {"original": {"type": "keyword", "index": False, "doc_values": False}, "duration": _LONG}},
+}
+
+WINLOGBEAT_PROPERTIES = {
+    **COMMON_PROPERTIES,
+    "winlog": {"properties": {
+        "channel": _KEYWORD,
+        "event_id": _KEYWORD,
+        "record_id": _LONG,
+        "computer_name": _KEYWORD,
+        # 가공 없이 전송되는 event_data 는 "-" 나 16진수(4624/4625/4648/4688 의 ProcessId "0x2c8") 값을 포함하므로
+        # 매핑 오류(400)로 문서가 버려지지 않도록 숫자 필드는 ignore_malformed, ProcessId 는 keyword 로 저장
+        "event_data": {"properties": {
+            "SourceIp": _IP,
+            "DestinationIp": _IP,
+            "IpAddress": _IP,
+            "DestinationPort": _LENIENT_INTEGER,
+            "SourcePort": _LENIENT_INTEGER,
+            "ProcessId": _KEYWORD,
+        }},
+        # 조회하지 않는 대용량 필드는 색인하지 않음
+        "user_data": {"type": "object", "enabled": False},
+    }},
+}
+
+PACKETBEAT_PROPERTIES = {
+    **COMMON_PROPERTIES,
+    "type": _KEYWORD,
+    "flow": {"properties": {"id": _KEYWORD, "final": {"type": "boolean"}}},
+    "network": {"properties": {"transport": _KEYWORD, "protocol": _KEYWORD, "bytes": _LONG, "packets": _LONG}},
+    "client": {"properties": {"ip": _IP, "port": _INTEGER, "bytes": _LONG, "packets": _LONG}},
+    "server": {"properties": {"ip": _IP, "port": _INTEGER, "bytes": _LONG, "packets": _LONG}},
+    # 조회하지 않는 대용량 필드는 색인하지 않음
+    "http": {"properties": {
+        "request": {"properties": {"body": {"type": "object", "enabled": False}, "headers": {"type": "object", "enabled": False}}},
+        "response": {"properties": {"body": {"type": "object", "enabled": False}, "headers": {"type": "object", "enabled": False}}},
+    }},
+    "tls": {"properties": {
+        "server": {"properties": {"x509": {"type": "object", "enabled": False}}},
+        "client": {"properties": {"x509": {"type": "object", "enabled": False}}},
+        "detailed": {"type": "object", "enabled": False},
+    }},
+    "dns": {"properties": {"answers": {"type": "object", "enabled": False}, "authorities": {"type": "object", "enabled": False},
+                           "additionals": {"type": "object", "enabled": False}}},
+    "request": _NOT_INDEXED_TEXT,
+    "response": _NOT_INDEXED_TEXT,
+}
+
+
+# 원본 보관 인덱스: _id 로 hot 인덱스 문서와 연결하고, 원본 이벤트(raw)는 색인 없이 _source 로만 보관
+RAW_PROPERTIES = {
+    "@timestamp": {"type": "date"},
+    "user_id": _KEYWORD,
+    "agent_id": _KEYWORD,
+    "log_source": _KEYWORD,
+    "raw": {"type": "object", "enabled": False},
+}
+
+
+def index_mappings(properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {"dynamic_templates": DYNAMIC_TEMPLATES, "properties": properties}
+
+
+def raw_index_mappings() -> Dict[str, Any]:
+    return {"dynamic": False, "properties": RAW_PROPERTIES}
+
+
+# 동적 매핑 고정 인덱스(source.ip 가 text + .keyword)와 명시적 매핑 인덱스(ip)를 함께 집계하기 위한 runtime 필드
+LEGACY_SOURCE_IP_FIELD = "source_ip_any"
+LEGACY_SOURCE_IP_RUNTIME = {
+    "type": "keyword",
+    "script": {"source": (
+        "if (doc.containsKey('source.ip.keyword')) { if (doc['source.ip.keyword'].size() > 0) { emit(doc['source.ip.keyword'].value); } }"
+        " else if (doc.containsKey('source.ip') && doc['source.ip'].size() > 0) { emit(doc['source.ip'].value); }"
+    )},
+}
+
+
+def user_id_filter(user_id: Any) -> Dict[str, Any]:
+    """
+    사용자 조건. 명시적 매핑 인덱스는 user_id(keyword), 동적 매핑 고정 인덱스는 user_id.keyword 로 일치시킵니다.
+    (없는 필드에 대한 term 조건은 비용 없이 일치하지 않음)
+    """
+    return {"bool": {"should": [{"term": {"user_id": user_id}}, {"term": {"user_id.keyword": user_id}}], "minimum_should_match": 1}}
+
+
+def parse_time_range(time_range: str) -> timedelta:
+    """'30m', '24h', '7d' 형식의 상대 시간 범위를 timedelta 로 변환합니다. (단위가 없으면 분)"""
+    time_range = time_range.strip()
+    unit = time_range[-1] if time_range[-1] in _TIME_RANGE_UNITS else "m"
+    value = int(time_range[:-1] if time_range[-1] in _TIME_RANGE_UNITS else time_range)
+    return timedelta(seconds=value * _TIME_RANGE_UNITS[unit])
+
+
+class ESIndexManager:
+    """
+    :param enabled: False 면 기존처럼 고정 인덱스만 사용
+    :param retention_days: ILM delete 단계로 넘어가기까지의 기간(일). 전체 기간 조회도 이 범위로 제한
+    :param bases: 관리 대상 기본 인덱스 이름 -> 매핑 properties
+    :param raw_enabled: 원본 보관 인덱스(<base>-raw-*) 사용 여부
+    :param raw_retention_days: 원본 보관 인덱스의 보존 기간(일)
+    :param user_routing: user_id 를 routing 값으로 색인/조회할지 여부
+    :param user_routing_since: routing 으로 색인하기 시작한 날짜 (YYYY-MM-DD, 빈 값이면 모든 인덱스가 routing 으로 색인된 것으로 간주)
+    """
+    def __init__(self, enabled: bool = True, retention_days: int = 30, bases: Optional[Dict[str, Dict[str, Any]]] = None,
+                 raw_enabled: bool = False, raw_retention_days: int = 90, user_routing: bool = False,
+                 user_routing_since: str = ""):
+        self.enabled = enabled
+        self.retention_days = retention_days
+        self.bases = bases or {}
+        self.raw_enabled = raw_enabled
+        self.raw_retention_days = raw_retention_days
+        self.user_routing = user_routing
+        self.user_routing_since: Optional[date] = date.fromisoformat(user_routing_since) if user_routing_since else None
+        # 동적 매핑으로 만들어진 고정 인덱스. setup() 에서 확인하기 전에는 모두 동적 매핑으로 간주
+        self.dynamic_legacy = set(self.bases)
+
+    # --- 쓰기 ---
+    def write_index(self, base: str, timestamp: Any = None) -> str:
+        """이벤트 타임스탬프(ISO 문자열 또는 datetime)가 속한 날짜의 인덱스 이름을 반환합니다."""
+        if not self.enabled:
+            return base
+        if isinstance(timestamp, str):
+            match = _ISO_DATE.match(timestamp)
+            if match:
+                return f"{base}-{match.group(1)}.{match.group(2)}.{match.group(3)}"
+        elif isinstance(timestamp, datetime):
+            return f"{base}-{timestamp.astimezone(timezone.utc).strftime(INDEX_DATE_FORMAT)}"
+        return f"{base}-{datetime.now(timezone.utc).strftime(INDEX_DATE_FORMAT)}"
+
+    def raw_index(self, base: str, timestamp: Any = None) -> str:
+        """원본 보관 인덱스 이름을 반환합니다."""
+        return self.write_index(f"{base}-raw", timestamp)
+
+    def routing(self, user_id: Any) -> Optional[str]:
+        """색인 시 사용할 routing 값을 반환합니다. (사용하지 않거나 user_id 가 없으면 None -> _id 기준 분산)"""
+        return str(user_id) if self.user_routing and user_id else None
+
+    # --- 조회 ---
+    def search_routing(self, user_id: Any, start: Optional[datetime] = None) -> Optional[str]:
+        """
+        start 이후 구간의 사용자 조회에 지정할 routing 값을 반환합니다.
+        구간이 routing 색인 시작일 이전과 겹치면 기존 문서가 누락되지 않도록 None(전체 샤드 검색)을 반환합니다.
+        """
+        if not self.user_routing or not user_id:
+            return None
+        if self.user_routing_since is not None and (start is None or start.astimezone(timezone.utc).date() < self.user_routing_since):
+            return None
+        return str(user_id)
+
+    def search_routing_for_time_range(self, user_id: Any, time_range: str) -> Optional[str]:
+        """'now-<time_range>' ~ 'now' 구간의 사용자 조회에 지정할 routing 값을 반환합니다."""
+        return self.search_routing(user_id, datetime.now(timezone.utc) - parse_time_range(time_range))
+
+    def source_ip_aggregation(self, base: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        source.ip terms 집계에 쓸 필드와 검색 요청에 함께 지정할 runtime_mappings 를 반환합니다.
+        동적 매핑 고정 인덱스가 조회 대상에 포함되면 두 매핑을 합친 runtime 필드를 사용합니다.
+        """
+        if base in self.dynamic_legacy:
+            return LEGACY_SOURCE_IP_FIELD, {LEGACY_SOURCE_IP_FIELD: LEGACY_SOURCE_IP_RUNTIME}
+        return "source.ip", {}
+
+    def indices_for_range(self, base: str, start: datetime, end: Optional[datetime] = None) -> str:
+        """[start, end] 구간과 겹치는 인덱스 목록(쉼표 구분)을 반환합니다."""
+        if not self.enabled:
+            return base
+        end = end or datetime.now(timezone.utc)
+        oldest = end - timedelta(days=self.retention_days)
+        day = max(start, oldest).astimezone(timezone.utc).date()
+        last = end.astimezone(timezone.utc).date()
+        names = []
+        while day <= last:
+            names.append(f"{base}-{day.strftime(INDEX_DATE_FORMAT)}")
+            day += timedelta(days=1)
+        names.append(base)  # 롤오버 이전 고정 인덱스
+        return ",".join(names)
+
+    def indices_for_time_range(self, base: str, time_range: str) -> str:
+        """'now-<time_range>' ~ 'now' 구간의 인덱스 목록을 반환합니다."""
+        now = datetime.now(timezone.utc)
+        return self.indices_for_range(base, now - parse_time_range(time_range), now)
+
+    def all_indices(self, base: str) -> str:
+        """보존 기간 전체의 인덱스 목록을 반환합니다. (전체 기간 누적 통계용)"""
+        now = datetime.now(timezone.utc)
+        return self.indices_for_range(base, now - timedelta(days=self.retention_days), now)
+
+    # --- 시작 시 프로비저닝 ---
+    def lifecycle_policy_name(self, base: str) -> str:
+        return f"{base}-policy"
+
+    def lifecycle_policy(self) -> Dict[str, Any]:
+        return {
+            "phases": {
+                "hot": {"min_age": "0ms", "actions": {"set_priority": {"priority": 100}}},
+                "delete": {"min_age": f"{self.retention_days}d", "actions": {"delete": {}}},
+            }
+        }
+
+    def raw_lifecycle_policy(self) -> Dict[str, Any]:
+        # 하루가 지난 원본 보관 인덱스는 더 이상 쓰지 않으므로 세그먼트를 병합해 압축률을 높임
+        return {
+            "phases": {
+                "hot": {"min_age": "0ms", "actions": {"set_priority": {"priority": 0}}},
+                "warm": {"min_age": "1d", "actions": {"forcemerge": {"max_num_segments": 1}, "readonly": {}}},
+                "delete": {"min_age": f"{self.raw_retention_days}d", "actions": {"delete": {}}},
+            }
+        }
+
+    def index_template(self, base: str) -> Dict[str, Any]:
+        return {
+            "index_patterns": [f"{base}-*"],
+            "priority": 200,
+            "template": {
+                "settings": {"index.lifecycle.name": self.lifecycle_policy_name(base)},
+                "mappings": index_mappings(self.bases.get(base, COMMON_PROPERTIES)),
+            },
+        }
+
+    def raw_index_template(self, base: str) -> Dict[str, Any]:
+        # <base>-* 템플릿보다 우선순위를 높여 <base>-raw-* 에는 이 템플릿만 적용되도록 함
+        return {
+            "index_patterns": [f"{base}-raw-*"],
+            "priority": 300,
+            "template": {
+                "settings": {
+                    "index.lifecycle.name": self.lifecycle_policy_name(f"{base}-raw"),
+                    "index.codec": "best_compression",
+                },
+                "mappings": raw_index_mappings(),
+            },
+        }
+
+    async def _setup_legacy_index(self, es: AsyncElasticsearch, base: str):
+        """
+        롤오버를 쓰지 않으면 고정 인덱스가 없을 때 명시적 매핑으로 만들고,
+        기존 고정 인덱스가 동적 매핑(user_id 가 text)인지 확인해 dynamic_legacy 에 반영합니다.
+        """
+        try:
+            if not self.enabled:
+                # 여러 워커가 동시에 만들 수 있으므로 resource_already_exists(400)는 무시
+                await es.options(ignore_status=400).indices.create(index=base, mappings=index_mappings(self.bases[base]))
+            if not await es.indices.exists(index=base):
+                self.dynamic_legacy.discard(base)
+                return
+            mappings = await es.indices.get_mapping(index=base)
+            properties = next(iter(mappings.values()), {}).get("mappings", {}).get("properties", {})
+            if properties.get("user_id", {}).get("type") == "text":
+                self.dynamic_legacy.add(base)
+                logger.warning(f"⚠️ 고정 인덱스 {base} 가 동적 매핑을 사용합니다. 사용자 조건/집계를 동적 매핑 호환 방식으로 조회합니다.")
+            else:
+                self.dynamic_legacy.discard(base)
+        except Exception as e:
+            logger.error(f"❌ 고정 인덱스 매핑 확인 실패: {base} ({e})")
+
+    async def setup(self, es: AsyncElasticsearch):
+        """ILM 정책과 인덱스 템플릿을 설치합니다. 실패해도 수집은 계속되도록 예외를 기록만 합니다."""
+        for base in self.bases:
+            await self._setup_legacy_index(es, base)
+        if not self.enabled:
+            return
+        for base in self.bases:
+            try:
+                await es.ilm.put_lifecycle(name=self.lifecycle_policy_name(base), policy=self.lifecycle_policy())
+                await es.indices.put_index_template(name=f"{base}-template", **self.index_template(base))
+                logger.info(f"✅ ES 인덱스 템플릿/ILM 정책 설치 완료: {base}-* (보존 {self.retention_days}일)")
+            except Exception as e:
+                logger.error(f"❌ ES 인덱스 템플릿/ILM 정책 설치 실패: {base} ({e})")
+            if not self.raw_enabled:
+                continue
+            try:
+                await es.ilm.put_lifecycle(name=self.lifecycle_policy_name(f"{base}-raw"), policy=self.raw_lifecycle_policy())
+                await es.indices.put_index_template(name=f"{base}-raw-template", **self.raw_index_template(base))
+                logger.info(f"✅ ES 원본 보관 인덱스 템플릿 설치 완료: {base}-raw-* (보존 {self.raw_retention_days}일)")
+            except Exception as e:
+                logger.error(f"❌ ES 원본 보관 인덱스 템플릿 설치 실패: {base} ({e})")
+
+
+# 프로세스 전역 인덱스 관리자
+es_index_manager = ESIndexManager(
+    enabled=settings.es_index_rollover_enabled,
+    retention_days=settings.es_index_retention_days,
+    bases={settings.es_index_winlogbeat: WINLOGBEAT_PROPERTIES, settings.es_index_packetbeat: PACKETBEAT_PROPERTIES},
+    raw_enabled=settings.es_raw_index_enabled,
+    raw_retention_days=settings.es_raw_index_retention_days,
+    user_routing=settings.es_user_routing_enabled,
+    user_routing_since=settings.es_user_routing_since,
+)
@@ -0,0 +1,151 @@
+# app/services/es_projection.py
+"""
+원본 로그를 ES 에 색인하기 전에 적용하는 _source 필드 프로젝션.
+
+Winlogbeat / Packetbeat 문서는 원본 이벤트 전체(**log_data)를 그대로 담기 때문에 beat 내부 메타데이터
+(agent.ephemeral_id, ecs.version, winlog.api 등)가 모든 문서에 반복되어 디스크 사용량과 bulk 요청 크기를 키웁니다.
+
+- drop_fields: 항상 제거하는 필드 (대시보드/조사에 쓰지 않는 beat 메타데이터)
+- raw_only_fields: 원본 보관 인덱스(<base>-raw-YYYY.MM.DD)가 켜져 있을 때만 hot 인덱스에서 제거하는 대용량 필드
+  (렌더링된 message, 패킷 payload 등. 원본 보관 인덱스에는 전체 이벤트가 같은 _id 로 남음)
+
+필드는 점(.) 경로로 지정합니다. 원본 이벤트는 이후 탐지 파이프라인에서도 사용되므로 수정하지 않고,
+제거 대상이 있는 단계의 dict 만 얕은 복사합니다.
+"""
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 대시보드/조사에서 사용하지 않는 beat 내부 메타데이터
+DEFAULT_DROP_FIELDS = (
+    "@metadata",
+    "ecs",
+    "agent.ephemeral_id",
+    "agent.id",
+    "agent.version",
+    "agent.type",
+    "event.created",
+    "event.ingested",
+    "log.file",
+    "log.offset",
+    "input",
+    "winlog.api",
+    "winlog.version",
+    "winlog.activity_id",
+    "host.os",
+    "host.mac",
+    "host.architecture",
+    "host.id",
+)
+
+# 원본 보관 인덱스가 있을 때만 hot 인덱스에서 제거하는 대용량 필드
+DEFAULT_RAW_ONLY_FIELDS = (
+    "message",
+    "event.original",
+    "request",
+    "response",
+)
+
+# 필드 경로 트리: {키: None(이 키 전체 제거) | 하위 트리}
+_FieldTree = Dict[str, Any]
+
+
+def parse_fields(value: str, default: Iterable[str]) -> tuple:
+    """쉼표로 구분한 필드 목록을 파싱합니다. (빈 값이면 기본 목록)"""
+    fields = tuple(field.strip() for field in (value or "").split(",") if field.strip())
+    return fields or tuple(default)
+
+
+def _compile(paths: Iterable[str]) -> _FieldTree:
+    tree: _FieldTree = {}
+    for path in paths:
+        node, parts = tree, path.split(".")
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:  # 상위 경로 전체가 이미 제거 대상
+                break
+            node = node.setdefault(part, child)
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def _prune(doc: Dict[str, Any], tree: _FieldTree) -> Dict[str, Any]:
+    out = None
+    for key, subtree in tree.items():
+        value = doc.get(key)
+        if value is None and key not in doc:
+            continue
+        if subtree is None:
+            pruned = None
+        elif isinstance(value, dict):
+            pruned = _prune(value, subtree)
+            if pruned is value:
+                continue
+        else:
+            continue
+        if out is None:
+            out = dict(doc)
+        if pruned:
+            out[key] = pruned
+        else:
+            del out[key]  # 제거 후 비어 버린 객체도 함께 제거
+    return doc if out is None else out
+
+
+class SourceProjector:
+    """
+    :param enabled: False 면 문서를 그대로 색인
+    :param drop_fields: 항상 제거할 필드 경로
+    :param raw_only_fields: raw_enabled 일 때만 제거할 필드 경로
+    :param raw_enabled: 원본 이벤트를 별도의 압축 보관 인덱스에 함께 저장하는지 여부
+    """
+    def __init__(self, enabled: bool = True, drop_fields: Iterable[str] = DEFAULT_DROP_FIELDS,
+                 raw_only_fields: Iterable[str] = DEFAULT_RAW_ONLY_FIELDS, raw_enabled: bool = False):
+        self.enabled = enabled
+        self.raw_enabled = raw_enabled
+        self.drop_fields = tuple(drop_fields)
+        self.raw_only_fields = tuple(raw_only_fields)
+        self._tree = _compile(self.drop_fields + (self.raw_only_fields if raw_enabled else ()))
+
+    @classmethod
+    def from_settings(cls) -> "SourceProjector":
+        return cls(
+            enabled=settings.es_source_projection_enabled,
+            drop_fields=parse_fields(settings.es_source_drop_fields, DEFAULT_DROP_FIELDS),
+            raw_only_fields=parse_fields(settings.es_raw_only_fields, DEFAULT_RAW_ONLY_FIELDS),
+            raw_enabled=settings.es_raw_index_enabled,
+        )
+
+    def project(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """제거 대상 필드를 뺀 문서를 반환합니다. (입력 문서는 수정하지 않음)"""
+        if not self.enabled or not self._tree:
+            return doc
+        return _prune(doc, self._tree)
+
+    def raw_document(self, es_doc: Dict[str, Any], raw_event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """원본 보관 인덱스에 저장할 문서를 만듭니다. (비활성화 상태면 None)"""
+        if not self.raw_enabled:
+            return None
+        return {
+            "@timestamp": es_doc.get("@timestamp"),
+            "log_source": es_doc.get("log_source"),
+            "agent_id": es_doc.get("agent_id"),
+            "user_id": raw_event.get("user_id"),
+            "raw": raw_event,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "raw_index_enabled": self.raw_enabled,
+            "drop_fields": list(self.drop_fields),
+            "raw_only_fields": list(self.raw_only_fields),
+        }
+
+
+# 프로세스 전역 _source 프로젝션
+source_projector = SourceProjector.from_settings()
@@ -0,0 +1,278 @@
+# app/services/es_writer.py
+"""
+Elasticsearch 원본 로그 bulk 색인기.
+
+기존 async_bulk(es_client, actions) 호출은 기본 청크(500건)를 순차 전송하고, 대시보드 조회용 클라이언트의
+timeout=0.5 / max_retries=2 설정을 그대로 쓰기 때문에 큰 배치는 시간 초과로 통째로 버려졌습니다.
+
+- 문서 수(ES_WRITER_CHUNK_DOCS)와 직렬화 바이트 수(ES_WRITER_CHUNK_BYTES) 중 먼저 도달하는 기준으로 청크를 자르고
+- 최대 ES_WRITER_CONCURRENCY 개의 bulk 요청을 동시에 전송하며
+- 429/502/503/504 로 거절된 문서만 지터(jitter)를 준 지수 백오프로 재시도하고
+- 성공/실패 문서를 BulkResult 로 호출자에게 돌려줍니다.
+
+재색인 도구(reindex_user_routing)가 건 index.blocks.write 로 거절된 문서(403 cluster_block_exception)는
+차단이 풀리면 색인할 수 있으므로 영구 실패가 아닌 일시적 실패로 보고 재시도 없이 바로 spill 합니다.
+
+요청 timeout 은 ES_WRITER_REQUEST_TIMEOUT 으로 조회용 클라이언트와 별도로 지정합니다.
+
+spill 버퍼가 설정되어 있으면 일시적 오류로 색인하지 못한 문서는 실패 대신 디스크에 보관(spilled)하고,
+bulk 지연이 ES_SPILL_LATENCY_THRESHOLD 를 넘거나 일시적 오류가 나면 ES_SPILL_COOLDOWN_SECONDS 동안
+ES 로 보내지 않고 바로 spill 합니다. (Consumer 처리 속도 유지) 보관된 문서는 spill_replayer 가 다시 색인합니다.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from elasticsearch import AsyncElasticsearch, ApiError, ConnectionError as ESConnectionError, ConnectionTimeout
+
+from src.core.es_client import ingest_es_client
+from app.services.spill_buffer import SpillBuffer, SpillReplayer, spill_buffer
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 재시도하면 성공할 수 있는 상태 코드 (과부하/일시적 장애)
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+
+# (action 헤더 줄, 문서 본문 줄, 원본 action)
+_Encoded = Tuple[bytes, bytes, Dict[str, Any]]
+
+
+@dataclass
+class BulkResult:
+    """bulk 색인 결과. failed 에는 최종적으로 색인하지 못한 action 과 사유가 담깁니다."""
+    total: int = 0
+    succeeded: int = 0
+    retried: int = 0
+    spilled: int = 0  # ES 대신 spill 버퍼에 보관한 문서 수 (나중에 같은 _id 로 색인됨)
+    failed: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def failed_ids(self) -> set:
+        return {item["action"].get("_id") for item in self.failed}
+
+
+def _encode(action: Dict[str, Any]) -> _Encoded:
+    header = {"_index": action["_index"]}
+    if action.get("_id") is not None:
+        header["_id"] = action["_id"]
+    if action.get("_routing") is not None:
+        header["routing"] = action["_routing"]
+    op_type = action.get("_op_type", "index")
+    header_line = json.dumps({op_type: header}, ensure_ascii=False).encode()
+    body_line = json.dumps(action["_source"], ensure_ascii=False, default=str).encode()
+    return header_line, body_line, action
+
+
+def _is_write_block(status: Optional[int], error: Any) -> bool:
+    """인덱스 쓰기 차단(index.blocks.write 등)으로 거절되었으면 True"""
+    if status != 403:
+        return False
+    error_type = error.get("type") if isinstance(error, dict) else error
+    return "cluster_block_exception" in str(error_type)
+
+
+def _is_transient(failure: Dict[str, Any]) -> bool:
+    return (failure["status"] is None or failure["status"] in RETRYABLE_STATUS
+            or _is_write_block(failure["status"], failure["error"]))
+
+
+def _backoff(attempt: int, initial: float, maximum: float) -> float:
+    """full jitter 지수 백오프: [0, min(maximum, initial * 2^attempt)]"""
+    return random.uniform(0, min(maximum, initial * (2 ** attempt)))
+
+
+class ESWriter:
+    """
+    :param client: 색인에 사용할 클라이언트 (options() 로 timeout/재시도 설정만 바꿔 사용, 연결 풀은 공유)
+    :param chunk_docs: 청크당 최대 문서 수
+    :param chunk_bytes: 청크당 최대 직렬화 바이트 수
+    :param concurrency: 동시에 전송할 bulk 요청 수
+    :param max_retries: 429/503 등으로 거절된 문서의 최대 재시도 횟수
+    :param request_timeout: bulk 요청 timeout(초)
+    :param spill: 일시적 오류/지연 시 문서를 보관할 spill 버퍼 (None 이면 실패로 반환)
+    :param latency_threshold: 이 시간(초)을 넘는 write 는 ES 지연으로 간주
+    :param cooldown: 지연/장애 감지 후 ES 로 보내지 않고 바로 spill 하는 시간(초)
+    """
+    def __init__(self, client: Optional[AsyncElasticsearch], chunk_docs: int = 500, chunk_bytes: int = 5 * 1024 * 1024,
+                 concurrency: int = 4, max_retries: int = 3, initial_backoff: float = 0.2, max_backoff: float = 5.0,
+                 request_timeout: float = 30.0, spill: Optional[SpillBuffer] = None, latency_threshold: float = 5.0,
+                 cooldown: float = 30.0):
+        self.client = client.options(request_timeout=request_timeout, max_retries=0) if client is not None else None
+        self.chunk_docs = chunk_docs
+        self.chunk_bytes = chunk_bytes
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.spill = spill
+        self.latency_threshold = latency_threshold
+        self.cooldown = cooldown
+        self._degraded_until = 0.0
+        self.stats = {"requests": 0, "docs": 0, "succeeded": 0, "failed": 0, "retried": 0, "request_errors": 0, "bytes": 0,
+                      "spilled": 0, "degraded": 0}
+
+    @property
+    def healthy(self) -> bool:
+        """최근 지연/장애가 감지되지 않았으면 True"""
+        return time.monotonic() >= self._degraded_until
+
+    async def _spill(self, actions: List[Dict[str, Any]], result: BulkResult):
+        dropped = await asyncio.to_thread(self.spill.append, actions)
+        result.spilled += len(actions) - dropped
+        result.failed.extend({"action": action, "status": None, "error": "spill quota exceeded"}
+                             for action in actions[len(actions) - dropped:])
+
+    def chunk(self, encoded: Sequence[_Encoded]) -> List[List[_Encoded]]:
+        """문서 수 또는 바이트 수 한도에 먼저 도달하는 지점에서 청크를 자릅니다."""
+        chunks, current, size = [], [], 0
+        for item in encoded:
+            item_size = len(item[0]) + len(item[1]) + 2  # 줄바꿈 2개
+            if current and (len(current) >= self.chunk_docs or size + item_size > self.chunk_bytes):
+                chunks.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += item_size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _send(self, chunk: List[_Encoded]) -> Tuple[int, List[Tuple[_Encoded, Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        청크 하나를 전송합니다.
+        :return: (성공 건수, [(재시도 대상, 실패 사유)], 최종 실패 사유 목록)
+                 요청 자체가 일시적으로 실패하면 청크 전체를 재시도 대상으로 돌려줌
+        """
+        operations = []
+        for header_line, body_line, _ in chunk:
+            operations.append(header_line)
+            operations.append(body_line)
+        async with self._semaphore:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += sum(len(line) + 1 for line in operations)
+            try:
+                response = await self.client.bulk(operations=operations)
+            except (ESConnectionError, ConnectionTimeout) as e:
+                self.stats["request_errors"] += 1
+                return 0, [(item, {"action": item[2], "status": None, "error": str(e)}) for item in chunk], []
+            except ApiError as e:
+                self.stats["request_errors"] += 1
+                error = e.error if _is_write_block(e.meta.status, e.error) else str(e)
+                reasons = [(item, {"action": item[2], "status": e.meta.status, "error": error}) for item in chunk]
+                if e.meta.status in RETRYABLE_STATUS:
+                    return 0, reasons, []
+                return 0, [], [reason for _, reason in reasons]
+
+        if not response.get("errors"):
+            return len(chunk), [], []
+        succeeded, retry, failed = 0, [], []
+        for item, result in zip(chunk, response["items"]):
+            outcome = next(iter(result.values()))
+            status = outcome.get("status", 500)
+            if status < 300:
+                succeeded += 1
+                continue
+            reason = {"action": item[2], "status": status, "error": outcome.get("error")}
+            if status in RETRYABLE_STATUS:
+                retry.append((item, reason))
+            else:
+                failed.append(reason)
+        return succeeded, retry, failed
+
+    async def _write_chunk(self, chunk: List[_Encoded], result: BulkResult):
+        pending = chunk
+        for attempt in range(self.max_retries + 1):
+            succeeded, retry, failed = await self._send(pending)
+            result.succeeded += succeeded
+            result.failed.extend(failed)
+            if not retry:
+                return
+            if attempt == self.max_retries:
+                result.failed.extend(reason for _, reason in retry)
+                return
+            # 일시적으로 거절된 문서만 지터를 준 백오프 후 재시도
+            result.retried += len(retry)
+            await asyncio.sleep(_backoff(attempt, self.initial_backoff, self.max_backoff))
+            pending = [item for item, _ in retry]
+
+    async def write(self, actions: Sequence[Dict[str, Any]], allow_spill: bool = True) -> BulkResult:
+        """
+        action 목록을 색인합니다. 예외를 던지지 않고 실패 내역을 BulkResult 로 돌려줍니다.
+        :param allow_spill: False 면 spill 버퍼를 사용하지 않음 (spill 재색인 시)
+        """
+        start = time.perf_counter()
+        result = BulkResult(total=len(actions))
+        if not actions:
+            return result
+        use_spill = allow_spill and self.spill is not None
+        if use_spill and not self.healthy:
+            # 지연/장애 감지 직후: ES 로 보내지 않고 바로 spill
+            await self._spill(list(actions), result)
+        elif self.client is None:
+            result.failed = [{"action": action, "status": None, "error": "Elasticsearch client is not initialized"} for action in actions]
+        else:
+            chunks = self.chunk([_encode(action) for action in actions])
+            await asyncio.gather(*(self._write_chunk(chunk, result) for chunk in chunks))
+
+            transient = [failure for failure in result.failed if _is_transient(failure)]
+            # 쓰기 차단은 특정 인덱스 문제이므로 ES 지연/장애로 보지 않음 (다른 인덱스 색인은 계속)
+            unavailable = [failure for failure in transient if not _is_write_block(failure["status"], failure["error"])]
+            elapsed = time.perf_counter() - start
+            if unavailable or elapsed > self.latency_threshold:
+                self._degraded_until = time.monotonic() + self.cooldown
+                self.stats["degraded"] += 1
+                logger.warning(f"⚠️ ES 색인 지연/장애 감지 (소요 {elapsed:.2f}초, 일시적 실패 {len(unavailable)}건): "
+                               f"{self.cooldown:.0f}초 동안 spill 버퍼를 사용합니다.")
+            if use_spill and transient:
+                result.failed = [failure for failure in result.failed if not _is_transient(failure)]
+                await self._spill([failure["action"] for failure in transient], result)
+
+        result.elapsed = time.perf_counter() - start
+        self.stats["docs"] += result.total
+        self.stats["succeeded"] += result.succeeded
+        self.stats["failed"] += len(result.failed)
+        self.stats["retried"] += result.retried
+        self.stats["spilled"] += result.spilled
+        return result
+
+    async def replay_write(self, actions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """spill 재색인용 write: (다시 보관할 일시적 실패 action 목록, 성공 건수)를 반환합니다."""
+        result = await self.write(actions, allow_spill=False)
+        permanent = [failure for failure in result.failed if not _is_transient(failure)]
+        if permanent:
+            logger.error(f"❌ ES spill 재색인 중 색인할 수 없는 문서 {len(permanent)}건을 버립니다. (예: {permanent[0]['error']})")
+        return [failure["action"] for failure in result.failed if _is_transient(failure)], result.succeeded
+
+    def report(self) -> Dict[str, Any]:
+        report = {"concurrency": self.concurrency, "chunk_docs": self.chunk_docs, "chunk_bytes": self.chunk_bytes,
+                  "healthy": self.healthy, **self.stats}
+        if self.spill is not None:
+            report["spill"] = self.spill.report()
+        return report
+
+
+# 프로세스 전역 ES 색인기 (공유 연결 풀의 ingest 용 클라이언트 사용)
+es_writer = ESWriter(
+    ingest_es_client,
+    chunk_docs=settings.es_writer_chunk_docs,
+    chunk_bytes=settings.es_writer_chunk_bytes,
+    concurrency=settings.es_writer_concurrency,
+    max_retries=settings.es_writer_max_retries,
+    initial_backoff=settings.es_writer_initial_backoff,
+    max_backoff=settings.es_writer_max_backoff,
+    request_timeout=settings.es_writer_request_timeout,
+    spill=spill_buffer,
+    latency_threshold=settings.es_spill_latency_threshold,
+    cooldown=settings.es_spill_cooldown_seconds,
+)
+
+# spill 버퍼 재색인 태스크 (spill 비활성 시 None)
+spill_replayer = SpillReplayer(
+    spill_buffer, es_writer.replay_write, lambda: es_writer.healthy, interval=settings.es_spill_replay_interval,
+) if spill_buffer is not None else None
@@ -0,0 +1,121 @@
+# app/services/flow_state.py
+"""
+Packetbeat flow 상태 테이블.
+
+packetbeat.flows 가 period(1s)마다 같은 flow.id 의 누적 카운터를 다시 보내므로,
+모든 업데이트를 모델로 예측하면 장시간 연결 하나가 초당 한 번씩 예측·공격 행을 만듭니다.
+flow.id 별로 마지막 카운터를 보관하고, 아래 경우에만 예측하도록 결정합니다.
+
+- threshold: 처음으로 패킷/바이트 임계값을 넘었을 때
+- changed  : 마지막 예측 이후 패킷/바이트가 rescore_growth 배 이상 늘었을 때
+- final    : flow.final (종료 또는 timeout) 이벤트
+- untracked: flow.id 가 없는 문서 (항상 예측)
+
+ES 색인은 이 결정과 관계없이 모든 업데이트에 대해 수행됩니다.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from src.core.config import settings
+
+
+class _FlowState:
+    __slots__ = ("packets", "bytes", "scored_packets", "scored_bytes", "scored", "label")
+
+    def __init__(self):
+        self.packets = 0
+        self.bytes = 0
+        self.scored_packets = 0
+        self.scored_bytes = 0
+        self.scored = False
+        self.label: Optional[str] = None
+
+
+class FlowDecision(NamedTuple):
+    reason: Optional[str]           # 예측 사유. None 이면 이 업데이트는 예측하지 않음(병합)
+    delta_bytes: int                # 직전 업데이트 이후 증가한 바이트 (윈도우 집계용)
+    previous_label: Optional[str]   # 이 flow 의 직전 예측 결과
+
+
+class FlowStateTable:
+    """
+    :param max_flows: 유지할 최대 flow 수. 초과 시 가장 오래 갱신되지 않은 flow 부터 제거(LRU)
+    :param min_packets: 첫 예측을 위한 패킷 수 임계값
+    :param min_bytes: 첫 예측을 위한 바이트 임계값
+    :param rescore_growth: 재예측을 위한 카운터 증가 배수
+    """
+    def __init__(self, max_flows: int = 200_000, min_packets: int = 10, min_bytes: int = 10_000,
+                 rescore_growth: float = 2.0):
+        self.max_flows = max_flows
+        self.min_packets = min_packets
+        self.min_bytes = min_bytes
+        self.rescore_growth = rescore_growth
+        self._flows: "OrderedDict[str, _FlowState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"updates": 0, "merged": 0, "threshold": 0, "changed": 0, "final": 0, "untracked": 0, "evicted": 0}
+
+    def observe(self, flow_id: Optional[str], packets: int, nbytes: int, final: bool = False) -> FlowDecision:
+        """flow 업데이트(누적 카운터)를 반영하고 예측 여부를 결정합니다."""
+        with self._lock:
+            self.stats["updates"] += 1
+            if not flow_id:
+                self.stats["untracked"] += 1
+                return FlowDecision("untracked", nbytes, None)
+
+            flows = self._flows
+            state = flows.get(flow_id)
+            if state is None:
+                state = flows[flow_id] = _FlowState()
+                if len(flows) > self.max_flows:
+                    flows.popitem(last=False)
+                    self.stats["evicted"] += 1
+            else:
+                flows.move_to_end(flow_id)
+
+            # 카운터가 줄었다면(재시작) 현재 값을 증가분으로 간주
+            delta_bytes = nbytes - state.bytes if nbytes >= state.bytes else nbytes
+            state.packets, state.bytes = packets, nbytes
+            previous_label = state.label
+
+            reason = None
+            if final:
+                reason = "final"
+                del flows[flow_id]
+            elif not state.scored:
+                if packets >= self.min_packets or nbytes >= self.min_bytes:
+                    reason = "threshold"
+            elif packets >= state.scored_packets * self.rescore_growth or nbytes >= state.scored_bytes * self.rescore_growth:
+                reason = "changed"
+
+            if reason:
+                state.scored, state.scored_packets, state.scored_bytes = True, packets, nbytes
+            self.stats[reason or "merged"] += 1
+            return FlowDecision(reason, delta_bytes, previous_label)
+
+    def record_label(self, flow_id: Optional[str], label: str):
+        """예측 결과를 기록합니다. 같은 flow 가 같은 공격으로 다시 판정되면 중복 공격 행을 만들지 않는 데 사용됩니다."""
+        if not flow_id:
+            return
+        with self._lock:
+            state = self._flows.get(flow_id)
+            if state is not None:
+                state.label = label
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            scored = sum(self.stats[k] for k in ("threshold", "changed", "final", "untracked"))
+            return {
+                "active_flows": len(self._flows),
+                **self.stats,
+                "scored_ratio": scored / self.stats["updates"] if self.stats["updates"] else 0.0,
+            }
+
+
+# 프로세스 전역 flow 상태 테이블
+flow_state_table = FlowStateTable(
+    max_flows=settings.flow_state_max_flows,
+    min_packets=settings.flow_score_min_packets,
+    min_bytes=settings.flow_score_min_bytes,
+    rescore_growth=settings.flow_rescore_growth,
+)
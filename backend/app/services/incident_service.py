@@ -1,41 +1,594 @@
-# # app/services/incident_service.py
-# from sqlalchemy.ext.asyncio import AsyncSession
-# from elasticsearch import AsyncElasticsearch
-
-# class IncidentService:
-#     """
-#     인시던트 조사 관련 기능을 제공하는 서비스.
-#     (경로 추적, 영향도 분석, 타임라인 분석 등)
-#     """
-#     async def trace_attack_path(self, query: dict, es: AsyncElasticsearch, db: AsyncSession):
-#         """
-#         공격 경로를 추적합니다. (예시 구현)
-#         - 특정 프로세스 ID나 파일명을 기준으로 관련 로그를 ES에서 검색합니다.
-#         """
-#         # TODO: Elasticsearch에서 관련 로그를 쿼리하여 경로를 재구성하는 로직 구현
-#         print(f"경로 추적 쿼리: {query}")
-#         return {"path": ["process_A.exe -> process_B.exe -> cmd.exe", "Related Network Connection: 1.2.3.4:4444"]}
-
-#     async def assess_impact(self, query: dict, es: AsyncElasticsearch, db: AsyncSession):
-#         """
-#         공격의 영향도를 분석합니다. (예시 구현)
-#         - 특정 공격 ID와 관련된 호스트나 계정을 DB와 ES에서 검색합니다.
-#         """
-#         # TODO: DB와 ES를 쿼리하여 영향을 받은 자산(호스트, 사용자) 목록을 반환하는 로직 구현
-#         print(f"영향도 분석 쿼리: {query}")
-#         return {"affected_assets": ["HOST-01", "HOST-02"], "affected_accounts": ["admin", "user1"]}
-
-#     async def analyze_timeline(self, query: dict, es: AsyncElasticsearch, db: AsyncSession):
-#         """
-#         공격 타임라인을 분석합니다. (예시 구현)
-#         - 특정 시간 범위 내의 모든 관련 로그와 이벤트를 시간순으로 정렬하여 반환합니다.
-#         """
-#         # TODO: ES와 DB에서 시간 기반 쿼리로 이벤트를 재구성하는 로직 구현
-#         print(f"타임라인 분석 쿼리: {query}")
-#         return {"timeline": [
-#             {"time": "2023-10-27T10:00:00Z", "event": "Initial access via phishing link"},
-#             {"time": "2023-10-27T10:05:00Z", "event": "Malware downloaded (svchost.exe)"},
-#             {"time": "2023-10-27T10:15:00Z", "event": "Lateral movement to DC-01"}
-#         ]}
-
-# incident_service = IncidentService()
+# app/services/incident_service.py
+"""
+인시던트 조사 서비스. (공격 경로 추적, 영향도 분석, 타임라인 분석)
+
+탐지 결과(Attack_log / Attack_traffic) 또는 직접 지정한 시드(source_ip, hostname, process_guid)를 기준으로
+탐지 시각 전후 window_minutes 구간의 원본 이벤트(Winlogbeat / Packetbeat)를 상관 분석합니다.
+
+- 공격 경로/영향도: 이벤트를 한 건씩 가져오지 않고 composite aggregation 으로 (프로세스, 부모 프로세스),
+  (프로세스, 목적지 IP:포트), (출발지 IP, 목적지 IP:포트) 조합만 after_key 페이징으로 받아
+  페이지마다 프로세스/네트워크 그래프에 간선을 추가합니다. (이벤트 수가 아닌 고유 조합 수에 비례)
+- 타임라인: point-in-time + search_after 로 필요한 필드만 시간순으로 읽고 max_events 건에서 멈춥니다.
+
+조회 대상 인덱스는 es_index_manager 의 일 단위 인덱스 중 분석 구간과 겹치는 날짜만 지정합니다.
+"""
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from elasticsearch import AsyncElasticsearch
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from app.models.models import AttackLog, AttackTraffic
+from app.services.es_index_manager import es_index_manager, user_id_filter
+
+logger = logging.getLogger(__name__)
+
+PROCESS_CREATE_EVENT_ID = "1"   # Sysmon: 프로세스 생성
+NETWORK_CONNECT_EVENT_ID = "3"  # Sysmon: 네트워크 연결
+
+# 상관 분석에 사용하는 필드 (es_index_manager 매핑 기준 keyword / ip / 숫자)
+F_HOST = "host.name"
+F_EVENT_ID = "winlog.event_id"
+F_PROCESS_GUID = "winlog.event_data.ProcessGuid"
+F_PARENT_GUID = "winlog.event_data.ParentProcessGuid"
+F_IMAGE = "winlog.event_data.Image"
+F_PARENT_IMAGE = "winlog.event_data.ParentImage"
+F_DEST_IP = "winlog.event_data.DestinationIp"
+F_DEST_PORT = "winlog.event_data.DestinationPort"
+WINLOG_IP_FIELDS = ("winlog.event_data.SourceIp", "winlog.event_data.DestinationIp", "winlog.event_data.IpAddress")
+ACCOUNT_FIELDS = ("winlog.event_data.TargetUserName", "winlog.event_data.SubjectUserName", "winlog.event_data.User")
+NETWORK_IP_FIELDS = ("source.ip", "destination.ip")
+
+# 타임라인에 싣는 필드 (_source 프로젝션)
+TIMELINE_FIELDS = [
+    "@timestamp", "log_source", F_HOST, F_EVENT_ID, "winlog.channel", F_PROCESS_GUID, F_PARENT_GUID, F_IMAGE,
+    "winlog.event_data.CommandLine", "winlog.event_data.TargetUserName", *WINLOG_IP_FIELDS, F_DEST_PORT,
+    "source.ip", "source.port", "destination.ip", "destination.port", "network.transport", "type",
+]
+
+# composite 버킷의 시간 범위 (그래프 노드/간선의 first_seen, last_seen)
+_TIME_AGGS = {"first_seen": {"min": {"field": "@timestamp"}}, "last_seen": {"max": {"field": "@timestamp"}}}
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value if value is None or value.tzinfo else value.replace(tzinfo=timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _bucket_time(bucket: Dict[str, Any], name: str) -> Optional[str]:
+    agg = bucket.get(name) or {}
+    return agg.get("value_as_string") if agg.get("value") is not None else None
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+@dataclass
+class IncidentSeed:
+    """상관 분석의 기준점: 분석 구간과 시드 IP / 호스트 / 프로세스"""
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    user_id: Optional[str] = None
+    source_ips: Set[str] = field(default_factory=set)
+    hostnames: Set[str] = field(default_factory=set)
+    process_guids: Set[str] = field(default_factory=set)
+    detection: Optional[Dict[str, Any]] = None  # 시드가 된 탐지 결과 요약
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "start": self.start.isoformat(), "end": self.end.isoformat(), "user_id": self.user_id,
+            "source_ips": sorted(self.source_ips), "hostnames": sorted(self.hostnames),
+            "process_guids": sorted(self.process_guids), "detection": self.detection,
+        }
+
+
+class IncidentGraph:
+    """
+    프로세스/네트워크 그래프. composite 버킷을 받을 때마다 노드와 간선을 누적합니다.
+
+    노드 ID: process:<ProcessGuid>, ip:<주소>
+    간선 유형: spawned(부모 -> 자식 프로세스), connected(프로세스 -> 원격 IP), flow(IP -> IP)
+    """
+    def __init__(self, max_nodes: int = 10000):
+        self.max_nodes = max_nodes
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.edges: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.parents: Dict[str, str] = {}
+        self.children: Dict[str, Set[str]] = defaultdict(set)
+        self.neighbors: Dict[str, Set[str]] = defaultdict(set)  # 네트워크 간선 (방향 무시)
+        self.truncated = False
+
+    def add_node(self, node_id: str, kind: str, first_seen: Optional[str] = None, **attrs) -> bool:
+        node = self.nodes.get(node_id)
+        if node is None:
+            if len(self.nodes) >= self.max_nodes:
+                self.truncated = True
+                return False
+            node = self.nodes[node_id] = {"id": node_id, "type": kind, "first_seen": first_seen}
+        elif first_seen and (node["first_seen"] is None or first_seen < node["first_seen"]):
+            node["first_seen"] = first_seen
+        for key, value in attrs.items():
+            if value is not None:
+                node[key] = value
+        return True
+
+    def add_process(self, guid: str, image: Optional[str] = None, host: Optional[str] = None, first_seen: Optional[str] = None) -> Optional[str]:
+        node_id = f"process:{guid}"
+        return node_id if self.add_node(node_id, "process", first_seen, process_guid=guid, image=image, host=host) else None
+
+    def add_ip(self, address: str, first_seen: Optional[str] = None) -> Optional[str]:
+        node_id = f"ip:{address}"
+        return node_id if self.add_node(node_id, "ip", first_seen, address=address) else None
+
+    def add_edge(self, source: str, target: str, kind: str, count: int = 1,
+                 first_seen: Optional[str] = None, last_seen: Optional[str] = None,
+                 port: Optional[int] = None, bytes: int = 0):
+        key = (source, target, kind)
+        edge = self.edges.get(key)
+        if edge is None:
+            edge = self.edges[key] = {"source": source, "target": target, "type": kind, "count": 0,
+                                      "first_seen": first_seen, "last_seen": last_seen, "ports": [], "bytes": 0}
+            if kind == "spawned":
+                self.parents[target] = source
+                self.children[source].add(target)
+            else:
+                self.neighbors[source].add(target)
+                self.neighbors[target].add(source)
+        edge["count"] += count
+        if first_seen and (edge["first_seen"] is None or first_seen < edge["first_seen"]):
+            edge["first_seen"] = first_seen
+        if last_seen and (edge["last_seen"] is None or last_seen > edge["last_seen"]):
+            edge["last_seen"] = last_seen
+        if port is not None and port not in edge["ports"] and len(edge["ports"]) < 50:
+            edge["ports"].append(port)
+        edge["bytes"] += bytes
+
+    def ancestors(self, node_id: str) -> List[str]:
+        """node_id 의 조상 프로세스 목록 (가까운 부모부터)"""
+        chain, seen = [], {node_id}
+        parent = self.parents.get(node_id)
+        while parent and parent not in seen:
+            chain.append(parent)
+            seen.add(parent)
+            parent = self.parents.get(parent)
+        return chain
+
+    def descendants(self, node_id: str) -> Set[str]:
+        found, stack = set(), [node_id]
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                if child not in found:
+                    found.add(child)
+                    stack.append(child)
+        return found
+
+    def process_chain(self, node_id: str) -> List[Dict[str, Any]]:
+        """루트 프로세스부터 node_id 까지의 프로세스 체인"""
+        chain = list(reversed(self.ancestors(node_id))) + [node_id]
+        return [{"process_guid": self.nodes.get(n, {}).get("process_guid", n.split(":", 1)[-1]),
+                 "image": self.nodes.get(n, {}).get("image")} for n in chain]
+
+    def attack_path(self, process_ids: Set[str], ip_ids: Set[str], hostnames: Set[str]) -> Dict[str, Any]:
+        """
+        시드에서 이어지는 부분 그래프를 반환합니다.
+        시드 프로세스(및 시드 IP 와 통신한 프로세스)의 조상/자손, 그 프로세스들의 네트워크 상대, 시드 IP 의 flow 상대로 구성합니다.
+        프로세스/IP 시드가 그래프에 없으면 시드 호스트의 전체 프로세스 트리를 사용합니다.
+        """
+        seeds = {n for n in process_ids if n in self.nodes}
+        for ip in ip_ids:
+            seeds |= {n for n in self.neighbors.get(ip, ()) if n.startswith("process:")}
+        if not seeds and hostnames:
+            seeds = {n for n, node in self.nodes.items() if node["type"] == "process" and node.get("host") in hostnames}
+
+        members = set(seeds)
+        for node_id in seeds:
+            members.update(self.ancestors(node_id))
+            members |= self.descendants(node_id)
+        for node_id in list(members):
+            members |= self.neighbors.get(node_id, set())
+        for ip in ip_ids:
+            if ip in self.nodes:
+                members.add(ip)
+                members |= self.neighbors.get(ip, set())
+
+        return {
+            "nodes": [self.nodes[n] for n in members if n in self.nodes],
+            "edges": [edge for (src, dst, _), edge in self.edges.items() if src in members and dst in members],
+            "process_chains": [self.process_chain(n) for n in sorted(seeds & process_ids or seeds)][:20],
+        }
+
+
+class IncidentService:
+    """
+    인시던트 조사 관련 기능을 제공하는 서비스.
+    (경로 추적, 영향도 분석, 타임라인 분석 등)
+
+    query 형식 (하나 이상의 시드 필요):
+      {"log_attack_id": int} 또는 {"traffic_attack_id": int}   -- 탐지 결과를 시드로 사용
+      {"source_ip": str, "hostname": str, "process_guid": str, "time": ISO 8601}  -- 직접 지정
+      공통 선택 항목: "user_id", "window_minutes"(최대 max_window_minutes), "max_events"(최대 max_events)
+    """
+    def __init__(self, window_minutes: int = 30, page_size: int = 1000, max_events: int = 5000, max_nodes: int = 10000,
+                 max_window_minutes: int = 360):
+        self.window_minutes = window_minutes
+        self.max_window_minutes = max_window_minutes
+        self.page_size = page_size
+        self.max_events = max_events
+        self.max_nodes = max_nodes
+
+    # --- 시드/쿼리 구성 ---
+    async def _resolve_seed(self, query: Dict[str, Any], db: Optional[AsyncSession]) -> IncidentSeed:
+        # 요청 값은 (0, max_window_minutes] 로 제한 (과도한 구간의 집계가 ES 를 오래 점유하지 않도록)
+        window_minutes = float(query.get("window_minutes") or self.window_minutes)
+        if window_minutes <= 0:
+            raise ValueError("window_minutes 는 0보다 커야 합니다.")
+        window = timedelta(minutes=min(window_minutes, self.max_window_minutes))
+        center = _parse_time(query.get("time"))
+        seed = IncidentSeed(user_id=query.get("user_id"))
+
+        if query.get("log_attack_id") is not None and db is not None:
+            row = (await db.execute(
+                select(AttackLog).where(AttackLog.log_attack_id == int(query["log_attack_id"])).limit(1)
+            )).scalar_one_or_none()
+            if row is None:
+                raise LookupError(f"Attack_log 를 찾을 수 없습니다: log_attack_id={query['log_attack_id']}")
+            description = row.description or {}
+            center = center or row.detected_at
+            seed.user_id = seed.user_id or row.user_id
+            seed.source_ips.add(row.source_address)
+            seed.hostnames.add(row.hostname)
+            seed.process_guids.add(description.get("process_guid"))
+            seed.detection = {"table": "Attack_log", "id": row.log_attack_id, "attack_type": row.attack_type,
+                              "detected_at": row.detected_at.isoformat(), "es_log_id": description.get("es_log_id")}
+        elif query.get("traffic_attack_id") is not None and db is not None:
+            row = (await db.execute(
+                select(AttackTraffic).where(AttackTraffic.traffic_attack_id == int(query["traffic_attack_id"])).limit(1)
+            )).scalar_one_or_none()
+            if row is None:
+                raise LookupError(f"Attack_traffic 를 찾을 수 없습니다: traffic_attack_id={query['traffic_attack_id']}")
+            center = center or row.timestamp
+            seed.user_id = seed.user_id or row.user_id
+            seed.source_ips.add(row.src_ip)
+            seed.detection = {"table": "Attack_traffic", "id": row.traffic_attack_id, "dst_port": row.dst_port,
+                              "detected_at": row.timestamp.isoformat()}
+
+        seed.source_ips.add(query.get("source_ip"))
+        seed.hostnames.add(query.get("hostname"))
+        seed.process_guids.add(query.get("process_guid"))
+        for values in (seed.source_ips, seed.hostnames, seed.process_guids):
+            values.difference_update({None, "", "-"})
+        if not (seed.source_ips or seed.hostnames or seed.process_guids):
+            raise ValueError("log_attack_id, traffic_attack_id, source_ip, hostname, process_guid 중 하나 이상이 필요합니다.")
+
+        center = _parse_time(center) or datetime.now(timezone.utc)
+        seed.start, seed.end = center - window, center + window
+        return seed
+
+    def _indices(self, seed: IncidentSeed) -> Tuple[str, str]:
+        return (es_index_manager.indices_for_range(settings.es_index_winlogbeat, seed.start, seed.end),
+                es_index_manager.indices_for_range(settings.es_index_packetbeat, seed.start, seed.end))
+
+    def _base_filter(self, seed: IncidentSeed) -> List[Dict[str, Any]]:
+        filters = [{"range": {"@timestamp": {"gte": seed.start.isoformat(), "lte": seed.end.isoformat()}}}]
+        if seed.user_id:
+            filters.append(user_id_filter(seed.user_id))
+        return filters
+
+    def _correlation_should(self, seed: IncidentSeed, ip_fields=WINLOG_IP_FIELDS + NETWORK_IP_FIELDS,
+                            include_hosts: bool = True) -> List[Dict[str, Any]]:
+        """시드 IP / 호스트 / 프로세스 중 하나라도 일치하는 이벤트 조건"""
+        should = []
+        if seed.source_ips:
+            should += [{"terms": {f: sorted(seed.source_ips)}} for f in ip_fields]
+        if include_hosts and seed.hostnames:
+            should.append({"terms": {F_HOST: sorted(seed.hostnames)}})
+        if seed.process_guids:
+            guids = sorted(seed.process_guids)
+            should += [{"terms": {F_PROCESS_GUID: guids}}, {"terms": {F_PARENT_GUID: guids}}]
+        return should
+
+    def _query(self, filters: List[Dict[str, Any]], should: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        query = {"bool": {"filter": filters}}
+        if should is not None:
+            query["bool"]["should"] = should
+            query["bool"]["minimum_should_match"] = 1
+        return query
+
+    # --- ES 조회 도우미 ---
+    async def _composite_buckets(self, es: AsyncElasticsearch, indices: str, query: Dict[str, Any],
+                                 sources: Dict[str, str], aggs: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """composite aggregation 을 after_key 로 끝까지 페이징하며 버킷을 하나씩 돌려줍니다."""
+        after = None
+        while True:
+            composite = {
+                "size": self.page_size,
+                "sources": [{name: {"terms": {"field": f, "missing_bucket": True}}} for name, f in sources.items()],
+            }
+            if after:
+                composite["after"] = after
+            group = {"composite": composite}
+            if aggs:
+                group["aggs"] = aggs
+            response = await es.search(index=indices, size=0, query=query, aggs={"groups": group},
+                                       ignore_unavailable=True, track_total_hits=False)
+            groups = response.get("aggregations", {}).get("groups", {})
+            buckets = groups.get("buckets", [])
+            for bucket in buckets:
+                yield bucket
+            after = groups.get("after_key")
+            if not after or len(buckets) < self.page_size:
+                return
+
+    async def _pit_scan(self, es: AsyncElasticsearch, indices: str, query: Dict[str, Any],
+                        fields: List[str], limit: int) -> AsyncIterator[Dict[str, Any]]:
+        """point-in-time + search_after 로 @timestamp 순서대로 최대 limit 건의 hit 을 돌려줍니다."""
+        pit_id = (await es.open_point_in_time(index=indices, keep_alive="1m", ignore_unavailable=True))["id"]
+        search_after, fetched = None, 0
+        try:
+            while fetched < limit:
+                size = min(self.page_size, limit - fetched)
+                response = await es.search(
+                    pit={"id": pit_id, "keep_alive": "1m"}, query=query, size=size, source=fields,
+                    sort=[{"@timestamp": "asc"}, {"_shard_doc": "asc"}], search_after=search_after, track_total_hits=False,
+                )
+                pit_id = response.get("pit_id", pit_id)
+                hits = response["hits"]["hits"]
+                for hit in hits:
+                    yield hit
+                fetched += len(hits)
+                if len(hits) < size:
+                    return
+                search_after = hits[-1]["sort"]
+        finally:
+            try:
+                await es.close_point_in_time(id=pit_id)
+            except Exception as e:
+                logger.warning(f"⚠️ 인시던트 분석 PIT 닫기 실패: {e}")
+
+    # --- 공격 경로 ---
+    async def _add_connections(self, es: AsyncElasticsearch, indices: str, base: List[Dict[str, Any]],
+                               should: List[Dict[str, Any]], graph: IncidentGraph, hosts: Set[str]):
+        """Sysmon 네트워크 연결(이벤트 3)을 프로세스 -> 원격 IP 간선으로 추가하고, 연결이 발생한 호스트를 모읍니다."""
+        network_query = self._query(base + [{"term": {F_EVENT_ID: NETWORK_CONNECT_EVENT_ID}}], should)
+        sources = {"host": F_HOST, "guid": F_PROCESS_GUID, "image": F_IMAGE, "dst_ip": F_DEST_IP, "dst_port": F_DEST_PORT}
+        async for bucket in self._composite_buckets(es, indices, network_query, sources, _TIME_AGGS):
+            key, first = bucket["key"], _bucket_time(bucket, "first_seen")
+            if not key["guid"] or not key["dst_ip"]:
+                continue
+            process = graph.add_process(key["guid"], key["image"], key["host"], first)
+            remote = graph.add_ip(key["dst_ip"], first)
+            if process and remote:
+                graph.add_edge(process, remote, "connected", bucket["doc_count"], first,
+                               _bucket_time(bucket, "last_seen"), port=key["dst_port"])
+            if key["host"]:
+                hosts.add(key["host"])
+
+    async def trace_attack_path(self, query: dict, es: AsyncElasticsearch, db: Optional[AsyncSession]):
+        """
+        공격 경로를 추적합니다.
+        - 시드 IP 와 관련된 Sysmon 네트워크 연결(이벤트 3)로 프로세스 -> 원격지 간선과 관련 호스트를 찾고
+        - 관련 호스트의 프로세스 생성(이벤트 1)으로 부모 -> 자식 간선을 만든 뒤
+        - 시드 프로세스와 그 자손 프로세스의 네트워크 연결, 시드 IP 의 Packetbeat flow(IP -> IP) 간선을 추가합니다.
+        """
+        seed = await self._resolve_seed(query, db)
+        winlog_indices, packet_indices = self._indices(seed)
+        graph = IncidentGraph(self.max_nodes)
+        base = self._base_filter(seed)
+        hosts = set(seed.hostnames)
+
+        # 1. 시드 프로세스가 실행된 호스트, 시드 IP 와 통신한 프로세스 (호스트만 시드로 주어지면 해당 호스트의 모든 연결)
+        if seed.process_guids:
+            guids = sorted(seed.process_guids)
+            host_query = self._query(base, [{"terms": {F_PROCESS_GUID: guids}}, {"terms": {F_PARENT_GUID: guids}}])
+            async for bucket in self._composite_buckets(es, winlog_indices, host_query, {"host": F_HOST}):
+                if bucket["key"]["host"]:
+                    hosts.add(bucket["key"]["host"])
+        if seed.source_ips:
+            await self._add_connections(es, winlog_indices, base, [{"terms": {f: sorted(seed.source_ips)}} for f in WINLOG_IP_FIELDS], graph, hosts)
+        elif not seed.process_guids and hosts:
+            await self._add_connections(es, winlog_indices, base, [{"terms": {F_HOST: sorted(hosts)}}], graph, hosts)
+
+        # 2. 부모 -> 자식 프로세스 (Sysmon 이벤트 1, 관련 호스트 한정)
+        if hosts:
+            process_query = self._query(base + [{"term": {F_EVENT_ID: PROCESS_CREATE_EVENT_ID}}, {"terms": {F_HOST: sorted(hosts)}}])
+            sources = {"host": F_HOST, "parent": F_PARENT_GUID, "parent_image": F_PARENT_IMAGE, "guid": F_PROCESS_GUID, "image": F_IMAGE}
+            async for bucket in self._composite_buckets(es, winlog_indices, process_query, sources, _TIME_AGGS):
+                key, first = bucket["key"], _bucket_time(bucket, "first_seen")
+                if not key["guid"]:
+                    continue
+                child = graph.add_process(key["guid"], key["image"], key["host"], first)
+                if child and key["parent"]:
+                    parent = graph.add_process(key["parent"], key["parent_image"], key["host"])
+                    if parent:
+                        graph.add_edge(parent, child, "spawned", bucket["doc_count"], first, _bucket_time(bucket, "last_seen"))
+
+        # 시드 프로세스와 그 자손의 네트워크 연결 (1단계에서 IP 로 찾은 연결은 간선에 누적되지 않도록 IP 시드가 없을 때만)
+        if seed.process_guids and not seed.source_ips:
+            closure = set()
+            for guid in seed.process_guids:
+                node_id = f"process:{guid}"
+                closure |= {node_id} | graph.descendants(node_id)
+            guids = sorted(n.split(":", 1)[1] for n in closure)[:self.page_size]
+            await self._add_connections(es, winlog_indices, base, [{"terms": {F_PROCESS_GUID: guids}}], graph, set())
+
+        # 3. IP -> IP (Packetbeat flow)
+        if seed.source_ips:
+            flow_query = self._query(base, [{"terms": {f: sorted(seed.source_ips)}} for f in NETWORK_IP_FIELDS])
+            sources = {"src": "source.ip", "dst": "destination.ip", "port": "destination.port"}
+            aggs = {**_TIME_AGGS, "bytes": {"sum": {"field": "source.bytes"}}}
+            async for bucket in self._composite_buckets(es, packet_indices, flow_query, sources, aggs):
+                key, first = bucket["key"], _bucket_time(bucket, "first_seen")
+                if not key["src"] or not key["dst"]:
+                    continue
+                src, dst = graph.add_ip(key["src"], first), graph.add_ip(key["dst"], first)
+                if src and dst:
+                    graph.add_edge(src, dst, "flow", bucket["doc_count"], first, _bucket_time(bucket, "last_seen"),
+                                   port=key["port"], bytes=int((bucket.get("bytes") or {}).get("value") or 0))
+
+        path = graph.attack_path({f"process:{g}" for g in seed.process_guids}, {f"ip:{ip}" for ip in seed.source_ips}, hosts)
+        logger.info(f"✅ 공격 경로 추적 완료: 노드 {len(path['nodes'])}개, 간선 {len(path['edges'])}개 (전체 그래프 노드 {len(graph.nodes)}개)")
+        return {"seed": seed.to_dict(), **path, "truncated": graph.truncated}
+
+    # --- 영향도 ---
+    async def assess_impact(self, query: dict, es: AsyncElasticsearch, db: Optional[AsyncSession]):
+        """
+        공격의 영향도를 분석합니다.
+        - 시드와 관련된 이벤트가 발생한 호스트와 계정, 시드 IP 가 통신한 원격지를 composite aggregation 으로 집계하고
+        - 같은 구간에 같은 IP/호스트에서 발생한 탐지 건수를 DB 에서 집계합니다.
+        """
+        seed = await self._resolve_seed(query, db)
+        winlog_indices, packet_indices = self._indices(seed)
+        base = self._base_filter(seed)
+        winlog_query = self._query(base, self._correlation_should(seed))
+
+        async def collect(indices: str, q: Dict[str, Any], sources: Dict[str, str]) -> Counter:
+            counts = Counter()
+            async for bucket in self._composite_buckets(es, indices, q, sources):
+                key = tuple(bucket["key"][name] for name in sources)
+                if all(v is not None for v in key):
+                    counts[key if len(key) > 1 else key[0]] += bucket["doc_count"]
+            return counts
+
+        tasks = [collect(winlog_indices, winlog_query, {"host": F_HOST})]
+        tasks += [collect(winlog_indices, winlog_query, {"account": f}) for f in ACCOUNT_FIELDS]
+        if seed.source_ips:
+            ips = sorted(seed.source_ips)
+            tasks.append(collect(packet_indices, self._query(base + [{"terms": {"source.ip": ips}}]),
+                                 {"ip": "destination.ip", "port": "destination.port"}))
+            tasks.append(collect(packet_indices, self._query(base + [{"terms": {"destination.ip": ips}}]),
+                                 {"ip": "source.ip"}))
+        results = await asyncio.gather(*tasks)
+        hosts, account_counts = results[0], sum(results[1:1 + len(ACCOUNT_FIELDS)], Counter())
+        outbound = results[1 + len(ACCOUNT_FIELDS)] if seed.source_ips else Counter()
+        inbound = results[2 + len(ACCOUNT_FIELDS)] if seed.source_ips else Counter()
+        for account in ("-", "SYSTEM", "LOCAL SERVICE", "NETWORK SERVICE"):
+            account_counts.pop(account, None)  # 모든 호스트에 나타나는 기본 계정은 제외
+
+        return {
+            "seed": seed.to_dict(),
+            "affected_assets": [{"hostname": h, "events": c} for h, c in hosts.most_common()],
+            "affected_accounts": [{"account": a, "events": c} for a, c in account_counts.most_common()],
+            "remote_endpoints": [{"ip": ip, "port": port, "flows": c} for (ip, port), c in outbound.most_common(100)],
+            "inbound_peers": [{"ip": ip, "flows": c} for ip, c in inbound.most_common(100)],
+            "detections": await self._detection_summary(seed, db),
+        }
+
+    async def _detection_summary(self, seed: IncidentSeed, db: Optional[AsyncSession]) -> Dict[str, Any]:
+        if db is None:
+            return {}
+        log_conditions = [AttackLog.detected_at.between(seed.start, seed.end)]
+        matches = []
+        if seed.source_ips:
+            matches.append(AttackLog.source_address.in_(seed.source_ips))
+        if seed.hostnames:
+            matches.append(AttackLog.hostname.in_(seed.hostnames))
+        summary = {"attack_log": {}, "attack_traffic": {}}
+        if matches:
+            rows = await db.execute(
+                select(AttackLog.attack_type, func.count()).where(*log_conditions, or_(*matches)).group_by(AttackLog.attack_type)
+            )
+            summary["attack_log"] = {attack_type: count for attack_type, count in rows.all()}
+        if seed.source_ips:
+            rows = await db.execute(
+                select(AttackTraffic.dst_port, func.count())
+                .where(AttackTraffic.timestamp.between(seed.start, seed.end), AttackTraffic.src_ip.in_(seed.source_ips))
+                .group_by(AttackTraffic.dst_port)
+            )
+            summary["attack_traffic"] = {str(port): count for port, count in rows.all()}
+        return summary
+
+    # --- 타임라인 ---
+    async def analyze_timeline(self, query: dict, es: AsyncElasticsearch, db: Optional[AsyncSession]):
+        """
+        공격 타임라인을 분석합니다.
+        - 시드와 관련된 원본 이벤트를 PIT + search_after 로 시간순으로 읽고 (최대 max_events 건)
+        - 같은 구간의 탐지 결과(DB)와 합쳐 시간순으로 반환합니다.
+        """
+        seed = await self._resolve_seed(query, db)
+        limit = min(int(query.get("max_events") or self.max_events), self.max_events)
+        if limit <= 0:
+            raise ValueError("max_events 는 0보다 커야 합니다.")
+        indices = ",".join(self._indices(seed))
+        es_query = self._query(self._base_filter(seed), self._correlation_should(seed))
+
+        timeline = []
+        async for hit in self._pit_scan(es, indices, es_query, TIMELINE_FIELDS, limit):
+            timeline.append(self._timeline_entry(hit))
+        truncated = len(timeline) >= limit
+        timeline += await self._detection_entries(seed, db)
+        timeline.sort(key=lambda entry: _parse_time(entry["time"]) or seed.start)
+        return {"seed": seed.to_dict(), "timeline": timeline, "event_count": len(timeline), "truncated": truncated}
+
+    @staticmethod
+    def _timeline_entry(hit: Dict[str, Any]) -> Dict[str, Any]:
+        doc = hit.get("_source", {})
+        entry = {"time": doc.get("@timestamp"), "source": doc.get("log_source"), "host": _get_path(doc, F_HOST),
+                 "es_id": hit.get("_id"), "es_index": hit.get("_index")}
+        event_id = _get_path(doc, F_EVENT_ID)
+        if event_id is not None:
+            image = _get_path(doc, F_IMAGE)
+            entry.update({"event_id": event_id, "process_guid": _get_path(doc, F_PROCESS_GUID), "image": image})
+            if str(event_id) == PROCESS_CREATE_EVENT_ID:
+                entry["event"] = f"프로세스 생성: {image} ({_get_path(doc, 'winlog.event_data.CommandLine')})"
+            elif str(event_id) == NETWORK_CONNECT_EVENT_ID:
+                entry["event"] = f"네트워크 연결: {image} -> {_get_path(doc, F_DEST_IP)}:{_get_path(doc, F_DEST_PORT)}"
+            else:
+                entry["event"] = f"{_get_path(doc, 'winlog.channel')} 이벤트 {event_id}"
+        else:
+            entry["event"] = (f"{doc.get('type') or 'flow'} {_get_path(doc, 'source.ip')}:{_get_path(doc, 'source.port')} -> "
+                              f"{_get_path(doc, 'destination.ip')}:{_get_path(doc, 'destination.port')}")
+        return entry
+
+    async def _detection_entries(self, seed: IncidentSeed, db: Optional[AsyncSession]) -> List[Dict[str, Any]]:
+        if db is None:
+            return []
+        entries = []
+        matches = []
+        if seed.source_ips:
+            matches.append(AttackLog.source_address.in_(seed.source_ips))
+        if seed.hostnames:
+            matches.append(AttackLog.hostname.in_(seed.hostnames))
+        if matches:
+            rows = await db.execute(
+                select(AttackLog).where(AttackLog.detected_at.between(seed.start, seed.end), or_(*matches))
+                .order_by(AttackLog.detected_at).limit(self.max_events)
+            )
+            entries += [{"time": row.detected_at.isoformat(), "source": "detection", "host": row.hostname,
+                         "event": f"{row.attack_type} 탐지 (심각도 {row.severity}, 신뢰도 {row.confidence}%)",
+                         "log_attack_id": row.log_attack_id} for row in rows.scalars()]
+        if seed.source_ips:
+            rows = await db.execute(
+                select(AttackTraffic).where(AttackTraffic.timestamp.between(seed.start, seed.end), AttackTraffic.src_ip.in_(seed.source_ips))
+                .order_by(AttackTraffic.timestamp).limit(self.max_events)
+            )
+            entries += [{"time": row.timestamp.isoformat(), "source": "detection",
+                         "event": f"트래픽 공격 탐지 {row.src_ip} -> 포트 {row.dst_port}",
+                         "traffic_attack_id": row.traffic_attack_id} for row in rows.scalars()]
+        return entries
+
+
+# 프로세스 전역 인시던트 분석 서비스
+incident_service = IncidentService(
+    window_minutes=settings.incident_window_minutes,
+    page_size=settings.incident_page_size,
+    max_events=settings.incident_max_events,
+    max_nodes=settings.incident_max_nodes,
+    max_window_minutes=settings.incident_max_window_minutes,
+)
@@ -9,6 +9,7 @@ from elasticsearch import AsyncElasticsearch
 
 from src.core.config import settings
 from app.models.models import AttackLog
+from app.services.es_index_manager import es_index_manager
 
 class LogDashboardService:
     """
@@ -30,8 +31,9 @@ class LogDashboardService:
                     }
                 }
             }
-            # winlogbeat 인덱스를 대상으로 카운트
-            response = await es.count(index=settings.es_index_winlogbeat, body=query)
+            # 범위와 겹치는 winlogbeat 일 단위 인덱스만 대상으로 카운트 (now-24h/h 의 시간 내림을 고려해 25시간)
+            indices = es_index_manager.indices_for_time_range(settings.es_index_winlogbeat, "25h")
+            response = await es.count(index=indices, body=query, ignore_unavailable=True)
             return {"log_count_24h": response.get("count", 0)}
         except Exception as e:
             print(f"❌ ES 24시간 로그 수 집계 실패: {e}", flush=True)
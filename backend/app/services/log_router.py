@@ -0,0 +1,83 @@
+# app/services/log_router.py
+"""
+Winlogbeat 채널/이벤트 ID 라우팅.
+
+Sysmon, Security, System 채널 로그를 모두 하나의 log_model 파이프라인으로 보내지 않고,
+설정 파일(LOG_ROUTING_PATH)의 라우팅 표에 따라 (winlog.channel, winlog.event_id) 별로 탐지기를 선택합니다.
+라우팅 표는 로드 시 딕셔너리 두 개로 컴파일되어 이벤트당 dict 조회 한두 번으로 결정됩니다.
+일치하는 경로가 없는 이벤트는 None 을 반환하며, 예측 없이 색인만 수행됩니다.
+"""
+import json
+import logging
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = "*"
+
+
+class LogRouter:
+    """
+    :param routes: [{"channel": ..., "event_ids": [...] 또는 "*", "detector": ...}, ...]
+    :param default_detector: 라우팅 표가 없을 때 모든 이벤트에 사용할 탐지기
+    """
+    def __init__(self, routes: Optional[Iterable[Dict[str, Any]]] = None, default_detector: Optional[str] = None):
+        self.default_detector = default_detector
+        self._by_event: Dict[Tuple[str, str], str] = {}   # (채널 소문자, 이벤트 ID 문자열) -> 탐지기
+        self._by_channel: Dict[str, str] = {}             # 채널 소문자 -> 탐지기 (event_ids: "*")
+        self.stats: Counter = Counter()
+        self.enabled = routes is not None
+        for route in routes or ():
+            channel, detector = route["channel"].lower(), route["detector"]
+            event_ids = route.get("event_ids", WILDCARD)
+            if event_ids == WILDCARD:
+                self._by_channel[channel] = detector
+            else:
+                for event_id in event_ids:
+                    self._by_event[(channel, str(event_id))] = detector
+
+    @classmethod
+    def from_file(cls, path: str, default_detector: Optional[str] = None) -> "LogRouter":
+        """라우팅 설정 파일을 읽어 컴파일합니다. 파일이 없으면 모든 이벤트를 default_detector 로 보냅니다."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                routes = json.load(f)["routes"]
+        except FileNotFoundError:
+            logger.warning(f"⚠️ Winlogbeat 라우팅 설정 파일이 없어 모든 이벤트를 '{default_detector}' 탐지기로 보냅니다: {path}")
+            return cls(None, default_detector)
+        router = cls(routes, default_detector)
+        logger.info(f"✅ Winlogbeat 라우팅 표 로드 완료: {len(router._by_event)}개 이벤트 경로, {len(router._by_channel)}개 채널 경로")
+        return router
+
+    @property
+    def detectors(self) -> set:
+        """라우팅 표가 참조하는 탐지기 이름 집합"""
+        names = set(self._by_event.values()) | set(self._by_channel.values())
+        if not self.enabled and self.default_detector:
+            names.add(self.default_detector)
+        return names
+
+    def route(self, channel: Optional[str], event_id: Any) -> Optional[str]:
+        """이벤트를 처리할 탐지기 이름을 반환합니다. (없으면 None: 색인만 수행)"""
+        if not self.enabled:
+            detector = self.default_detector
+        elif not channel:
+            detector = None
+        else:
+            channel = channel.lower()
+            detector = self._by_event.get((channel, str(event_id))) or self._by_channel.get(channel)
+        self.stats[detector or "index_only"] += 1
+        return detector
+
+    def report(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "routed": dict(self.stats)}
+
+
+# 프로세스 전역 라우터 (LOG_ROUTING_ENABLED=false 이면 기존처럼 모든 이벤트를 log_model 로 예측)
+log_router = (
+    LogRouter.from_file(settings.log_routing_path, default_detector="log_model")
+    if settings.log_routing_enabled else LogRouter(None, default_detector="log_model")
+)
@@ -0,0 +1,369 @@
+# app/services/process_tree.py
+"""
+Sysmon 프로세스 트리 스트리밍 인덱스.
+
+Sysmon 이벤트 1(프로세스 생성)의 ProcessGuid -> (ParentProcessGuid, Image) 관계를 Consumer 에서 바로 기록해 두고,
+탐지 시 ES 조회 없이 메모리에서 조상 체인(루트 -> ... -> 탐지된 프로세스)을 구성합니다.
+
+- 메모리: 최대 max_processes 개까지 유지하고 초과 시 가장 오래 갱신되지 않은 프로세스부터 제거(LRU)
+  ProcessGuid 는 16바이트 UUID 로, Image 경로는 sys.intern 으로 공유해 항목당 크기를 줄입니다.
+- 영속화: snapshot_interval 초마다 변경이 있으면 압축된 바이너리 스냅샷(이미지 경로 테이블 + 고정 길이 레코드)을
+  임시 파일에 쓴 뒤 원자적으로 교체하고, 시작 시 다시 적재합니다. (재시작 직후에도 이전 프로세스의 체인 유지)
+  워커 프로세스마다 Consumer 파티션이 달라 트리 내용도 다르므로 `<이름>.worker-<pid><확장자>` 파일을 따로 쓰고
+  (임시 파일은 tempfile.mkstemp 로 만들어 다른 워커와 겹치지 않음), 시작 시 모든 워커 파일을 오래된 것부터 병합합니다.
+  실행 중인 워커는 `<스냅샷 파일>.lock` 을 flock 으로 잡고 있으며, 잠금이 풀린(종료된) 워커의 파일은 병합 후 삭제합니다.
+"""
+import asyncio
+import fcntl
+import glob
+import logging
+import os
+import struct
+import sys
+import tempfile
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROCESS_CREATE_EVENT_ID = "1"
+
+# ProcessGuid 는 보통 "{UUID}" 형식이므로 16바이트로 저장하고, 형식이 다르면 문자열 그대로 저장
+_Key = Union[bytes, str]
+# (부모 키, Image 경로)
+_Entry = Tuple[Optional[_Key], Optional[str]]
+
+_SNAPSHOT_MAGIC = b"PTREE001"
+_NO_IMAGE = 0xFFFFFFFF
+
+
+def _key(guid: Any) -> Optional[_Key]:
+    if not guid:
+        return None
+    text = str(guid).strip()
+    try:
+        return uuid.UUID(text.strip("{}")).bytes
+    except ValueError:
+        return text
+
+
+def _guid(key: _Key) -> str:
+    return "{" + str(uuid.UUID(bytes=key)).upper() + "}" if isinstance(key, bytes) else key
+
+
+def _pack_key(key: Optional[_Key]) -> bytes:
+    # 종류(0: 없음, 1: UUID 16바이트, 2: 문자열) + 내용
+    if key is None:
+        return b"\x00"
+    if isinstance(key, bytes):
+        return b"\x01" + key
+    data = key.encode("utf-8")[:255]
+    return b"\x02" + bytes([len(data)]) + data
+
+
+def _unpack_key(buffer: bytes, offset: int) -> Tuple[Optional[_Key], int]:
+    kind = buffer[offset]
+    if kind == 0:
+        return None, offset + 1
+    if kind == 1:
+        return bytes(buffer[offset + 1:offset + 17]), offset + 17
+    length = buffer[offset + 1]
+    return bytes(buffer[offset + 2:offset + 2 + length]).decode("utf-8"), offset + 2 + length
+
+
+class ProcessTree:
+    """
+    :param enabled: False 면 기록/조회를 하지 않음
+    :param max_processes: 유지할 최대 프로세스 수 (LRU)
+    :param max_depth: 조상 체인의 최대 깊이 (순환 방지 포함)
+    :param snapshot_path: 스냅샷 파일 경로 (빈 값이면 영속화하지 않음). 실제로는 워커별 파일에 저장
+    :param snapshot_interval: 스냅샷 저장 주기(초)
+    """
+    def __init__(self, enabled: bool = True, max_processes: int = 200_000, max_depth: int = 16,
+                 snapshot_path: str = "", snapshot_interval: float = 60.0):
+        self.enabled = enabled
+        self.max_processes = max_processes
+        self.max_depth = max_depth
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._entries: "OrderedDict[_Key, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self._lock_file = None
+        self.stats = {"observed": 0, "created": 0, "evicted": 0, "chain_lookups": 0, "chain_hits": 0,
+                      "snapshot_saves": 0, "snapshot_loaded": 0, "snapshot_files_merged": 0, "snapshot_orphans_removed": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- 기록 ---
+    def _put(self, key: _Key, parent: Optional[_Key], image: Optional[str], overwrite: bool):
+        entries = self._entries
+        existing = entries.get(key)
+        image = sys.intern(image) if image else None
+        if existing is not None:
+            entries.move_to_end(key)
+            if not overwrite:
+                if existing[1] is None and image:
+                    entries[key] = (existing[0], image)
+                    self._dirty = True
+                return
+            parent = parent if parent is not None else existing[0]
+            image = image or existing[1]
+        entries[key] = (parent, image)
+        self._dirty = True
+        if len(entries) > self.max_processes:
+            entries.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def observe(self, flat: Dict[str, Any]):
+        """평탄화된 Winlogbeat 이벤트를 반영합니다. (Sysmon 이벤트만 사용)"""
+        if not self.enabled or "Sysmon" not in str(flat.get("winlog.channel") or ""):
+            return
+        key = _key(flat.get("winlog.event_data.ProcessGuid"))
+        if key is None:
+            return
+        image = flat.get("winlog.event_data.Image")
+        with self._lock:
+            self.stats["observed"] += 1
+            if str(flat.get("winlog.event_id")) == PROCESS_CREATE_EVENT_ID:
+                parent = _key(flat.get("winlog.event_data.ParentProcessGuid"))
+                if parent is not None:
+                    # 부모를 먼저 기록해 자식보다 먼저 제거되지 않도록 함 (부모의 부모는 알 수 없으면 비워 둠)
+                    self._put(parent, None, flat.get("winlog.event_data.ParentImage"), overwrite=False)
+                self._put(key, parent, image, overwrite=True)
+                self.stats["created"] += 1
+            else:
+                # 트리 기록 이전부터 실행 중이던 프로세스도 Image 는 알 수 있음
+                self._put(key, None, image, overwrite=False)
+
+    # --- 조회 ---
+    def chain(self, guid: Any) -> List[Dict[str, Optional[str]]]:
+        """루트 -> ... -> guid 순서의 프로세스 체인을 반환합니다. (알 수 없는 프로세스면 빈 목록)"""
+        if not self.enabled:
+            return []
+        key = _key(guid)
+        with self._lock:
+            self.stats["chain_lookups"] += 1
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                return []
+            self.stats["chain_hits"] += 1
+            chain, seen = [], set()
+            while key is not None and entry is not None and key not in seen and len(chain) < self.max_depth:
+                seen.add(key)
+                chain.append({"process_guid": _guid(key), "image": entry[1]})
+                key = entry[0]
+                entry = self._entries.get(key) if key is not None else None
+            if key is not None and entry is None and key not in seen and len(chain) < self.max_depth:
+                chain.append({"process_guid": _guid(key), "image": None})  # 기록되지 않은 부모
+        chain.reverse()
+        return chain
+
+    # --- 스냅샷 ---
+    def _encode_snapshot(self) -> Tuple[bytes, int]:
+        with self._lock:
+            items = list(self._entries.items())
+            self._dirty = False
+        images: Dict[str, int] = {}
+        records = bytearray()
+        for key, (parent, image) in items:
+            image_id = _NO_IMAGE if image is None else images.setdefault(image, len(images))
+            records += _pack_key(key) + _pack_key(parent) + struct.pack("<I", image_id)
+        table = bytearray(struct.pack("<I", len(images)))
+        for image in images:
+            data = image.encode("utf-8")
+            table += struct.pack("<H", len(data)) + data
+        body = bytes(table) + struct.pack("<I", len(items)) + bytes(records)
+        return _SNAPSHOT_MAGIC + struct.pack("<I", zlib.crc32(body)) + body, len(items)
+
+    def _worker_path(self, pid: Any) -> str:
+        root, ext = os.path.splitext(self.snapshot_path)
+        return f"{root}.worker-{pid}{ext}"
+
+    @property
+    def worker_snapshot_path(self) -> str:
+        """이 워커가 저장하는 스냅샷 파일 경로"""
+        return self._worker_path(os.getpid())
+
+    def _acquire_worker_lock(self):
+        """이 워커의 스냅샷 파일 잠금을 잡아 다른 워커가 주인 없는 파일로 보고 삭제하지 않도록 합니다."""
+        if self._lock_file is not None:
+            return
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(self.worker_snapshot_path + ".lock", "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            pass  # 같은 프로세스의 다른 인스턴스가 이미 잡고 있음 (같은 워커 파일)
+
+    def save_snapshot(self) -> int:
+        """이 워커의 스냅샷을 저장하고 기록한 프로세스 수를 반환합니다."""
+        self._acquire_worker_lock()
+        data, count = self._encode_snapshot()
+        path = self.worker_snapshot_path
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                         dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        self.stats["snapshot_saves"] += 1
+        return count
+
+    def _read_snapshot(self, path: str) -> Optional["OrderedDict[_Key, _Entry]"]:
+        """스냅샷 파일 하나를 읽습니다. (파일이 없거나 손상되었으면 None)"""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        header = len(_SNAPSHOT_MAGIC) + 4
+        if data[:len(_SNAPSHOT_MAGIC)] != _SNAPSHOT_MAGIC or struct.unpack_from("<I", data, len(_SNAPSHOT_MAGIC))[0] != zlib.crc32(data[header:]):
+            logger.warning(f"⚠️ 프로세스 트리 스냅샷이 손상되어 무시합니다: {path}")
+            return None
+
+        offset = header
+        image_count = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        images = []
+        for _ in range(image_count):
+            length = struct.unpack_from("<H", data, offset)[0]
+            images.append(sys.intern(data[offset + 2:offset + 2 + length].decode("utf-8")))
+            offset += 2 + length
+        record_count = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        loaded: "OrderedDict[_Key, _Entry]" = OrderedDict()
+        for _ in range(record_count):
+            key, offset = _unpack_key(data, offset)
+            parent, offset = _unpack_key(data, offset)
+            image_id = struct.unpack_from("<I", data, offset)[0]
+            offset += 4
+            loaded[key] = (parent, None if image_id == _NO_IMAGE else images[image_id])
+        return loaded
+
+    def _snapshot_files(self) -> List[str]:
+        """병합할 스냅샷 파일 목록 (단일 파일 형식의 이전 스냅샷 + 워커별 파일, 오래된 것부터)"""
+        root, ext = os.path.splitext(self.snapshot_path)
+        paths = [self.snapshot_path] + glob.glob(glob.escape(root) + ".worker-*" + glob.escape(ext))
+        found = []
+        for path in paths:
+            try:
+                found.append((os.path.getmtime(path), path))
+            except OSError:
+                continue  # 없거나 다른 워커가 방금 삭제한 파일
+        return [path for _, path in sorted(found)]
+
+    def _remove_orphan(self, path: str) -> bool:
+        """잠금이 풀린(종료된) 워커의 스냅샷 파일을 삭제합니다. 실행 중인 워커의 파일이면 False"""
+        if path == self.snapshot_path or path == self.worker_snapshot_path:
+            return False
+        try:
+            with open(path + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)  # 실행 중인 워커의 파일이면 OSError
+                os.remove(path)
+                os.remove(path + ".lock")
+            return True
+        except OSError:
+            return False
+
+    def load_snapshot(self) -> int:
+        """
+        모든 워커의 스냅샷을 병합해 적재하고 적재한 프로세스 수를 반환합니다. (파일이 없으면 0)
+        같은 프로세스가 여러 파일에 있으면 나중에 저장된 파일의 항목을 사용합니다.
+        """
+        self._acquire_worker_lock()
+        loaded: "OrderedDict[_Key, _Entry]" = OrderedDict()
+        merged_files = []
+        for path in self._snapshot_files():
+            entries = self._read_snapshot(path)
+            if entries is None:
+                continue
+            for key, entry in entries.items():
+                loaded[key] = entry
+                loaded.move_to_end(key)
+            merged_files.append(path)
+        while len(loaded) > self.max_processes:
+            loaded.popitem(last=False)
+        record_count = len(loaded)
+
+        with self._lock:
+            # 적재 전에 이미 기록된 프로세스가 더 최신이므로 뒤쪽(최근)에 유지
+            for key, entry in self._entries.items():
+                loaded[key] = entry
+                loaded.move_to_end(key)
+            while len(loaded) > self.max_processes:
+                loaded.popitem(last=False)
+            self._entries = loaded
+        # 다른 워커 파일을 병합했으면 이 워커 파일에 먼저 저장한 뒤, 종료된 워커의 파일을 삭제
+        if any(path != self.worker_snapshot_path for path in merged_files):
+            self.save_snapshot()
+            self.stats["snapshot_orphans_removed"] += sum(1 for path in merged_files if self._remove_orphan(path))
+        self.stats["snapshot_files_merged"] = len(merged_files)
+        self.stats["snapshot_loaded"] = record_count
+        return record_count
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            if not self._dirty:
+                continue
+            try:
+                await asyncio.to_thread(self.save_snapshot)
+            except Exception as e:
+                logger.error(f"❌ 프로세스 트리 스냅샷 저장 실패: {e}")
+
+    async def start(self):
+        """스냅샷을 적재하고 주기적 저장 태스크를 시작합니다."""
+        if not self.enabled or not self.snapshot_path or self._task is not None:
+            return
+        try:
+            count = await asyncio.to_thread(self.load_snapshot)
+            logger.info(f"✅ 프로세스 트리 스냅샷 적재 완료: {count}개 프로세스")
+        except Exception as e:
+            logger.error(f"❌ 프로세스 트리 스냅샷 적재 실패 (빈 트리로 시작): {e}")
+        self._task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self):
+        """저장 태스크를 멈추고 마지막 스냅샷을 저장합니다."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        try:
+            await asyncio.to_thread(self.save_snapshot)
+        except Exception as e:
+            logger.error(f"❌ 프로세스 트리 스냅샷 저장 실패: {e}")
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "processes": len(self._entries),
+            "max_processes": self.max_processes,
+            "snapshot_path": self.worker_snapshot_path if self.snapshot_path else "",
+            **self.stats,
+        }
+
+
+# 프로세스 전역 프로세스 트리
+process_tree = ProcessTree(
+    enabled=settings.process_tree_enabled,
+    max_processes=settings.process_tree_max_processes,
+    max_depth=settings.process_tree_max_depth,
+    snapshot_path=settings.process_tree_snapshot_path,
+    snapshot_interval=settings.process_tree_snapshot_interval,
+)
@@ -0,0 +1,190 @@
+# app/services/rule_engine.py
+"""
+Sigma 형식을 단순화한 Winlogbeat 탐지 규칙 엔진.
+
+EventID 와 몇 개 필드만으로 판별 가능한 공격(계정 생성, 스케줄 작업, WinRM/DCOM 악용 등)을
+ML 모델보다 먼저 규칙으로 탐지하고, 규칙에 걸린 이벤트는 모델 예측을 건너뜁니다.
+
+규칙 파일(YAML) 예시:
+
+    rules:
+      - id: win-schtasks-create
+        title: schtasks.exe 로 작업 생성
+        label: "스케줄 작업 공격"
+        confidence: 0.95
+        channel: Microsoft-Windows-Sysmon/Operational
+        event_ids: [1]
+        detection:                                   # 모든 조건을 만족해야 일치 (AND)
+          winlog.event_data.Image|endswith: '\\schtasks.exe'
+          winlog.event_data.CommandLine|contains: '/create'
+        auto_block: false                            # 선택. false 면 공격으로 기록만 하고 자동 차단은 하지 않음
+
+필드 수정자(modifier): (없음) 값 일치 / 목록이면 집합 포함, startswith, endswith, contains, re, exists.
+문자열 비교는 대소문자를 구분하지 않으며, 모든 조건은 로드 시 함수로 컴파일됩니다.
+규칙은 (채널, EventID) 키로 색인되어 이벤트마다 후보 규칙만 평가합니다.
+"""
+import logging
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import yaml
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Matcher = Callable[[Any], bool]
+
+
+def _norm(value: Any) -> str:
+    return value.lower() if type(value) is str else str(value).lower()
+
+
+def _as_list(value: Any) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def compile_matcher(modifier: str, expected: Any) -> Matcher:
+    """필드 조건 하나를 값 -> bool 함수로 컴파일합니다."""
+    if modifier == "exists":
+        want = bool(expected)
+        return lambda v: (v is not None and v != "") == want
+    if modifier == "re":
+        pattern = re.compile("|".join(f"(?:{p})" for p in _as_list(expected)), re.IGNORECASE)
+        search = pattern.search
+        return lambda v: v is not None and search(v if type(v) is str else str(v)) is not None
+
+    values = tuple(_norm(x) for x in _as_list(expected))
+    if modifier == "equals":
+        if len(values) == 1:
+            literal = values[0]
+            return lambda v: v is not None and _norm(v) == literal
+        value_set = frozenset(values)
+        return lambda v: v is not None and _norm(v) in value_set
+    if modifier == "startswith":
+        return lambda v: v is not None and _norm(v).startswith(values)
+    if modifier == "endswith":
+        return lambda v: v is not None and _norm(v).endswith(values)
+    if modifier == "contains":
+        if len(values) == 1:
+            needle = values[0]
+            return lambda v: v is not None and needle in _norm(v)
+        return lambda v: v is not None and any(x in _norm(v) for x in values)
+    raise ValueError(f"지원하지 않는 필드 수정자입니다: {modifier}")
+
+
+class CompiledRule:
+    __slots__ = ("id", "title", "label", "confidence", "predicates", "auto_block")
+
+    def __init__(self, rule_id: str, title: str, label: str, confidence: float,
+                 predicates: Tuple[Tuple[str, Matcher], ...], auto_block: bool = True):
+        self.id = rule_id
+        self.title = title
+        self.label = label
+        self.confidence = confidence
+        self.predicates = predicates
+        self.auto_block = auto_block
+
+    def matches(self, flat: Dict[str, Any]) -> bool:
+        get = flat.get
+        for field, matcher in self.predicates:
+            if not matcher(get(field)):
+                return False
+        return True
+
+
+def compile_rule(spec: Dict[str, Any]) -> CompiledRule:
+    predicates = []
+    for key, expected in (spec.get("detection") or {}).items():
+        field, _, modifier = key.partition("|")
+        predicates.append((field, compile_matcher(modifier or "equals", expected)))
+    return CompiledRule(spec["id"], spec.get("title", spec["id"]), spec["label"],
+                        float(spec.get("confidence", 1.0)), tuple(predicates), bool(spec.get("auto_block", True)))
+
+
+class RuleEngine:
+    """
+    컴파일된 규칙 색인.
+
+    :param specs: 규칙 정의 목록 (YAML 의 rules 항목)
+    """
+    def __init__(self, specs: Sequence[Dict[str, Any]] = ()):
+        by_event: Dict[Tuple[str, str], List[CompiledRule]] = {}
+        by_channel: Dict[str, List[CompiledRule]] = {}
+        global_rules: List[CompiledRule] = []
+        for spec in specs:
+            rule = compile_rule(spec)
+            channel = spec.get("channel")
+            event_ids = spec.get("event_ids")
+            if channel and event_ids:
+                for event_id in _as_list(event_ids):
+                    by_event.setdefault((channel.lower(), str(event_id)), []).append(rule)
+            elif channel:
+                by_channel.setdefault(channel.lower(), []).append(rule)
+            else:
+                global_rules.append(rule)
+
+        # 조회 한 번으로 후보 규칙 전체를 얻도록 (이벤트 규칙 + 채널 규칙 + 전역 규칙)을 미리 합쳐 둠
+        self._global = tuple(global_rules)
+        self._by_channel = {ch: tuple(rules) + self._global for ch, rules in by_channel.items()}
+        self._by_event = {
+            key: tuple(rules) + self._by_channel.get(key[0], self._global)
+            for key, rules in by_event.items()
+        }
+        self.rule_count = len(specs)
+        self.stats: Counter = Counter()
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleEngine":
+        """YAML 규칙 파일을 읽어 컴파일합니다. 파일이 없으면 빈 엔진을 반환합니다."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                specs = (yaml.safe_load(f) or {}).get("rules", [])
+        except FileNotFoundError:
+            logger.warning(f"⚠️ 탐지 규칙 파일이 없어 규칙 엔진을 비활성화합니다: {path}")
+            return cls()
+        engine = cls(specs)
+        logger.info(f"✅ 탐지 규칙 {engine.rule_count}개 컴파일 완료: {path}")
+        return engine
+
+    def candidates(self, channel: Optional[str], event_id: Any) -> Tuple[CompiledRule, ...]:
+        channel = channel.lower() if channel else ""
+        rules = self._by_event.get((channel, str(event_id)))
+        if rules is not None:
+            return rules
+        return self._by_channel.get(channel, self._global)
+
+    def match_batch(self, flats: Sequence[Dict[str, Any]]) -> List[Optional[CompiledRule]]:
+        """
+        평면 뷰 배치에 규칙을 적용해 이벤트별로 처음 일치한 규칙(없으면 None)을 반환합니다.
+        (채널, EventID) 가 같은 이벤트끼리 묶어 후보 규칙을 한 번만 조회하고 규칙 단위로 평가합니다.
+        """
+        hits: List[Optional[CompiledRule]] = [None] * len(flats)
+        groups: Dict[Tuple[Any, Any], List[int]] = {}
+        for i, flat in enumerate(flats):
+            groups.setdefault((flat.get("winlog.channel"), flat.get("winlog.event_id")), []).append(i)
+
+        for (channel, event_id), indices in groups.items():
+            remaining = indices
+            for rule in self.candidates(channel, event_id):
+                unmatched = []
+                for i in remaining:
+                    if rule.matches(flats[i]):
+                        hits[i] = rule
+                        self.stats[rule.id] += 1
+                    else:
+                        unmatched.append(i)
+                remaining = unmatched
+                if not remaining:
+                    break
+        self.stats["_evaluated"] += len(flats)
+        return hits
+
+    def report(self) -> Dict[str, Any]:
+        return {"rules": self.rule_count, "hits": {k: v for k, v in self.stats.items() if not k.startswith("_")},
+                "evaluated": self.stats["_evaluated"]}
+
+
+# 프로세스 전역 규칙 엔진
+rule_engine = RuleEngine.from_file(settings.rule_engine_rules_path) if settings.rule_engine_enabled else RuleEngine()
@@ -0,0 +1,285 @@
+# app/services/spill_buffer.py
+"""
+Elasticsearch 장애/지연 시 원본 로그를 잠시 보관하는 디스크 기반 spill 버퍼.
+
+ES 가 느리거나 내려가 있으면 기존에는 배치를 로그만 남기고 버렸습니다. ES 색인기(es_writer)는
+bulk 요청이 실패하거나 지연 시간이 임계값을 넘으면 문서를 이 버퍼에 추가하고, SpillReplayer 가
+ES 회복 후 오래된 세그먼트부터 다시 색인합니다.
+
+저장 형식
+- 워커 프로세스마다 <ES_SPILL_DIR>/worker-<pid>/ 디렉터리를 쓰고, 같은 디렉터리를 두 프로세스가 쓰지 않도록 .lock 을 flock 으로 잡습니다.
+  재시작 등으로 잠금이 풀린 다른 워커 디렉터리의 세그먼트는 넘겨받아(adopt) 재색인합니다.
+- 세그먼트 파일(segment-<번호>.log)은 추가 전용이며 레코드는 [길이 4바이트][CRC32 4바이트][action JSON] 입니다.
+  읽을 때 CRC 가 맞지 않는 레코드는 건너뛰고, 프로세스 중단으로 잘린 마지막 레코드는 무시합니다.
+- 전체 크기가 ES_SPILL_QUOTA_BYTES 를 넘으면 더 이상 추가하지 않고 거절(dropped)합니다.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_RECORD_HEADER = struct.Struct("<II")  # (payload 길이, CRC32)
+_SEGMENT_PREFIX, _SEGMENT_SUFFIX = "segment-", ".log"
+
+
+def _segment_name(seq: int) -> str:
+    return f"{_SEGMENT_PREFIX}{seq:010d}{_SEGMENT_SUFFIX}"
+
+
+def _segment_seq(name: str) -> Optional[int]:
+    if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+        try:
+            return int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
+        except ValueError:
+            return None
+    return None
+
+
+def encode_record(action: Dict[str, Any]) -> bytes:
+    payload = json.dumps(action, ensure_ascii=False, default=str).encode()
+    return _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_segment(path: str) -> Tuple[List[Dict[str, Any]], int]:
+    """세그먼트 파일의 action 목록과 손상된 레코드 수를 반환합니다."""
+    actions, corrupt = [], 0
+    with open(path, "rb") as f:
+        data = f.read()
+    offset, size = 0, len(data)
+    while offset + _RECORD_HEADER.size <= size:
+        length, crc = _RECORD_HEADER.unpack_from(data, offset)
+        start, end = offset + _RECORD_HEADER.size, offset + _RECORD_HEADER.size + length
+        if end > size:
+            corrupt += 1  # 기록 도중 중단된 마지막 레코드
+            break
+        payload = data[start:end]
+        if zlib.crc32(payload) == crc:
+            try:
+                actions.append(json.loads(payload))
+            except ValueError:
+                corrupt += 1
+        else:
+            corrupt += 1
+        offset = end
+    return actions, corrupt
+
+
+class SpillBuffer:
+    """
+    :param directory: spill 루트 디렉터리 (워커별 하위 디렉터리를 만듦)
+    :param segment_bytes: 세그먼트 파일 하나의 최대 크기. 넘으면 새 세그먼트로 교체
+    :param quota_bytes: 전체 세그먼트 크기 한도 (이 워커 디렉터리 기준)
+    :param fsync: True 면 추가할 때마다 fsync (느리지만 전원 장애에도 보존)
+    """
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, quota_bytes: int = 2 * 1024 ** 3,
+                 fsync: bool = False):
+        self.root = directory
+        self.directory = ""  # open() 에서 워커 pid 로 결정 (gunicorn preload 후 fork 되는 경우 대비)
+        self.segment_bytes = segment_bytes
+        self.quota_bytes = quota_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._active = None
+        self._active_seq = 0
+        self._active_size = 0
+        self._segments: Dict[int, int] = {}  # 봉인된 세그먼트 번호 -> 크기
+        self.stats = {"spilled_docs": 0, "replayed_docs": 0, "dropped_docs": 0, "corrupt_records": 0, "adopted_segments": 0}
+
+    # --- 초기화 ---
+    def open(self):
+        """워커 디렉터리를 잠그고, 남아 있는 세그먼트와 주인 없는 다른 워커 디렉터리를 불러옵니다."""
+        with self._lock:
+            if self._lock_file is not None:
+                return
+            self.directory = os.path.join(self.root, f"worker-{os.getpid()}")
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_file = open(os.path.join(self.directory, ".lock"), "w")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            for name in os.listdir(self.directory):
+                seq = _segment_seq(name)
+                if seq is not None:
+                    self._segments[seq] = os.path.getsize(os.path.join(self.directory, name))
+            self._active_seq = max(self._segments, default=0) + 1
+            self._adopt_orphans()
+        if self._segments:
+            logger.warning(f"⚠️ ES spill 버퍼에 재색인 대기 중인 세그먼트 {len(self._segments)}개가 있습니다. ({self.backlog_bytes} bytes)")
+
+    def _adopt_orphans(self):
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not name.startswith("worker-") or path == self.directory or not os.path.isdir(path):
+                continue
+            try:
+                with open(os.path.join(path, ".lock"), "a") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)  # 실행 중인 워커의 디렉터리면 OSError
+                    for segment in sorted(os.listdir(path)):
+                        if _segment_seq(segment) is None:
+                            continue
+                        seq = self._active_seq
+                        self._active_seq += 1
+                        target = os.path.join(self.directory, _segment_name(seq))
+                        os.replace(os.path.join(path, segment), target)
+                        self._segments[seq] = os.path.getsize(target)
+                        self.stats["adopted_segments"] += 1
+                    for leftover in os.listdir(path):
+                        os.remove(os.path.join(path, leftover))
+                os.rmdir(path)
+            except OSError:
+                continue  # 다른 워커가 사용 중이거나 이미 넘겨받은 디렉터리
+
+    # --- 추가 ---
+    @property
+    def backlog_bytes(self) -> int:
+        return sum(self._segments.values()) + self._active_size
+
+    def _rotate(self):
+        """활성 세그먼트를 봉인합니다. (잠금을 잡은 상태에서 호출)"""
+        if self._active is None:
+            return
+        self._active.close()
+        self._segments[self._active_seq] = self._active_size
+        self._active, self._active_size = None, 0
+        self._active_seq += 1
+
+    def append(self, actions: Sequence[Dict[str, Any]]) -> int:
+        """action 들을 활성 세그먼트에 추가하고, 할당량 때문에 거절한 건수를 반환합니다. (블로킹 I/O)"""
+        if self._lock_file is None:
+            self.open()
+        records = [encode_record(action) for action in actions]
+        with self._lock:
+            accepted, size = [], self.backlog_bytes
+            for record in records:
+                if size + len(record) > self.quota_bytes:
+                    break
+                accepted.append(record)
+                size += len(record)
+            dropped = len(records) - len(accepted)
+            if accepted:
+                if self._active is None:
+                    self._active = open(os.path.join(self.directory, _segment_name(self._active_seq)), "ab")
+                self._active.write(b"".join(accepted))
+                self._active.flush()
+                if self.fsync:
+                    os.fsync(self._active.fileno())
+                self._active_size += sum(len(record) for record in accepted)
+                if self._active_size >= self.segment_bytes:
+                    self._rotate()
+            self.stats["spilled_docs"] += len(accepted)
+            self.stats["dropped_docs"] += dropped
+        if dropped:
+            logger.error(f"❌ ES spill 버퍼 할당량({self.quota_bytes} bytes) 초과로 문서 {dropped}건을 버렸습니다.")
+        return dropped
+
+    # --- 재색인 ---
+    def take_oldest(self) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """가장 오래된 세그먼트를 읽어 (번호, action 목록)을 반환합니다. 봉인된 세그먼트가 없으면 활성 세그먼트를 봉인합니다."""
+        with self._lock:
+            if not self._segments:
+                self._rotate()
+            if not self._segments:
+                return None
+            seq = min(self._segments)
+        actions, corrupt = read_segment(os.path.join(self.directory, _segment_name(seq)))
+        if corrupt:
+            self.stats["corrupt_records"] += corrupt
+            logger.warning(f"⚠️ ES spill 세그먼트 {seq}에서 손상된 레코드 {corrupt}건을 건너뜁니다.")
+        return seq, actions
+
+    def remove(self, seq: int, replayed: int):
+        with self._lock:
+            self._segments.pop(seq, None)
+            self.stats["replayed_docs"] += replayed
+        try:
+            os.remove(os.path.join(self.directory, _segment_name(seq)))
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        with self._lock:
+            if self._active is not None:
+                self._rotate()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "backlog_bytes": self.backlog_bytes,
+                "backlog_segments": len(self._segments) + (1 if self._active_size else 0),
+                "quota_bytes": self.quota_bytes,
+                **self.stats,
+            }
+
+
+class SpillReplayer:
+    """
+    ES 가 회복되면 spill 버퍼를 오래된 세그먼트부터 다시 색인하는 백그라운드 태스크.
+
+    :param buffer: spill 버퍼
+    :param write: action 목록을 색인하고 (재시도할 action 목록, 성공 건수)를 돌려주는 코루틴 함수
+    :param is_healthy: ES 로 다시 보내도 되는지 판단하는 함수 (색인기가 지연/장애 상태면 False)
+    :param interval: 백로그 확인 주기(초)
+    """
+    def __init__(self, buffer: SpillBuffer, write: Callable[[List[Dict[str, Any]]], Awaitable[Tuple[List[Dict[str, Any]], int]]],
+                 is_healthy: Callable[[], bool], interval: float = 5.0):
+        self.buffer = buffer
+        self.write = write
+        self.is_healthy = is_healthy
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _replay_once(self) -> bool:
+        """세그먼트 하나를 재색인합니다. 더 진행할 수 있으면 True 를 반환합니다."""
+        taken = await asyncio.to_thread(self.buffer.take_oldest)
+        if taken is None:
+            return False
+        seq, actions = taken
+        retry, succeeded = await self.write(actions) if actions else ([], 0)
+        if retry:
+            # 아직 색인하지 못한 문서만 다시 버퍼에 넣고 기존 세그먼트는 삭제
+            await asyncio.to_thread(self.buffer.append, retry)
+        self.buffer.remove(seq, succeeded)
+        logger.info(f"✅ ES spill 세그먼트 {seq} 재색인: 성공 {succeeded}건, 재적재 {len(retry)}건")
+        return not retry
+
+    async def _run(self):
+        while True:
+            try:
+                while self.buffer.backlog_bytes and self.is_healthy() and await self._replay_once():
+                    pass
+            except Exception as e:
+                logger.error(f"❌ ES spill 재색인 중 오류: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self._task is not None:
+            return
+        await asyncio.to_thread(self.buffer.open)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(self.buffer.close)
+
+
+# 프로세스 전역 spill 버퍼 (ES_SPILL_ENABLED=False 면 None)
+spill_buffer = SpillBuffer(
+    settings.es_spill_dir,
+    segment_bytes=settings.es_spill_segment_bytes,
+    quota_bytes=settings.es_spill_quota_bytes,
+    fsync=settings.es_spill_fsync,
+) if settings.es_spill_enabled else None
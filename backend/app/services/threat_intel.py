@@ -0,0 +1,224 @@
+# app/services/threat_intel.py
+"""
+로컬 위협 인텔리전스(IP/CIDR 차단 목록) 조회.
+
+직접 동기화하는 피드 파일(한 줄에 IP 또는 CIDR 하나, '#' 주석, CSV 의 경우 첫 번째 열)을
+- 단일 IP: Bloom filter + 정렬 배열(확인용) + 같은 위치의 피드 id 배열(array('H'), 피드가 여러 개일 때)
+- CIDR   : CidrTrie
+로 적재하고, 수집 시점에 모든 이벤트의 출발지 IP를 모델 예측 이전에 조회합니다.
+
+피드는 백그라운드 태스크가 주기적으로 변경 여부(mtime)를 확인해 별도 스레드에서 새 스냅샷을 만든 뒤
+참조 하나를 교체하는 방식으로 원자적으로 다시 로드합니다. (조회 중인 스레드는 이전 스냅샷을 끝까지 사용)
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from array import array
+from typing import Any, Dict, List, Optional
+
+from app.core.ip_sets import BloomFilter, CidrTrie, SortedIpSet, parse_cidr, parse_ip, ip_key_bytes
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 위협 인텔리전스 적중 시 사용하는 공격 유형 레이블
+THREAT_INTEL_LABEL = "위협 인텔리전스 (차단 목록)"
+
+
+class _IntelSnapshot:
+    """한 번 적재된 피드 전체의 불변 스냅샷"""
+    __slots__ = ("bloom", "exact", "exact_feed_ids", "feed_names", "trie", "feeds", "mtimes", "loaded_at", "load_seconds", "invalid_lines")
+
+    def __init__(self, bloom: Optional[BloomFilter], exact: SortedIpSet, exact_feed_ids: Dict[int, array], feed_names: List[str],
+                 trie: CidrTrie, feeds: Dict[str, int], mtimes: Dict[str, float], load_seconds: float, invalid_lines: int):
+        self.bloom = bloom
+        self.exact = exact
+        self.exact_feed_ids = exact_feed_ids  # 버전 -> exact 의 정렬 배열과 같은 위치의 피드 id (피드가 하나뿐이면 비워 둠)
+        self.feed_names = feed_names          # 피드 id -> 피드 이름
+        self.trie = trie
+        self.feeds = feeds
+        self.mtimes = mtimes
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+        self.invalid_lines = invalid_lines
+
+
+def _read_feed(path: str):
+    """피드 파일에서 IP/CIDR 문자열을 읽습니다."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield line.split(",", 1)[0].split()[0]
+
+
+def build_snapshot(paths: List[str], error_rate: float = 0.001) -> _IntelSnapshot:
+    """피드 파일들을 읽어 새 스냅샷을 만듭니다. (블로킹 작업이므로 별도 스레드에서 호출)"""
+    start = time.perf_counter()
+    v4, v6, trie = [], [], CidrTrie()
+    multi_feed = len(paths) > 1
+    read_ids = {4: array("H"), 6: array("H")}  # v4/v6 에 추가한 순서대로의 피드 id
+    feed_names, feeds, mtimes, invalid = [], {}, {}, 0
+    for feed_id, path in enumerate(paths):
+        name = os.path.basename(path)
+        feed_names.append(name)
+        try:
+            mtimes[path] = os.path.getmtime(path)
+            count = 0
+            for entry in _read_feed(path):
+                parsed = parse_cidr(entry)
+                if parsed is None:
+                    invalid += 1
+                    continue
+                version, network, length = parsed
+                if length == (32 if version == 4 else 128):
+                    (v4 if version == 4 else v6).append(network)
+                    if multi_feed:
+                        read_ids[version].append(feed_id)
+                else:
+                    trie.add(version, network, length, value=name)
+                count += 1
+            feeds[name] = count
+        except OSError as e:
+            logger.error(f"❌ 위협 인텔리전스 피드 읽기 실패: {path} ({e})")
+
+    exact = SortedIpSet(v4, v6)
+    # 중복 IP 는 먼저 읽은 피드가 우선하도록 역순으로 기록 (dict 대신 정렬 배열과 같은 위치의 2바이트 id 배열)
+    exact_feed_ids: Dict[int, array] = {}
+    if multi_feed:
+        for version, values in ((4, v4), (6, v6)):
+            ids = exact_feed_ids[version] = array("H", bytes(2 * len(exact.v4 if version == 4 else exact.v6)))
+            index, read = exact.index, read_ids[version]
+            for i in range(len(values) - 1, -1, -1):
+                ids[index(version, values[i])] = read[i]
+    bloom = None
+    if len(exact):
+        bloom = BloomFilter(len(exact), error_rate)
+        for value in exact.v4:
+            bloom.add(ip_key_bytes(4, value))
+        for value in exact.v6:
+            bloom.add(ip_key_bytes(6, value))
+    return _IntelSnapshot(bloom, exact, exact_feed_ids, feed_names, trie, feeds, mtimes, time.perf_counter() - start, invalid)
+
+
+class ThreatIntelService:
+    def __init__(self, paths: List[str], reload_seconds: float = 300, error_rate: float = 0.001,
+                 confirm_exact: bool = True):
+        self.paths = paths
+        self.reload_seconds = reload_seconds
+        self.error_rate = error_rate
+        self.confirm_exact = confirm_exact  # False 면 정렬 배열 확인 없이 Bloom filter 결과만 사용 (오탐률 = error_rate)
+        self._snapshot: Optional[_IntelSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"lookups": 0, "hits": 0, "bloom_false_positives": 0, "reloads": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.paths)
+
+    def load(self):
+        """피드를 동기적으로 적재하고 스냅샷을 교체합니다."""
+        snapshot = build_snapshot(self.paths, self.error_rate)
+        self._snapshot = snapshot  # 참조 교체는 원자적이므로 조회 중인 스레드에 영향 없음
+        self.stats["reloads"] += 1
+        logger.info(
+            f"✅ 위협 인텔리전스 피드 적재 완료: IP {len(snapshot.exact)}개, CIDR {snapshot.trie.prefix_count}개, "
+            f"{snapshot.load_seconds:.2f}초 (잘못된 항목 {snapshot.invalid_lines}개)"
+        )
+
+    def _changed(self) -> bool:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return True
+        for path in self.paths:
+            try:
+                if os.path.getmtime(path) != snapshot.mtimes.get(path):
+                    return True
+            except OSError:
+                if path in snapshot.mtimes:
+                    return True
+        return False
+
+    async def _reload_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_seconds)
+            try:
+                if self._changed():
+                    await asyncio.to_thread(self.load)
+            except Exception as e:
+                logger.error(f"❌ 위협 인텔리전스 피드 재적재 실패 (이전 스냅샷 유지): {e}")
+
+    async def start(self):
+        """최초 적재 후 백그라운드 재적재 태스크를 시작합니다."""
+        if not self.enabled or self._task is not None:
+            return
+        await asyncio.to_thread(self.load)
+        self._task = asyncio.create_task(self._reload_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def lookup(self, ip: Any) -> Optional[str]:
+        """IP가 차단 목록에 있으면 해당 피드 이름을, 없으면 None 을 반환합니다."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        parsed = parse_ip(ip)
+        if parsed is None:
+            return None
+        self.stats["lookups"] += 1
+        version, value = parsed
+
+        if snapshot.bloom is not None and ip_key_bytes(version, value) in snapshot.bloom:
+            position = snapshot.exact.index(version, value) if self.confirm_exact or snapshot.exact_feed_ids else -1
+            if not self.confirm_exact or position >= 0:
+                self.stats["hits"] += 1
+                if position >= 0 and snapshot.exact_feed_ids:
+                    return snapshot.feed_names[snapshot.exact_feed_ids[version][position]]
+                return next(iter(snapshot.feeds), "threat_intel")
+            self.stats["bloom_false_positives"] += 1
+
+        feed = snapshot.trie.lookup(version, value)
+        if feed is not None:
+            self.stats["hits"] += 1
+        return feed
+
+    def report(self) -> Dict[str, Any]:
+        """적재 현황과 구성 요소별 메모리 사용량을 반환합니다."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"enabled": self.enabled, "loaded": False, **self.stats}
+        memory = {
+            "bloom_filter": snapshot.bloom.memory_bytes() if snapshot.bloom else 0,
+            "exact_ip_array": snapshot.exact.memory_bytes(),
+            "exact_feed_ids": sum(sys.getsizeof(ids) for ids in snapshot.exact_feed_ids.values()),
+            "cidr_trie": snapshot.trie.memory_bytes(),
+        }
+        memory["total"] = sum(memory.values())
+        return {
+            "enabled": self.enabled,
+            "loaded": True,
+            "feeds": snapshot.feeds,
+            "exact_ips": len(snapshot.exact),
+            "cidr_prefixes": snapshot.trie.prefix_count,
+            "invalid_lines": snapshot.invalid_lines,
+            "bloom_bits": snapshot.bloom.num_bits if snapshot.bloom else 0,
+            "bloom_hashes": snapshot.bloom.num_hashes if snapshot.bloom else 0,
+            "loaded_at": snapshot.loaded_at,
+            "load_seconds": snapshot.load_seconds,
+            "memory_bytes": memory,
+            **self.stats,
+        }
+
+
+# 프로세스 전역 위협 인텔리전스 서비스 (THREAT_INTEL_FEED_PATHS 가 비어 있으면 비활성)
+threat_intel = ThreatIntelService(
+    paths=[p.strip() for p in settings.threat_intel_feed_paths.split(",") if p.strip()],
+    reload_seconds=settings.threat_intel_reload_seconds,
+    error_rate=settings.threat_intel_bloom_error_rate,
+    confirm_exact=settings.threat_intel_confirm_exact,
+)
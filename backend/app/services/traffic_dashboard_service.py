@@ -1,6 +1,6 @@
 # app/services/dashboard_service.py
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
 
 from sqlalchemy import select, func
@@ -9,12 +9,24 @@ from elasticsearch import AsyncElasticsearch
 
 from src.core.config import settings
 from app.models.models import AttackLog, AttackTraffic
+from app.services.es_index_manager import es_index_manager
 
 
 class TrafficDashboardService:
     """
     대시보드에 필요한 데이터를 조회하고 가공하는 비즈니스 로직을 담당합니다.
     """
+    async def _search_latest_doc(self, es: AsyncElasticsearch) -> Dict[str, Any]:
+        """
+        가장 최신 문서 1건을 조회합니다. 최근 이틀치 인덱스를 먼저 검색하고, 없을 때만 보존 기간 전체를 검색합니다.
+        """
+        latest_doc_query = {"size": 1, "sort": [{"@timestamp": "desc"}]}
+        recent_indices = es_index_manager.indices_for_range(settings.es_index_packetbeat, datetime.now(timezone.utc) - timedelta(days=1))
+        response = await es.search(index=recent_indices, body=latest_doc_query, ignore_unavailable=True)
+        if response['hits']['hits']:
+            return response
+        return await es.search(index=es_index_manager.all_indices(settings.es_index_packetbeat), body=latest_doc_query, ignore_unavailable=True)
+
     async def get_overall_traffic_stats(self, es: AsyncElasticsearch) -> Dict[str, Any]:
         """
         대시보드용 실시간 통계와 '최신 데이터의 시간'을 함께 반환합니다.
@@ -39,7 +51,8 @@ class TrafficDashboardService:
                     "total_bwd_bytes": {"sum": {"field": "destination.bytes"}}
                 }
             }
-            total_response = await es.search(index=settings.es_index_packetbeat, body=total_stats_query, request_timeout=60)
+            total_response = await es.search(index=es_index_manager.all_indices(settings.es_index_packetbeat), body=total_stats_query,
+                                             request_timeout=60, ignore_unavailable=True)
             aggs = total_response['aggregations']
             
             results["total_packets"] = int((aggs['total_fwd_packets'].get('value', 0) or 0) + (aggs['total_bwd_packets'].get('value', 0) or 0))
@@ -47,8 +60,7 @@ class TrafficDashboardService:
 
 
             # --- 2. 가장 최근 1초 구간의 실시간 통계 계산 ---
-            latest_doc_query = {"size": 1, "sort": [{"@timestamp": "desc"}]}
-            latest_doc_response = await es.search(index=settings.es_index_packetbeat, body=latest_doc_query)
+            latest_doc_response = await self._search_latest_doc(es)
 
             if not latest_doc_response['hits']['hits']:
                 return results
@@ -72,7 +84,8 @@ class TrafficDashboardService:
                     "bwd_bytes": {"sum": {"field": "destination.bytes"}}
                 }
             }
-            last_second_response = await es.search(index=settings.es_index_packetbeat, body=last_second_query)
+            last_second_response = await es.search(index=es_index_manager.indices_for_range(settings.es_index_packetbeat, start_time, end_time),
+                                                   body=last_second_query, ignore_unavailable=True)
             aggs_last_sec = last_second_response['aggregations']
 
             results["last_second_packets"] = int((aggs_last_sec['fwd_packets'].get('value', 0) or 0) + (aggs_last_sec['bwd_packets'].get('value', 0) or 0))
@@ -91,8 +104,7 @@ class TrafficDashboardService:
         try:
             # --- 1. 기준 시간 설정을 위해 가장 최신 데이터의 타임스탬프 조회 ---
             # size: 1, sort: desc => 최신 데이터 1건만 가져오는 쿼리
-            latest_doc_query = {"size": 1, "sort": [{"@timestamp": "desc"}]}
-            latest_doc_response = await es.search(index=settings.es_index_packetbeat, body=latest_doc_query)
+            latest_doc_response = await self._search_latest_doc(es)
 
             # ES에 데이터가 한 건도 없으면 빈 결과를 반환하고 함수 종료
             if not latest_doc_response['hits']['hits']:
@@ -144,7 +156,9 @@ class TrafficDashboardService:
             }
             
             # --- 4. 쿼리 실행 및 결과 파싱 ---
-            response = await es.search(index=settings.es_index_packetbeat, body=query)
+            # 시간 범위와 겹치는 날짜의 인덱스만 검색
+            response = await es.search(index=es_index_manager.indices_for_range(settings.es_index_packetbeat, start_time, end_time),
+                                       body=query, ignore_unavailable=True)
             # 집계 결과에서 'buckets' (1초 간격의 각 시간대별 데이터 묶음) 리스트를 가져옴
             buckets = response['aggregations']['traffic_over_time']['buckets']
 
@@ -178,7 +192,8 @@ class TrafficDashboardService:
                 "query": {"range": {"@timestamp": {"gte": f"now-{minutes}m"}}},
                 "aggs": {"top_ports_recent": {"terms": {"field": "destination.port", "size": top_n, "order": {"_count": "desc"}}}}
             }
-            response = await es.search(index=settings.es_index_packetbeat, body=query)
+            response = await es.search(index=es_index_manager.indices_for_time_range(settings.es_index_packetbeat, f"{minutes}m"),
+                                       body=query, ignore_unavailable=True)
             buckets = response['aggregations']['top_ports_recent']['buckets']
             
             # 이제 단일 목록만 반환
@@ -0,0 +1,255 @@
+# app/services/window_aggregator.py
+"""
+source.ip / host.name 별 슬라이딩 윈도우 집계.
+
+단일 이벤트만 보는 모델은 비율 기반 신호(포트 스캔, 무차별 로그온 시도 등)를 볼 수 없으므로,
+배치를 처리하면서 키별로 시간 버킷 링 버퍼를 갱신해 최근 window_seconds 동안의
+이벤트율, 바이트율, 고유 목적지 포트 수, 로그온 실패(4625) 수를 ES 조회 없이 계산합니다.
+
+- 갱신: 이벤트당 O(1) (만료된 버킷은 다음 갱신 시 합계에서 빼므로 상각 O(1))
+- 메모리: window_max_keys 를 넘으면 가장 오래 사용되지 않은 키부터 제거(LRU)
+- 규칙: 키마다 규칙별 발동 버킷(fired)을 기록해 같은 윈도우 안에서는 한 번만 발동
+"""
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FAILED_LOGON_EVENT_ID = 4625
+
+# 집계 키 종류별 피처 접두사
+KEY_PREFIXES = {"source.ip": "win_src", "host.name": "win_host"}
+WINDOW_FEATURES = ("events_per_sec", "bytes_per_sec", "distinct_dst_ports", "failed_logons")
+
+
+class _KeyWindow:
+    """키 하나의 시간 버킷 링 버퍼와 윈도우 전체 합계."""
+    __slots__ = ("epochs", "events", "bytes", "failed", "ports", "head",
+                 "total_events", "total_bytes", "total_failed", "port_counts", "fired")
+
+    def __init__(self, size: int):
+        self.epochs = [-1] * size          # 각 슬롯이 담고 있는 버킷 번호
+        self.events = [0] * size
+        self.bytes = [0] * size
+        self.failed = [0] * size
+        self.ports: List[Optional[Counter]] = [None] * size
+        self.head = -1                     # 지금까지 본 가장 최신 버킷 번호
+        self.total_events = 0
+        self.total_bytes = 0
+        self.total_failed = 0
+        self.port_counts: Counter = Counter()
+        self.fired: Optional[Dict[str, int]] = None  # 규칙 id -> 마지막으로 발동한 버킷 번호
+
+    def _expire_slot(self, slot: int):
+        self.total_events -= self.events[slot]
+        self.total_bytes -= self.bytes[slot]
+        self.total_failed -= self.failed[slot]
+        ports = self.ports[slot]
+        if ports:
+            port_counts = self.port_counts
+            for port, count in ports.items():
+                remaining = port_counts[port] - count
+                if remaining > 0:
+                    port_counts[port] = remaining
+                else:
+                    del port_counts[port]
+        self.epochs[slot] = -1
+        self.events[slot] = self.bytes[slot] = self.failed[slot] = 0
+        self.ports[slot] = None
+
+    def advance(self, bucket: int):
+        """최신 버킷을 bucket 으로 옮기며 윈도우 밖으로 밀려난 슬롯을 만료시킵니다."""
+        if bucket <= self.head:
+            return
+        size = len(self.epochs)
+        start = max(self.head + 1, bucket - size + 1)
+        for b in range(start, bucket + 1):
+            slot = b % size
+            if self.epochs[slot] != -1:
+                self._expire_slot(slot)
+        self.head = bucket
+
+    def add(self, bucket: int, nbytes: int, dst_port: Optional[int], failed_logon: bool) -> bool:
+        self.advance(bucket)
+        size = len(self.epochs)
+        if bucket <= self.head - size:
+            return False  # 윈도우보다 늦게 도착한 이벤트는 버림
+        slot = bucket % size
+        self.epochs[slot] = bucket
+        self.events[slot] += 1
+        self.total_events += 1
+        if nbytes:
+            self.bytes[slot] += nbytes
+            self.total_bytes += nbytes
+        if failed_logon:
+            self.failed[slot] += 1
+            self.total_failed += 1
+        if dst_port is not None:
+            ports = self.ports[slot]
+            if ports is None:
+                ports = self.ports[slot] = Counter()
+            ports[dst_port] += 1
+            self.port_counts[dst_port] += 1
+        return True
+
+    def is_idle(self, bucket: int) -> bool:
+        return self.head <= bucket - len(self.epochs)
+
+
+class SlidingWindowAggregator:
+    """
+    (키 종류, 키 값) 별 슬라이딩 윈도우 집계기.
+
+    :param window_seconds: 집계 윈도우 길이(초)
+    :param bucket_seconds: 링 버퍼 버킷 하나의 길이(초)
+    :param max_keys: 유지할 최대 키 수. 초과 시 LRU 제거
+    """
+    def __init__(self, window_seconds: int = 60, bucket_seconds: int = 5, max_keys: int = 100_000):
+        self.bucket_seconds = max(1, bucket_seconds)
+        self.num_buckets = max(1, -(-window_seconds // self.bucket_seconds))
+        self.window_seconds = self.num_buckets * self.bucket_seconds
+        self.max_keys = max_keys
+        self._windows: "OrderedDict[Tuple[str, str], _KeyWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"updates": 0, "late_events": 0, "evicted_lru": 0, "evicted_idle": 0,
+                      "rules_fired": 0, "rules_suppressed": 0}
+
+    def _bucket(self, ts: Optional[float]) -> int:
+        return int((ts if ts is not None else time.time()) // self.bucket_seconds)
+
+    def _touch(self, key: Tuple[str, str], bucket: int) -> _KeyWindow:
+        windows = self._windows
+        window = windows.get(key)
+        if window is None:
+            window = windows[key] = _KeyWindow(self.num_buckets)
+            # 맨 앞(가장 오래 사용되지 않은) 키부터 유휴 키와 초과 키를 제거
+            while windows:
+                oldest_key, oldest = next(iter(windows.items()))
+                if oldest_key != key and oldest.is_idle(bucket):
+                    windows.popitem(last=False)
+                    self.stats["evicted_idle"] += 1
+                elif len(windows) > self.max_keys:
+                    windows.popitem(last=False)
+                    self.stats["evicted_lru"] += 1
+                else:
+                    break
+        else:
+            windows.move_to_end(key)
+        return window
+
+    def update(self, keys: Dict[str, Optional[str]], nbytes: int = 0, dst_port: Optional[int] = None,
+               failed_logon: bool = False, ts: Optional[float] = None):
+        """
+        이벤트 하나를 집계에 반영합니다.
+
+        :param keys: {"source.ip": "10.0.0.1", "host.name": "DESKTOP-001"} 형태. 값이 없는 키는 건너뜁니다.
+        :param ts: 이벤트 시각(epoch 초). None 이면 처리 시각을 사용합니다.
+        """
+        bucket = self._bucket(ts)
+        with self._lock:
+            self.stats["updates"] += 1
+            for kind, value in keys.items():
+                if not value:
+                    continue
+                if not self._touch((kind, value), bucket).add(bucket, nbytes, dst_port, failed_logon):
+                    self.stats["late_events"] += 1
+
+    def snapshot(self, kind: str, value: Optional[str], ts: Optional[float] = None) -> Dict[str, float]:
+        """키 하나의 현재 윈도우 집계값을 반환합니다. (키가 없으면 0)"""
+        window_seconds = self.window_seconds
+        with self._lock:
+            window = self._windows.get((kind, value)) if value else None
+            if window is None:
+                return dict.fromkeys(WINDOW_FEATURES, 0)
+            window.advance(self._bucket(ts))
+            return {
+                "events_per_sec": window.total_events / window_seconds,
+                "bytes_per_sec": window.total_bytes / window_seconds,
+                "distinct_dst_ports": len(window.port_counts),
+                "failed_logons": window.total_failed,
+            }
+
+    def claim(self, rule: str, kind: str, value: Optional[str], ts: Optional[float] = None) -> bool:
+        """
+        규칙 발동 권한을 얻습니다. 같은 키에서 같은 규칙이 윈도우 길이 안에 이미 발동했으면 False 를 반환합니다.
+        (임계값을 넘은 동안 들어오는 모든 이벤트가 공격으로 재판정되는 것을 막음)
+        """
+        bucket = self._bucket(ts)
+        with self._lock:
+            window = self._windows.get((kind, value)) if value else None
+            if window is None:
+                return False
+            fired = window.fired
+            if fired is None:
+                fired = window.fired = {}
+            last = fired.get(rule)
+            if last is not None and bucket < last + self.num_buckets:
+                self.stats["rules_suppressed"] += 1
+                return False
+            fired[rule] = bucket
+            self.stats["rules_fired"] += 1
+            return True
+
+    def features(self, keys: Dict[str, Optional[str]], ts: Optional[float] = None) -> Dict[str, float]:
+        """
+        모델/규칙에 전달할 윈도우 피처를 반환합니다.
+        (e.g., {"win_src_events_per_sec": ..., "win_host_failed_logons": ...})
+        """
+        features = {}
+        for kind, prefix in KEY_PREFIXES.items():
+            for name, val in self.snapshot(kind, keys.get(kind), ts).items():
+                features[f"{prefix}_{name}"] = val
+        return features
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"keys": len(self._windows), "window_seconds": self.window_seconds,
+                    "bucket_seconds": self.bucket_seconds, **self.stats}
+
+
+class WindowRuleHit(NamedTuple):
+    label: str          # 탐지된 공격 유형
+    kind: str           # 임계값을 넘은 집계 키 종류 (source.ip / host.name)
+    key: str            # 집계 키 값
+    auto_block: bool    # 자동 차단 여부. host.name 집계는 출발지를 특정할 수 없으므로 탐지만 수행
+
+
+def evaluate_window_rules(features: Dict[str, float], keys: Dict[str, Optional[str]], failed_logon: bool = False,
+                          connection: bool = False, ts: Optional[float] = None,
+                          aggregator: Optional[SlidingWindowAggregator] = None) -> Optional[WindowRuleHit]:
+    """
+    윈도우 피처에 임계값 규칙을 적용해 탐지 결과를 반환합니다. (해당 없으면 None)
+    모델이 정상으로 판정한 이벤트에만 적용되며, 규칙은 해당 유형의 이벤트에서만 평가합니다.
+    - 무차별 대입 로그온: 로그온 실패(4625) 이벤트
+    - 포트 스캔: 네트워크 연결 이벤트 (Packetbeat flow, Sysmon 네트워크 연결)
+    같은 키에서 같은 규칙은 윈도우마다 한 번만 발동합니다. (SlidingWindowAggregator.claim)
+    """
+    aggregator = aggregator or window_aggregator
+    threshold = settings.window_failed_logon_threshold
+    if failed_logon and threshold:
+        for kind, prefix in KEY_PREFIXES.items():
+            if features.get(f"{prefix}_failed_logons", 0) >= threshold and aggregator.claim("brute_force", kind, keys.get(kind), ts):
+                return WindowRuleHit("무차별 대입 로그온 (Brute Force)", kind, keys[kind], kind == "source.ip")
+    source_ip = keys.get("source.ip")
+    threshold = settings.window_port_scan_threshold
+    if connection and threshold and features.get("win_src_distinct_dst_ports", 0) >= threshold \
+            and aggregator.claim("port_scan", "source.ip", source_ip, ts):
+        return WindowRuleHit("포트 스캔 (Port Scan)", "source.ip", source_ip, True)
+    threshold = settings.window_event_rate_threshold
+    if threshold and features.get("win_src_events_per_sec", 0) >= threshold \
+            and aggregator.claim("flood", "source.ip", source_ip, ts):
+        return WindowRuleHit("이벤트 폭주 (Flood)", "source.ip", source_ip, True)
+    return None
+
+
+# 프로세스 전역 집계기
+window_aggregator = SlidingWindowAggregator(
+    window_seconds=settings.window_seconds,
+    bucket_seconds=settings.window_bucket_seconds,
+    max_keys=settings.window_max_keys,
+)
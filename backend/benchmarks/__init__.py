@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# 오프라인 성능 측정 스크립트 모음입니다. backend 디렉터리에서 `python -m benchmarks.<이름>`으로 실행합니다.
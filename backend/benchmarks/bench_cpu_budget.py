@@ -0,0 +1,106 @@
+# benchmarks/bench_cpu_budget.py
+"""
+CPU 스레드 예산 벤치마크.
+
+gunicorn 워커를 흉내 내어 N개의 프로세스를 동시에 띄우고, 각 프로세스가 일정 시간 동안
+predict_log_threat_batch / predict_traffic_threat_batch 를 반복 호출했을 때의 합산 처리량을 비교합니다.
+
+- unbounded: 스레드 제한 없음 (각 라이브러리가 코어 수만큼 스레드 사용)
+- budgeted : app.core.cpu_budget 으로 워커당 스레드 수를 (코어 수 / 워커 수)로 제한
+
+    cd backend
+    python -m benchmarks.bench_cpu_budget --workers 4 --seconds 20 --batch-size 500
+"""
+import os
+import sys
+import argparse
+import json
+import subprocess
+import time
+
+from benchmarks.common import BACKEND_DIR, write_results
+
+
+def _child(args):
+    """워커 프로세스: 지정된 시간 동안 예측을 반복하고 처리량을 JSON으로 출력합니다."""
+    from benchmarks.common import use_bundled_artifacts
+    use_bundled_artifacts()
+
+    from app.core.cpu_budget import cpu_budget, apply_thread_limits
+    apply_thread_limits(cpu_budget)
+
+    import pandas as pd
+    from app.core.preprocessing import map_sysmon_to_model_columns, fill_and_mask_missing_features
+    from app.ml.predictor import get_predictor
+    from app.schemas.schemas import RawTrafficData
+    from app.services.analysis_service import analysis_service
+    from benchmarks.generators import WinlogbeatGenerator, PacketbeatGenerator
+
+    predictor = get_predictor()
+    processed = [fill_and_mask_missing_features(map_sysmon_to_model_columns(e))
+                 for e in WinlogbeatGenerator(seed=args.seed).events(args.batch_size)]
+    frames = []
+    for doc in PacketbeatGenerator(seed=args.seed).documents(args.batch_size):
+        cleaned = analysis_service._sanitize_raw_packetbeat_data(doc)
+        raw = RawTrafficData.model_validate(analysis_service._extract_traffic_fields(cleaned))
+        frames.append(analysis_service._calculate_traffic_features(raw))
+    traffic_df = pd.concat(frames, ignore_index=True)
+
+    events = 0
+    deadline = time.perf_counter() + args.seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        predictor.predict_log_threat_batch(processed)
+        predictor.predict_traffic_threat_batch(traffic_df)
+        events += 2 * args.batch_size
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"events": events, "elapsed": elapsed, "model_threads": cpu_budget.model_threads}))
+
+
+def _run_mode(args, budgeted: bool):
+    env = dict(os.environ)
+    env["CPU_BUDGET_ENABLED"] = "true" if budgeted else "false"
+    env["CPU_WORKER_COUNT"] = str(args.workers)
+    if args.cores:
+        env["CPU_TOTAL_CORES"] = str(args.cores)
+    command = [sys.executable, "-m", "benchmarks.bench_cpu_budget", "--child",
+               "--seconds", str(args.seconds), "--batch-size", str(args.batch_size), "--seed", str(args.seed)]
+    procs = [subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, text=True)
+             for _ in range(args.workers)]
+    reports = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        reports.append(json.loads(out.strip().splitlines()[-1]))
+    total_events = sum(r["events"] for r in reports)
+    wall = max(r["elapsed"] for r in reports)
+    return {
+        "mode": "budgeted" if budgeted else "unbounded",
+        "workers": args.workers,
+        "model_threads_per_worker": reports[0]["model_threads"] if budgeted else None,
+        "aggregate_events_per_sec": total_events / wall,
+        "per_worker_events_per_sec": [r["events"] / r["elapsed"] for r in reports],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--cores", type=int, default=0, help="CPU_TOTAL_CORES (0이면 자동 감지)")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+
+    results = [_run_mode(args, budgeted=False), _run_mode(args, budgeted=True)]
+    results.append({"speedup": results[1]["aggregate_events_per_sec"] / results[0]["aggregate_events_per_sec"]})
+    print(json.dumps(results, indent=2))
+    print(f"결과 저장: {write_results('cpu_budget', results)}")
+
+
+if __name__ == "__main__":
+    main()
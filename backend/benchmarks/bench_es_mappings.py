@@ -0,0 +1,92 @@
+# benchmarks/bench_es_mappings.py
+"""
+Packetbeat 인덱스 매핑 전/후 벤치마크. (실행 중인 Elasticsearch 필요: ELASTICSEARCH_HOSTS)
+
+같은 합성 Packetbeat 문서를 두 개의 임시 인덱스에 색인해 비교합니다.
+- dynamic: 기존처럼 동적 매핑 (문자열 = text + .keyword, match 쿼리 / source.ip.keyword 집계)
+- tuned  : es_index_manager 의 인덱스 템플릿 매핑 (keyword / ip / 숫자, term 쿼리 / source.ip 집계)
+
+측정 항목: bulk 색인 처리량(docs/sec), 대시보드 쿼리(user_id 필터 + IP 별 집계) 지연 시간, 인덱스 저장 크기.
+
+    cd backend
+    python -m benchmarks.bench_es_mappings --docs 200000 --queries 200
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import use_bundled_artifacts, measure, write_results
+
+use_bundled_artifacts()
+
+from elasticsearch import Elasticsearch, helpers
+
+from app.services.es_index_manager import index_mappings, PACKETBEAT_PROPERTIES
+from src.core.config import settings
+from benchmarks.generators import PacketbeatGenerator
+
+
+def ip_summary_query(user_id: str, tuned: bool) -> dict:
+    user_filter = {"term": {"user_id": user_id}} if tuned else {"match": {"user_id": user_id}}
+    return {
+        "size": 0,
+        "query": {"bool": {"filter": [user_filter]}},
+        "aggs": {
+            "ip_summary": {
+                "terms": {"field": "source.ip" if tuned else "source.ip.keyword", "size": 10},
+                "aggs": {"total_bytes": {"sum": {"field": "source.bytes"}}},
+            }
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--transaction-ratio", type=float, default=0.3)
+    parser.add_argument("--keep", action="store_true", help="측정 후 임시 인덱스를 삭제하지 않음")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    es = Elasticsearch(settings.elasticsearch_hosts.split(","), request_timeout=120)
+    docs = PacketbeatGenerator(seed=args.seed, transaction_ratio=args.transaction_ratio).documents(args.docs)
+    chunks = [docs[i:i + args.chunk_size] for i in range(0, len(docs), args.chunk_size)]
+    suffix = int(time.time())
+    variants = {
+        "dynamic": (f"bench-mapping-dynamic-{suffix}", None),
+        "tuned": (f"bench-mapping-tuned-{suffix}", index_mappings(PACKETBEAT_PROPERTIES)),
+    }
+
+    results = {"docs": args.docs}
+    try:
+        for name, (index, mappings) in variants.items():
+            es.indices.create(index=index, mappings=mappings)  # mappings=None 이면 동적 매핑
+            bulk = lambda chunk: helpers.bulk(es, ({"_index": index, "_source": doc} for doc in chunk), chunk_size=args.chunk_size)
+            ingest = measure(bulk, chunks, args.chunk_size, warmup=0)
+            es.indices.refresh(index=index)
+            es.indices.forcemerge(index=index, max_num_segments=1)
+
+            tuned = name == "tuned"
+            query = ip_summary_query("bench-user", tuned)
+            search = lambda _: es.search(index=index, body=query, request_cache=False)
+            results[name] = {
+                "ingest": ingest,
+                "ip_summary_query": measure(search, [None] * args.queries, 1),
+                "store_bytes": es.indices.stats(index=index, metric="store")["_all"]["primaries"]["store"]["size_in_bytes"],
+                "doc_count": es.count(index=index)["count"],
+            }
+        results["ingest_speedup"] = results["tuned"]["ingest"]["events_per_sec"] / results["dynamic"]["ingest"]["events_per_sec"]
+        results["query_p50_speedup"] = results["dynamic"]["ip_summary_query"]["p50_ms"] / results["tuned"]["ip_summary_query"]["p50_ms"]
+        results["store_ratio"] = results["tuned"]["store_bytes"] / results["dynamic"]["store_bytes"]
+    finally:
+        if not args.keep:
+            es.indices.delete(index=",".join(index for index, _ in variants.values()), ignore_unavailable=True)
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('es_mappings', results)}")
+
+
+if __name__ == "__main__":
+    main()
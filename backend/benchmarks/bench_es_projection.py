@@ -0,0 +1,136 @@
+# benchmarks/bench_es_projection.py
+"""
+_source 프로젝션 전/후 벤치마크.
+
+합성 Winlogbeat / Packetbeat 이벤트로 analysis_service 와 같은 ES 문서를 만들어 비교합니다.
+- baseline : 기존처럼 원본 이벤트 전체(**log_data)를 색인
+- projected: beat 메타데이터(DEFAULT_DROP_FIELDS)를 제거해 색인
+- projected_raw: 원본 보관 인덱스 사용 시 hot 인덱스 문서 (DEFAULT_RAW_ONLY_FIELDS 까지 제거)
+
+측정 항목: 이벤트당 bulk 본문 바이트(비압축/gzip), 문서 생성+직렬화 처리량(events/sec).
+--es 를 주면 실행 중인 Elasticsearch(ELASTICSEARCH_HOSTS)에 임시 인덱스를 만들어
+bulk 색인 처리량과 이벤트당 저장 바이트도 측정합니다. (원본 보관 인덱스는 best_compression 코덱)
+
+    cd backend
+    python -m benchmarks.bench_es_projection --events 50000
+    python -m benchmarks.bench_es_projection --events 200000 --es
+"""
+import argparse
+import gzip
+import json
+import time
+
+from benchmarks.common import use_bundled_artifacts, measure, write_results
+
+use_bundled_artifacts()
+
+from app.services.es_projection import SourceProjector
+from app.services.es_index_manager import index_mappings, raw_index_mappings, WINLOGBEAT_PROPERTIES, PACKETBEAT_PROPERTIES
+from src.core.config import settings
+from benchmarks.generators import WinlogbeatGenerator, PacketbeatGenerator
+
+
+def es_document(event: dict, log_source: str) -> dict:
+    """analysis_service 가 색인하는 문서와 같은 형태의 래퍼를 씌웁니다."""
+    return {
+        "@timestamp": event.get("@timestamp"),
+        "agent_id": "bench-agent",
+        "hostname": event.get("host", {}).get("name"),
+        "log_source": log_source,
+        **event,
+    }
+
+
+def bulk_body(docs: list) -> bytes:
+    lines = []
+    for doc in docs:
+        lines.append(json.dumps({"index": {"_index": "bench"}}, ensure_ascii=False))
+        lines.append(json.dumps(doc, ensure_ascii=False, default=str))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def payload_stats(name: str, events: list, log_source: str, projector: SourceProjector, chunk_size: int) -> dict:
+    docs = [projector.project(es_document(event, log_source)) for event in events]
+    body = bulk_body(docs)
+    chunks = [events[i:i + chunk_size] for i in range(0, len(events), chunk_size)]
+    build = lambda chunk: bulk_body([projector.project(es_document(event, log_source)) for event in chunk])
+    return {
+        "variant": name,
+        "bytes_per_event": len(body) / len(events),
+        "gzip_bytes_per_event": len(gzip.compress(body, 6)) / len(events),
+        "build_and_encode": measure(build, chunks, chunk_size),
+    }
+
+
+def live_stats(es, index: str, mappings: dict, docs: list, chunk_size: int, codec: str = None) -> dict:
+    from elasticsearch import helpers
+
+    settings_body = {"index.codec": codec} if codec else None
+    es.indices.create(index=index, mappings=mappings, settings=settings_body)
+    chunks = [docs[i:i + chunk_size] for i in range(0, len(docs), chunk_size)]
+    bulk = lambda chunk: helpers.bulk(es, ({"_index": index, "_source": doc} for doc in chunk), chunk_size=chunk_size)
+    ingest = measure(bulk, chunks, chunk_size, warmup=0)
+    es.indices.refresh(index=index)
+    es.indices.forcemerge(index=index, max_num_segments=1)
+    store = es.indices.stats(index=index, metric="store")["_all"]["primaries"]["store"]["size_in_bytes"]
+    return {"ingest": ingest, "store_bytes": store, "store_bytes_per_event": store / len(docs)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--es", action="store_true", help="실행 중인 ES 에 임시 인덱스를 만들어 색인 처리량/저장 크기 측정")
+    parser.add_argument("--keep", action="store_true", help="측정 후 임시 인덱스를 삭제하지 않음")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    projectors = {
+        "baseline": SourceProjector(enabled=False),
+        "projected": SourceProjector(),
+        "projected_raw": SourceProjector(raw_enabled=True),
+    }
+    sources = {
+        "winlogbeat": (WinlogbeatGenerator(seed=args.seed).events(args.events), WINLOGBEAT_PROPERTIES),
+        "packetbeat": (PacketbeatGenerator(seed=args.seed, transaction_ratio=0.3).documents(args.events), PACKETBEAT_PROPERTIES),
+    }
+
+    results = {"events": args.events}
+    for log_source, (events, _) in sources.items():
+        rows = [payload_stats(name, events, log_source, projector, args.chunk_size) for name, projector in projectors.items()]
+        baseline = rows[0]["bytes_per_event"]
+        for row in rows:
+            row["bytes_ratio"] = row["bytes_per_event"] / baseline
+        results[log_source] = rows
+
+    if args.es:
+        from elasticsearch import Elasticsearch
+
+        es = Elasticsearch(settings.elasticsearch_hosts.split(","), request_timeout=120)
+        suffix, created = int(time.time()), []
+        try:
+            for log_source, (events, properties) in sources.items():
+                live = {}
+                for name, projector in projectors.items():
+                    index = f"bench-projection-{log_source}-{name}-{suffix}"
+                    created.append(index)
+                    docs = [projector.project(es_document(event, log_source)) for event in events]
+                    live[name] = live_stats(es, index, index_mappings(properties), docs, args.chunk_size)
+                index = f"bench-projection-{log_source}-raw-{suffix}"
+                created.append(index)
+                raw_projector = projectors["projected_raw"]
+                raw_docs = [raw_projector.raw_document(es_document(event, log_source), event) for event in events]
+                live["raw_cold"] = live_stats(es, index, raw_index_mappings(), raw_docs, args.chunk_size, codec="best_compression")
+                live["ingest_speedup"] = live["projected"]["ingest"]["events_per_sec"] / live["baseline"]["ingest"]["events_per_sec"]
+                live["store_ratio"] = live["projected"]["store_bytes"] / live["baseline"]["store_bytes"]
+                results[f"{log_source}_live"] = live
+        finally:
+            if created and not args.keep:
+                es.indices.delete(index=",".join(created), ignore_unavailable=True)
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('es_projection', results)}")
+
+
+if __name__ == "__main__":
+    main()
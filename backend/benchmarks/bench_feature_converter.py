@@ -0,0 +1,101 @@
+# benchmarks/bench_feature_converter.py
+"""
+fill_and_mask_missing_features 변환기 마이크로 벤치마크.
+
+스키마를 매 호출마다 순회하며 타입을 분기하던 기존 구현(baseline)과,
+LogFeatures 스키마를 필드별 변환 함수로 한 번만 컴파일한 현재 구현(단건/배치)을 비교합니다.
+두 구현의 결과가 같은지(System_Version 별칭 보정 제외)도 함께 검사합니다.
+
+    cd backend
+    python -m benchmarks.bench_feature_converter --events 20000 --batch-size 500
+"""
+import argparse
+import json
+
+from benchmarks.common import use_bundled_artifacts, measure, write_results
+
+use_bundled_artifacts()
+
+from app.core.preprocessing import (
+    map_sysmon_to_model_columns,
+    fill_and_mask_missing_features,
+    fill_and_mask_missing_features_batch,
+)
+from app.schemas.schemas import LogFeatures
+from benchmarks.generators import WinlogbeatGenerator
+
+# 컴파일 이전에 fill_and_mask_missing_features 가 사용하던 타입 정의
+_BASELINE_FIELD_TYPES = {
+    "System_Version": "int", "port": "str", "ProcessId": "str",
+    "RecordNumber": "int", "ExecutionProcessID": "int", "ThreadID": "int",
+    "SourceProcessId": "int", "EventID": "str", "Keywords": "list", "ActivityID": "dict",
+}
+_BASELINE_DEFAULT_VALUES = {"str": "", "int": 0, "list": [], "dict": {}}
+
+
+def baseline_fill_and_mask(mapped_log):
+    """기존 구현: 호출마다 스키마 필드 목록을 만들고 타입별로 분기합니다."""
+    processed = {}
+    for col in [f for f in LogFeatures.model_fields if not f.endswith('_missing')]:
+        val = mapped_log.get(col)
+        missing_flag = 1 if val is None or val == '' else 0
+        expected_type = _BASELINE_FIELD_TYPES.get(col, "str")
+        if missing_flag == 1:
+            val = _BASELINE_DEFAULT_VALUES.get(expected_type, "")
+        elif expected_type == "int":
+            try:
+                val = int(val)
+            except (ValueError, TypeError):
+                val = 0
+        elif expected_type == "str":
+            val = str(val)
+        elif expected_type == "list":
+            if isinstance(val, str):
+                try:
+                    val = json.loads(val.replace("'", '"'))
+                except (json.JSONDecodeError, TypeError):
+                    val = [val]
+            elif not isinstance(val, list):
+                val = []
+        elif expected_type == "dict" and not isinstance(val, dict):
+            val = {}
+        processed[col] = val
+        processed[f"{col}_missing"] = missing_flag
+    return processed
+
+
+def _diff_fields(mapped):
+    """두 구현의 출력이 다른 필드 목록을 반환합니다."""
+    fields = set()
+    for m in mapped:
+        old, new = baseline_fill_and_mask(m), fill_and_mask_missing_features(m)
+        fields.update(k for k in new if old.get(k) != new[k])
+    return sorted(fields)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    mapped = [map_sysmon_to_model_columns(e) for e in WinlogbeatGenerator(seed=args.seed).events(args.events)]
+    batches = [mapped[i:i + args.batch_size] for i in range(0, len(mapped), args.batch_size)]
+
+    results = {
+        "baseline": measure(lambda batch: [baseline_fill_and_mask(m) for m in batch], batches, args.batch_size),
+        "compiled": measure(lambda batch: [fill_and_mask_missing_features(m) for m in batch], batches, args.batch_size),
+        "compiled_batch": measure(fill_and_mask_missing_features_batch, batches, args.batch_size),
+    }
+    base = results["baseline"]["events_per_sec"]
+    for name in ("compiled", "compiled_batch"):
+        results[name]["speedup"] = results[name]["events_per_sec"] / base
+    results["differing_fields"] = _diff_fields(mapped[:1000])
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('feature_converter', results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/bench_flatten.py
+"""
+Winlogbeat 이벤트 필드 조회 방식 벤치마크.
+
+- nested: 소비자마다 원본 중첩 딕셔너리를 다시 순회 (피처 매핑, IP 후보 5개, RuleName/ProcessGuid/Image/DestinationPort 등)
+- flat  : flatten_event 로 한 번만 평탄화한 뒤, 모든 소비자가 평면 뷰에서 dict.get 으로 조회
+
+이벤트당 처리 시간(us)과 tracemalloc 으로 측정한 이벤트당 할당 바이트/블록 수를 비교합니다.
+공격 판정 시에만 실행되는 조회(IP, 상세 정보)는 --attack-ratio 비율의 이벤트에서만 수행합니다.
+
+    cd backend
+    python -m benchmarks.bench_flatten --events 20000 --attack-ratio 0.1
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmarks.common import use_bundled_artifacts, write_results
+
+use_bundled_artifacts()
+
+from app.core.preprocessing import map_sysmon_to_model_columns, flatten_event, map_flat_to_model_columns
+from app.services.analysis_service import WINLOG_IP_CANDIDATES, INVALID_IPS, _get_nested_value
+from benchmarks.generators import WinlogbeatGenerator
+
+DETAIL_PATHS = ("winlog.event_data.DestinationPort", "winlog.event_data.RuleName",
+                "winlog.event_data.ProcessGuid", "winlog.event_data.Image", "user.name")
+
+
+def nested_consumers(event, is_attack):
+    """평탄화 이전 방식: 소비자마다 중첩 경로를 다시 순회합니다."""
+    mapped = map_sysmon_to_model_columns(event)
+    hostname = _get_nested_value(event, "host.name")
+    if not is_attack:
+        return mapped, hostname
+    ip = next((v for v in (_get_nested_value(event, p) for p in WINLOG_IP_CANDIDATES)
+               if isinstance(v, str) and v not in INVALID_IPS), None)
+    details = [_get_nested_value(event, p) for p in DETAIL_PATHS]
+    return mapped, hostname, ip, details
+
+
+def flat_consumers(event, is_attack):
+    """평탄화 방식: 한 번 만든 평면 뷰를 모든 소비자가 공유합니다."""
+    flat = flatten_event(event)
+    mapped = map_flat_to_model_columns(flat)
+    hostname = flat.get("host.name")
+    if not is_attack:
+        return mapped, hostname
+    ip = next((v for v in (flat.get(p) for p in WINLOG_IP_CANDIDATES)
+               if isinstance(v, str) and v not in INVALID_IPS), None)
+    details = [flat.get(p) for p in DETAIL_PATHS]
+    return mapped, hostname, ip, details
+
+
+def _measure(fn, events, attack_every):
+    flags = [attack_every > 0 and i % attack_every == 0 for i in range(len(events))]
+    for event, flag in zip(events[:1000], flags):  # 워밍업
+        fn(event, flag)
+
+    start = time.perf_counter()
+    for event, flag in zip(events, flags):
+        fn(event, flag)
+    elapsed = time.perf_counter() - start
+
+    # 결과를 보관해 배치 처리 중 유지되는 메모리(평면 뷰 포함)까지 측정
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [fn(event, flag) for event, flag in zip(events, flags)]
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    allocated = sum(s.size_diff for s in stats)
+    blocks = sum(s.count_diff for s in stats)
+    del kept
+    return {
+        "us_per_event": elapsed / len(events) * 1e6,
+        "events_per_sec": len(events) / elapsed,
+        "retained_bytes_per_event": allocated / len(events),
+        "retained_blocks_per_event": blocks / len(events),
+        "peak_bytes_per_event": peak / len(events),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--attack-ratio", type=float, default=0.1, help="IP/상세 정보 조회까지 수행할 이벤트 비율")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    events = WinlogbeatGenerator(seed=args.seed).events(args.events)
+    attack_every = round(1 / args.attack_ratio) if args.attack_ratio > 0 else 0
+
+    mismatched = sum(1 for e in events[:1000] if map_sysmon_to_model_columns(e) != map_flat_to_model_columns(flatten_event(e)))
+    results = {
+        "events": args.events,
+        "attack_ratio": args.attack_ratio,
+        "mapping_mismatches_in_first_1000": mismatched,
+        "nested": _measure(nested_consumers, events, attack_every),
+        "flat": _measure(flat_consumers, events, attack_every),
+    }
+    results["speedup"] = results["nested"]["us_per_event"] / results["flat"]["us_per_event"]
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('flatten', results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_flow_state.py
+"""
+Packetbeat flow 상태 병합 벤치마크.
+
+period 1s 로 주기적 업데이트를 보내는 flow 스트림(PacketbeatGenerator)을 FlowStateTable 에 통과시켜
+모든 업데이트를 예측할 때와 비교한 모델 호출 수, 사유별 예측 건수를 측정합니다.
+--predict 를 주면 실제 Predictor 로 두 경우의 예측 시간과 공격 행 수(중복 flow 판정 제외)도 비교합니다.
+
+    cd backend
+    python -m benchmarks.bench_flow_state --documents 50000 --active-flows 200
+    python -m benchmarks.bench_flow_state --predict
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import use_bundled_artifacts, write_results
+
+use_bundled_artifacts()
+
+from app.schemas.schemas import RawTrafficData
+from app.services.analysis_service import analysis_service
+from app.services.flow_state import FlowStateTable
+from benchmarks.generators import PacketbeatGenerator
+
+
+def _features(doc):
+    cleaned = analysis_service._sanitize_raw_packetbeat_data(doc)
+    return RawTrafficData.model_validate(analysis_service._extract_traffic_fields(cleaned))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=50000)
+    parser.add_argument("--active-flows", type=int, default=200)
+    parser.add_argument("--min-packets", type=int, default=10)
+    parser.add_argument("--min-bytes", type=int, default=10_000)
+    parser.add_argument("--rescore-growth", type=float, default=2.0)
+    parser.add_argument("--predict", action="store_true", help="Predictor 로 예측 시간과 공격 행 수까지 비교")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    docs = PacketbeatGenerator(seed=args.seed, active_flows=args.active_flows).documents(args.documents)
+    raws = [_features(doc) for doc in docs]
+    table = FlowStateTable(min_packets=args.min_packets, min_bytes=args.min_bytes, rescore_growth=args.rescore_growth)
+
+    start = time.perf_counter()
+    decisions = [
+        table.observe(doc["flow"]["id"], raw.Tot_Fwd_Pkts + raw.Tot_Bwd_Pkts,
+                      raw.TotLen_Fwd_Pkts + raw.TotLen_Bwd_Pkts, final=doc["flow"]["final"])
+        for doc, raw in zip(docs, raws)
+    ]
+    observe_elapsed = time.perf_counter() - start
+    scored_idx = [i for i, d in enumerate(decisions) if d.reason]
+
+    results = {
+        "documents": len(docs),
+        "observe_ns_per_update": observe_elapsed / len(docs) * 1e9,
+        "model_calls_all_updates": len(docs),
+        "model_calls_flow_state": len(scored_idx),
+        "model_call_reduction": 1 - len(scored_idx) / len(docs),
+        "table": table.report(),
+    }
+
+    if args.predict:
+        import pandas as pd
+        from app.ml.predictor import get_predictor
+        predictor = get_predictor()
+        frames = [analysis_service._calculate_traffic_features(raw) for raw in raws]
+        all_df = pd.concat(frames, ignore_index=True)
+
+        start = time.perf_counter()
+        all_labels = predictor.predict_traffic_threat_batch(all_df)
+        all_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        scored_labels = predictor.predict_traffic_threat_batch(all_df.iloc[scored_idx].reset_index(drop=True))
+        scored_elapsed = time.perf_counter() - start
+
+        # flow 당 같은 공격 유형은 한 번만 행을 만든다고 가정한 공격 행 수
+        last_label, attack_rows = {}, 0
+        for i, label in zip(scored_idx, scored_labels):
+            flow_id = docs[i]["flow"]["id"]
+            if label != "Benign" and last_label.get(flow_id) != label:
+                attack_rows += 1
+            last_label[flow_id] = label
+        results["predict"] = {
+            "all_updates_sec": all_elapsed,
+            "flow_state_sec": scored_elapsed,
+            "attack_rows_all_updates": int(sum(1 for label in all_labels if label != "Benign")),
+            "attack_rows_flow_state": attack_rows,
+        }
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('flow_state', results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/bench_incident.py
+"""
+인시던트 조사(IncidentService) 벤치마크.
+
+합성 Winlogbeat / Packetbeat 이벤트에 공격 시나리오 하나(explorer -> cmd -> powershell -> rundll32 프로세스 체인,
+공격자 IP 로의 C2 연결과 로그온, 해당 flow)를 섞어 인메모리 ES 대역(benchmarks/fake_es.py)에 적재한 뒤,
+시드 종류(process_guid / source_ip / hostname)별로 공격 경로, 영향도, 타임라인 분석의 지연 시간과
+ES 호출 수(composite 페이지, PIT 페이지)를 측정하고 목표 지연 시간(--target-p99-ms) 충족 여부를 보고합니다.
+주입한 프로세스 체인이 결과에 복원되는지도 함께 확인합니다.
+
+ES 대역은 쿼리를 파이썬으로 평가하므로 측정값은 서비스 측 처리 비용(쿼리 구성, 페이징 루프, 그래프 구성)과
+호출 수를 보여 주며, 실제 ES 의 검색 시간은 포함하지 않습니다.
+
+    cd backend
+    python -m benchmarks.bench_incident --events 200000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import use_bundled_artifacts, measure, write_results
+
+use_bundled_artifacts()
+
+from app.services.incident_service import IncidentService
+from src.core.config import settings
+from benchmarks.fake_es import FakeElasticsearch
+from benchmarks.generators import WinlogbeatGenerator, PacketbeatGenerator, _timestamp
+
+ATTACKER_IP = "203.0.113.66"
+VICTIM_HOST = "DESKTOP-007"
+VICTIM_IP = "192.168.0.77"
+CHAIN = [
+    ("{AAAAAAAA-0000-0000-0000-000000000001}", "C:\\Windows\\explorer.exe"),
+    ("{AAAAAAAA-0000-0000-0000-000000000002}", "C:\\Windows\\System32\\cmd.exe"),
+    ("{AAAAAAAA-0000-0000-0000-000000000003}", "C:\\Windows\\System32\\WindowsPowerShell\\v1.0\\powershell.exe"),
+    ("{AAAAAAAA-0000-0000-0000-000000000004}", "C:\\Windows\\System32\\rundll32.exe"),
+]
+
+
+def _winlog(clock: float, event_id: int, event_data: dict) -> dict:
+    channel = "Security" if event_id >= 4000 else "Microsoft-Windows-Sysmon/Operational"
+    return {
+        "@timestamp": _timestamp(clock), "log_source": "winlogbeat", "hostname": VICTIM_HOST, "user_id": "bench-user",
+        "host": {"name": VICTIM_HOST},
+        "winlog": {"channel": channel, "event_id": str(event_id), "computer_name": VICTIM_HOST, "event_data": event_data},
+    }
+
+
+def attack_scenario(clock: float) -> tuple:
+    """공격 시나리오 이벤트 (Winlogbeat 문서 목록, Packetbeat 문서 목록)"""
+    winlog = [_winlog(clock, 4624, {"IpAddress": ATTACKER_IP, "TargetUserName": "admin", "LogonType": "3"})]
+    for i in range(1, len(CHAIN)):
+        (parent_guid, parent_image), (guid, image) = CHAIN[i - 1], CHAIN[i]
+        winlog.append(_winlog(clock + i, 1, {"ProcessGuid": guid, "Image": image, "ParentProcessGuid": parent_guid,
+                                             "ParentImage": parent_image, "CommandLine": f'"{image}"'}))
+    beacon_guid, beacon_image = CHAIN[-1]
+    packet = []
+    for n in range(20):
+        winlog.append(_winlog(clock + 10 + n * 5, 3, {"ProcessGuid": beacon_guid, "Image": beacon_image, "SourceIp": VICTIM_IP,
+                                                      "DestinationIp": ATTACKER_IP, "DestinationPort": "4444"}))
+        packet.append({
+            "@timestamp": _timestamp(clock + 10 + n * 5), "log_source": "packetbeat", "user_id": "bench-user", "type": "flow",
+            "source": {"ip": VICTIM_IP, "port": 50000 + n, "bytes": 1200, "packets": 8},
+            "destination": {"ip": ATTACKER_IP, "port": 4444, "bytes": 300, "packets": 5},
+            "network": {"transport": "tcp"},
+        })
+    return winlog, packet
+
+
+def seeded_store(events: int, seed: int) -> tuple:
+    winlog = WinlogbeatGenerator(seed=seed).events(events)
+    for doc in winlog:
+        doc["log_source"] = "winlogbeat"
+    packet = PacketbeatGenerator(seed=seed, transaction_ratio=0.3).documents(events)
+    for doc in packet:
+        doc["log_source"] = "packetbeat"
+    attack_clock = events / 200 / 2  # 생성기는 초당 약 200건 -> 전체 구간의 중간
+    attack_winlog, attack_packet = attack_scenario(attack_clock)
+    es = FakeElasticsearch()
+    es.add(settings.es_index_winlogbeat, winlog + attack_winlog)
+    es.add(settings.es_index_packetbeat, packet + attack_packet)
+    return es, _timestamp(attack_clock)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000, help="Winlogbeat / Packetbeat 각각의 이벤트 수")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--window-minutes", type=int, default=30)
+    parser.add_argument("--max-events", type=int, default=5000)
+    parser.add_argument("--target-p99-ms", type=float, default=500.0, help="분석 1회 지연 시간 목표 (p99)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    es, attack_time = seeded_store(args.events, args.seed)
+    service = IncidentService(window_minutes=args.window_minutes, page_size=settings.incident_page_size,
+                              max_events=args.max_events, max_nodes=settings.incident_max_nodes)
+    seeds = {
+        "process_guid": {"process_guid": CHAIN[2][0], "time": attack_time},
+        "source_ip": {"source_ip": ATTACKER_IP, "time": attack_time},
+        "hostname": {"hostname": VICTIM_HOST, "time": attack_time},
+    }
+    operations = {
+        "path": service.trace_attack_path,
+        "impact": service.assess_impact,
+        "timeline": service.analyze_timeline,
+    }
+    loop = asyncio.new_event_loop()
+    expected_chain = [image for _, image in CHAIN]
+
+    results = {"events_per_source": args.events, "target_p99_ms": args.target_p99_ms, "runs": []}
+    for seed_name, query in seeds.items():
+        for op_name, operation in operations.items():
+            es.reset_calls()
+            output = loop.run_until_complete(operation(query, es, None))
+            calls = dict(es.calls)
+            latency = measure(lambda _: loop.run_until_complete(operation(query, es, None)), [None] * args.repeat, 1)
+            row = {"seed": seed_name, "operation": op_name, "latency": latency, "es_calls": calls,
+                   "meets_target": latency["p99_ms"] <= args.target_p99_ms}
+            if op_name == "path":
+                chains = [[step["image"] for step in chain] for chain in output["process_chains"]]
+                row.update({"nodes": len(output["nodes"]), "edges": len(output["edges"])})
+                if seed_name != "hostname":  # 호스트 시드는 호스트 전체 프로세스 트리를 반환
+                    row["chain_recovered"] = any(chain in (expected_chain, expected_chain[:3]) for chain in chains)
+            elif op_name == "impact":
+                row.update({"affected_assets": len(output["affected_assets"]), "affected_accounts": len(output["affected_accounts"])})
+            else:
+                row.update({"timeline_events": output["event_count"], "truncated": output["truncated"]})
+            results["runs"].append(row)
+    loop.close()
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('incident', results)}")
+
+
+if __name__ == "__main__":
+    main()
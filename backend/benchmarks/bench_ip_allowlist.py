@@ -0,0 +1,70 @@
+# benchmarks/bench_ip_allowlist.py
+"""
+차단 금지(allowlist) IP 대역 조회 벤치마크.
+
+임의의 IPv4/IPv6 CIDR 목록으로 IpAllowlist 를 만들고 --lookups 회(기본 100만) 조회의
+처리량(lookups/sec)을 측정합니다. 비교를 위해 ipaddress 모듈로 대역을 하나씩 검사하는
+선형 탐색의 처리량도 일부 표본(--baseline-lookups)으로 측정합니다.
+
+    cd backend
+    python -m benchmarks.bench_ip_allowlist --cidrs 1000 --lookups 1000000
+"""
+import argparse
+import ipaddress
+import json
+import random
+
+from benchmarks.common import use_bundled_artifacts, measure, write_results
+
+use_bundled_artifacts()
+
+from app.core.ip_allowlist import IpAllowlist
+
+
+def random_ip(rng: random.Random, v6_ratio: float) -> str:
+    if rng.random() < v6_ratio:
+        return str(ipaddress.IPv6Address(rng.getrandbits(128)))
+    return str(ipaddress.IPv4Address(rng.getrandbits(32)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cidrs", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=1_000_000)
+    parser.add_argument("--baseline-lookups", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--v6-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cidrs = []
+    for _ in range(args.cidrs):
+        if rng.random() < args.v6_ratio:
+            cidrs.append(f"{ipaddress.IPv6Address(rng.getrandbits(128))}/{rng.randint(32, 64)}")
+        else:
+            cidrs.append(f"{ipaddress.IPv4Address(rng.getrandbits(32))}/{rng.randint(8, 32)}")
+    allowlist = IpAllowlist(cidrs)
+
+    queries = [random_ip(rng, args.v6_ratio) for _ in range(args.lookups)]
+    batches = [queries[i:i + args.batch_size] for i in range(0, len(queries), args.batch_size)]
+    contains = allowlist.contains
+    results = {"cidrs": allowlist.entries, "trie": measure(lambda batch: [contains(ip) for ip in batch], batches, args.batch_size)}
+
+    networks = [ipaddress.ip_network(c, strict=False) for c in cidrs]
+    baseline_queries = queries[:args.baseline_lookups]
+    baseline_batches = [baseline_queries[i:i + args.batch_size] for i in range(0, len(baseline_queries), args.batch_size)]
+    linear = lambda batch: [any(ipaddress.ip_address(ip) in net for net in networks) for ip in batch]
+    results["linear_ipaddress"] = measure(linear, baseline_batches, min(args.batch_size, len(baseline_queries)), warmup=0)
+
+    # 두 방식의 판정이 같은지 확인
+    results["mismatches"] = sum(contains(ip) != any(ipaddress.ip_address(ip) in net for net in networks)
+                                for ip in baseline_queries)
+    results["memory_bytes"] = allowlist.report()["memory_bytes"]
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('ip_allowlist', results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_log_cascade.py
+"""
+Winlogbeat 2단계(Cascade) 분류 벤치마크.
+
+단일 단계(전체 모델) 예측과 Cascade 예측의 처리량(events/sec)과
+공격 재현율(전체 모델이 공격으로 판정한 로그 중 Cascade도 공격으로 판정한 비율)을 비교합니다.
+1단계 모델은 전체 모델의 판정을 소수 피처로 학습(증류)한 얕은 결정 트리입니다.
+
+    cd backend
+    python -m benchmarks.bench_log_cascade --events 20000 --thresholds 0.9 0.95 0.98 0.99
+    python -m benchmarks.bench_log_cascade --save app/ml/log/cascade_stage.joblib
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import use_bundled_artifacts, write_results
+
+use_bundled_artifacts()
+
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+from app.core.preprocessing import map_sysmon_to_model_columns, fill_and_mask_missing_features
+from app.ml.predictor import get_predictor
+from benchmarks.generators import WinlogbeatGenerator
+
+# 1단계 모델이 사용하는 소수 피처
+CASCADE_FEATURES = ["EventID", "Channel", "SourceName", "EventType", "Level", "Opcode", "RuleName", "Keywords", "SourceImage", "ProcessName"]
+
+
+def _encode(predictor, events):
+    processed = [fill_and_mask_missing_features(map_sysmon_to_model_columns(e)) for e in events]
+    return processed, predictor._encode_log_batch(processed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.9, 0.95, 0.98, 0.99])
+    parser.add_argument("--max-depth", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="학습한 1단계 모델을 저장할 joblib 경로 (LOG_CASCADE_MODEL_PATH로 사용)")
+    args = parser.parse_args()
+
+    predictor = get_predictor()
+    generator = WinlogbeatGenerator(seed=args.seed)
+    train_events = generator.events(args.events)
+    test_events = generator.events(args.events)
+
+    # 1. 전체 모델의 판정으로 1단계 모델을 증류 학습
+    _, X_train = _encode(predictor, train_events)
+    train_labels = [label for label, _ in predictor._classify_log_matrix(X_train)]
+    y_train = np.array([1 if label == "정상" else 0 for label in train_labels])
+    stage_model = DecisionTreeClassifier(max_depth=args.max_depth, random_state=args.seed)
+    stage_model.fit(X_train[CASCADE_FEATURES].fillna(0).to_numpy(), y_train)
+    stage = {"model": stage_model, "features": CASCADE_FEATURES, "benign_class": 1}
+
+    # 2. 단일 단계 기준 측정
+    processed_test, _ = _encode(predictor, test_events)
+    batches = [processed_test[i:i + args.batch_size] for i in range(0, len(processed_test), args.batch_size)]
+
+    predictor.set_log_cascade_stage(None)
+    start = time.perf_counter()
+    baseline = [r for batch in batches for r in predictor.predict_log_threat_batch(batch)]
+    baseline_elapsed = time.perf_counter() - start
+    attack_idx = {i for i, (label, _) in enumerate(baseline) if label != "정상"}
+
+    report = {
+        "events": len(processed_test), "batch_size": args.batch_size,
+        "single_stage": {"events_per_sec": len(processed_test) / baseline_elapsed, "attacks": len(attack_idx)},
+        "cascade": [],
+    }
+
+    # 3. 임계값별 Cascade 측정
+    for threshold in args.thresholds:
+        predictor.set_log_cascade_stage(stage, threshold=threshold)
+        predictor.log_cascade_stats = {"cleared": 0, "escalated": 0}
+        start = time.perf_counter()
+        cascaded = [r for batch in batches for r in predictor.predict_log_threat_batch(batch)]
+        elapsed = time.perf_counter() - start
+        detected = sum(1 for i in attack_idx if cascaded[i][0] != "정상")
+        report["cascade"].append({
+            "threshold": threshold,
+            "events_per_sec": len(processed_test) / elapsed,
+            "speedup": baseline_elapsed / elapsed,
+            "cleared_ratio": predictor.log_cascade_stats["cleared"] / len(processed_test),
+            "attack_recall": detected / len(attack_idx) if attack_idx else 1.0,
+        })
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('log_cascade', report)}")
+
+    if args.save:
+        joblib.dump(stage, args.save)
+        print(f"1단계 모델 저장 완료: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_pipeline.py
+"""
+전처리 및 Predictor 파이프라인 벤치마크.
+
+측정 대상
+- map_sysmon_to_model_columns
+- fill_and_mask_missing_features
+- Predictor.predict_log_threat_batch
+- Predictor.predict_traffic_threat_batch
+
+배치 크기(기본 1, 32, 500, 5000)별로 events/sec 와 배치 지연 시간 p50/p99 를 측정하고
+benchmarks/results/ 에 JSON 으로 저장합니다. --compare 로 이전 결과와 처리량을 비교할 수 있습니다.
+
+    cd backend
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --batch-sizes 1 32 500 --compare benchmarks/results/pipeline-<이전>.json
+"""
+import argparse
+import json
+
+from benchmarks.common import use_bundled_artifacts, measure, write_results, compare_results
+
+use_bundled_artifacts()
+
+import pandas as pd
+
+from app.core.preprocessing import map_sysmon_to_model_columns, fill_and_mask_missing_features
+from app.ml.predictor import get_predictor
+from app.schemas.schemas import RawTrafficData
+from app.services.analysis_service import analysis_service
+from benchmarks.generators import WinlogbeatGenerator, PacketbeatGenerator
+
+
+def _traffic_features(docs):
+    frames = []
+    for doc in docs:
+        cleaned = analysis_service._sanitize_raw_packetbeat_data(doc)
+        raw = RawTrafficData.model_validate(analysis_service._extract_traffic_fields(cleaned))
+        frames.append(analysis_service._calculate_traffic_features(raw))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _batches(items, batch_size, iterations):
+    batches = []
+    for i in range(iterations):
+        start = (i * batch_size) % max(1, len(items) - batch_size + 1)
+        batches.append(items[start:start + batch_size])
+    return batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 500, 5000])
+    parser.add_argument("--events", type=int, default=20000, help="배치 크기별로 처리할 최소 이벤트 수")
+    parser.add_argument("--max-iterations", type=int, default=200, help="배치 크기별 최대 반복 횟수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/pipeline-<시각>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 경로")
+    args = parser.parse_args()
+
+    predictor = get_predictor()
+    pool_size = max(args.batch_sizes) * 2
+    win_events = WinlogbeatGenerator(seed=args.seed).events(pool_size)
+    mapped = [map_sysmon_to_model_columns(e) for e in win_events]
+    processed = [fill_and_mask_missing_features(m) for m in mapped]
+    traffic_df = _traffic_features(PacketbeatGenerator(seed=args.seed).documents(pool_size))
+
+    results = {name: [] for name in ("map_sysmon_to_model_columns", "fill_and_mask_missing_features",
+                                      "predict_log_threat_batch", "predict_traffic_threat_batch")}
+    for batch_size in args.batch_sizes:
+        iterations = min(args.max_iterations, max(5, args.events // batch_size))
+        results["map_sysmon_to_model_columns"].append(measure(
+            lambda batch: [map_sysmon_to_model_columns(e) for e in batch],
+            _batches(win_events, batch_size, iterations), batch_size))
+        results["fill_and_mask_missing_features"].append(measure(
+            lambda batch: [fill_and_mask_missing_features(m) for m in batch],
+            _batches(mapped, batch_size, iterations), batch_size))
+        results["predict_log_threat_batch"].append(measure(
+            predictor.predict_log_threat_batch, _batches(processed, batch_size, iterations), batch_size))
+        traffic_batches = [traffic_df.iloc[i * batch_size % (pool_size - batch_size + 1):][:batch_size] for i in range(iterations)]
+        results["predict_traffic_threat_batch"].append(measure(
+            predictor.predict_traffic_threat_batch, traffic_batches, batch_size))
+        print(f"batch_size={batch_size} 측정 완료", flush=True)
+
+    print(json.dumps(results, indent=2))
+    path = write_results("pipeline", results, args.output)
+    print(f"결과 저장: {path}")
+    if args.compare:
+        for line in compare_results(results, args.compare):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_process_tree.py
+"""
+Sysmon 프로세스 트리(ProcessTree) 벤치마크.
+
+합성 Winlogbeat 이벤트를 평탄화한 뒤, 프로세스 생성(이벤트 1)의 ParentProcessGuid 를 최근 생성된 프로세스 중
+하나로 바꿔 실제와 비슷한 깊이의 트리를 만듭니다. 이 이벤트로 다음을 측정합니다.
+- observe 처리량(events/sec)과 트리에 유지된 프로세스당 메모리(tracemalloc)
+- chain 조회 처리량과 평균 체인 깊이, 적중률
+- 스냅샷 저장/적재 시간과 파일 크기(프로세스당 바이트)
+
+    cd backend
+    python -m benchmarks.bench_process_tree --events 500000 --max-processes 200000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import use_bundled_artifacts, measure, write_results
+
+use_bundled_artifacts()
+
+from app.core.preprocessing import flatten_event
+from app.services.process_tree import ProcessTree
+from benchmarks.generators import WinlogbeatGenerator
+
+PROCESS_GUID = "winlog.event_data.ProcessGuid"
+PARENT_GUID = "winlog.event_data.ParentProcessGuid"
+
+
+def linked_events(count: int, seed: int) -> tuple:
+    """부모-자식 관계가 이어지도록 보정한 평탄화 이벤트와 생성된 ProcessGuid 목록을 반환합니다."""
+    rng = random.Random(seed)
+    events, created = [], []
+    for doc in WinlogbeatGenerator(seed=seed).events(count):
+        flat = flatten_event(doc)
+        if flat.get(PARENT_GUID) and created:
+            # 대부분은 최근 프로세스의 자식으로, 일부는 기록되지 않은 부모(트리 시작 이전 프로세스)로 남김
+            if rng.random() < 0.9:
+                flat[PARENT_GUID] = created[-rng.randint(1, min(len(created), 50))]
+            created.append(flat[PROCESS_GUID])
+        elif flat.get(PARENT_GUID):
+            created.append(flat[PROCESS_GUID])
+        events.append(flat)
+    return events, created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--max-processes", type=int, default=200_000)
+    parser.add_argument("--max-depth", type=int, default=16)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    events, created = linked_events(args.events, args.seed)
+    batches = [events[i:i + args.batch_size] for i in range(0, len(events), args.batch_size)]
+
+    tree = ProcessTree(max_processes=args.max_processes, max_depth=args.max_depth)
+    observe = tree.observe
+    results = {"events": len(events), "process_creations": len(created),
+               "observe": measure(lambda batch: [observe(flat) for flat in batch], batches, args.batch_size, warmup=0)}
+
+    # 메모리는 별도 인스턴스로 측정 (tracemalloc 이 처리량 측정에 영향을 주지 않도록)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    measured = ProcessTree(max_processes=args.max_processes, max_depth=args.max_depth)
+    for flat in events:
+        measured.observe(flat)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    results["processes"] = len(measured)
+    results["memory_bytes"] = used
+    results["bytes_per_process"] = round(used / len(measured), 1) if len(measured) else 0.0
+
+    rng = random.Random(args.seed)
+    recent = created[-args.max_processes:]
+    queries = [rng.choice(recent) for _ in range(args.lookups)]
+    lookup_batches = [queries[i:i + args.batch_size] for i in range(0, len(queries), args.batch_size)]
+    chain = tree.chain
+    results["chain"] = measure(lambda batch: [chain(guid) for guid in batch], lookup_batches, args.batch_size)
+    depths = [len(chain(guid)) for guid in queries[:10_000]]
+    results["chain_mean_depth"] = round(sum(depths) / len(depths), 2) if depths else 0.0
+    results["chain_hit_ratio"] = round(sum(1 for depth in depths if depth) / len(depths), 4) if depths else 0.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tree.snapshot_path = os.path.join(tmp, "process_tree.bin")
+        start = time.perf_counter()
+        saved = tree.save_snapshot()
+        save_seconds = time.perf_counter() - start
+        size = os.path.getsize(tree.worker_snapshot_path)
+        restored = ProcessTree(max_processes=args.max_processes, snapshot_path=tree.snapshot_path)
+        start = time.perf_counter()
+        loaded = restored.load_snapshot()
+        load_seconds = time.perf_counter() - start
+    results["snapshot"] = {
+        "processes": saved, "loaded": loaded, "bytes": size,
+        "bytes_per_process": round(size / saved, 1) if saved else 0.0,
+        "save_seconds": round(save_seconds, 4), "load_seconds": round(load_seconds, 4),
+    }
+    results["stats"] = tree.report()
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('process_tree', results)}")
+
+
+if __name__ == "__main__":
+    main()
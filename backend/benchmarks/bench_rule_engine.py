@@ -0,0 +1,54 @@
+# benchmarks/bench_rule_engine.py
+"""
+탐지 규칙 엔진 벤치마크.
+
+합성 Winlogbeat 이벤트 배치에 대해 RuleEngine.match_batch 의 처리량(events/sec)과
+규칙 일치로 모델 예측을 건너뛰는 비율, 규칙별 일치 건수를 측정합니다.
+--predict 를 주면 같은 배치를 Predictor 로 예측하는 시간과 비교합니다.
+
+    cd backend
+    python -m benchmarks.bench_rule_engine --events 20000 --batch-size 500
+"""
+import argparse
+import json
+
+from benchmarks.common import use_bundled_artifacts, measure, write_results
+
+use_bundled_artifacts()
+
+from app.core.preprocessing import flatten_event, map_flat_to_model_columns, fill_and_mask_missing_features_batch
+from app.services.rule_engine import RuleEngine
+from src.core.config import settings
+from benchmarks.generators import WinlogbeatGenerator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--rules", default=settings.rule_engine_rules_path)
+    parser.add_argument("--predict", action="store_true", help="Predictor 예측 시간과 비교")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = RuleEngine.from_file(args.rules)
+    flats = [flatten_event(e) for e in WinlogbeatGenerator(seed=args.seed).events(args.events)]
+    batches = [flats[i:i + args.batch_size] for i in range(0, len(flats), args.batch_size)]
+
+    results = {"rules": engine.rule_count, "match_batch": measure(engine.match_batch, batches, args.batch_size)}
+    hits = [hit for batch in batches for hit in engine.match_batch(batch)]
+    results["short_circuit_ratio"] = sum(1 for hit in hits if hit) / len(hits)
+    results["hits_per_rule"] = engine.report()["hits"]
+
+    if args.predict:
+        from app.ml.predictor import get_predictor
+        predictor = get_predictor()
+        processed = [fill_and_mask_missing_features_batch([map_flat_to_model_columns(f) for f in batch]) for batch in batches]
+        results["predict_log_threat_batch"] = measure(predictor.predict_log_threat_batch, processed, args.batch_size)
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('rule_engine', results)}")
+
+
+if __name__ == "__main__":
+    main()
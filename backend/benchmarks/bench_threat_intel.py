@@ -0,0 +1,77 @@
+# benchmarks/bench_threat_intel.py
+"""
+위협 인텔리전스 차단 목록 벤치마크.
+
+수백만 개 IP + CIDR 로 이루어진 합성 피드 파일을 만들어 적재 시간, 구성 요소별 메모리,
+ThreatIntelService.lookup 의 처리량(lookups/sec)을 측정합니다. 조회 IP 는 --hit-ratio 비율만큼
+차단 목록의 IP 에서, 나머지는 임의 IP 에서 뽑습니다.
+
+    cd backend
+    python -m benchmarks.bench_threat_intel --ips 2000000 --cidrs 50000 --lookups 1000000
+"""
+import argparse
+import ipaddress
+import json
+import os
+import random
+import tempfile
+
+from benchmarks.common import use_bundled_artifacts, measure, write_results
+
+use_bundled_artifacts()
+
+from app.services.threat_intel import ThreatIntelService
+
+
+def write_feed(path: str, ips: int, cidrs: int, rng: random.Random) -> list:
+    """합성 피드 파일을 작성하고, 조회에 사용할 차단 IP 일부를 반환합니다."""
+    sample = []
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# synthetic threat intel feed\n")
+        for i in range(ips):
+            ip = str(ipaddress.IPv4Address(rng.getrandbits(32)))
+            f.write(ip + "\n")
+            if i % 100 == 0:
+                sample.append(ip)
+        for _ in range(cidrs):
+            length = rng.randint(16, 28)
+            f.write(f"{ipaddress.IPv4Address(rng.getrandbits(32))}/{length}\n")
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ips", type=int, default=2_000_000)
+    parser.add_argument("--cidrs", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--hit-ratio", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.001)
+    parser.add_argument("--no-confirm", action="store_true", help="정확한 목록 확인 없이 Bloom filter 결과만 사용")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        feed_path = os.path.join(tmp, "blocklist.txt")
+        blocked = write_feed(feed_path, args.ips, args.cidrs, rng)
+        service = ThreatIntelService([feed_path], error_rate=args.error_rate, confirm_exact=not args.no_confirm)
+        service.load()
+
+    queries = [rng.choice(blocked) if rng.random() < args.hit_ratio else str(ipaddress.IPv4Address(rng.getrandbits(32)))
+               for _ in range(args.lookups)]
+    batches = [queries[i:i + args.batch_size] for i in range(0, len(queries), args.batch_size)]
+
+    lookup = service.lookup
+    results = {"lookup": measure(lambda batch: [lookup(ip) for ip in batch], batches, args.batch_size)}
+    report = service.report()
+    results.update({key: report[key] for key in ("exact_ips", "cidr_prefixes", "load_seconds", "bloom_bits", "bloom_hashes", "memory_bytes")})
+    results["hit_ratio"] = report["hits"] / report["lookups"] if report["lookups"] else 0.0
+    results["bloom_false_positive_ratio"] = report["bloom_false_positives"] / report["lookups"] if report["lookups"] else 0.0
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('threat_intel', results)}")
+
+
+if __name__ == "__main__":
+    main()
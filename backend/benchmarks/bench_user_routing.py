@@ -0,0 +1,135 @@
+# benchmarks/bench_user_routing.py
+"""
+사용자별 routing(ES_USER_ROUTING_ENABLED) 멀티 테넌트 벤치마크.
+
+여러 사용자(테넌트)의 Packetbeat 문서를 샤드 N개짜리 인덱스에 두 가지 방식으로 배치합니다.
+- _id 기준 분산(기본): 모든 사용자의 문서가 모든 샤드에 흩어짐 -> 사용자 조회가 N개 샤드 모두에 요청
+- user_id routing: ESIndexManager.routing() 값으로 샤드를 고르므로 한 사용자의 문서가 샤드 하나에 모임
+각 샤드는 user_id -> 문서 목록(역색인의 term 조회에 해당)을 가지며, 대시보드/LLM 도구의 사용자 단위 집계
+(패킷/바이트 합계, 상위 목적지 포트)를 샤드별로 실행한 뒤 병합하는 과정을 파이썬으로 재현합니다.
+
+측정 항목
+- 질의당 샤드 요청 수와 질의 지연 시간(p50/p99, 샤드별 실행 + 병합)
+- --shard-overhead-ms(샤드 요청당 고정 비용: 스레드 풀 대기, 직렬화, 병합 등)를 적용한 예상 지연 시간과
+  검색 스레드 --search-threads 개로 처리할 수 있는 최대 질의 수(초당)
+- 사용자 크기가 Zipf 분포일 때 routing 으로 생기는 샤드 크기 편차(max / mean)
+
+ES 의 샤드 선택(murmur3)은 crc32 로 근사하며, 실제 검색 시간이 아니라 요청 수와 샤드별 처리량을 비교합니다.
+
+    cd backend
+    python -m benchmarks.bench_user_routing --tenants 500 --documents 500000 --shards 12
+"""
+import argparse
+import json
+import random
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import use_bundled_artifacts, measure, write_results
+
+use_bundled_artifacts()
+
+from app.services.es_index_manager import ESIndexManager
+from benchmarks.generators import PacketbeatGenerator
+
+
+class ShardedIndex:
+    """샤드별로 user_id -> 문서 목록을 유지하는 인덱스 모형"""
+
+    def __init__(self, shards: int):
+        self.shards: List[Dict[str, List[Dict[str, Any]]]] = [defaultdict(list) for _ in range(shards)]
+
+    def shard_for(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % len(self.shards)
+
+    def add(self, doc_id: str, routing: Optional[str], doc: Dict[str, Any]):
+        self.shards[self.shard_for(routing if routing is not None else doc_id)][doc["user_id"]].append(doc)
+
+    def shard_sizes(self) -> List[int]:
+        return [sum(len(docs) for docs in shard.values()) for shard in self.shards]
+
+    def user_summary(self, user_id: str, routing: Optional[str]) -> Dict[str, Any]:
+        """사용자 트래픽 요약 (샤드별 부분 집계 후 병합). routing 이 있으면 해당 샤드만 검색합니다."""
+        targets = [self.shards[self.shard_for(routing)]] if routing is not None else self.shards
+        packets, total_bytes, ports = 0, 0, Counter()
+        for shard in targets:
+            for doc in shard.get(user_id, ()):
+                source, destination = doc["source"], doc["destination"]
+                packets += source.get("packets", 0) + destination.get("packets", 0)
+                total_bytes += source.get("bytes", 0) + destination.get("bytes", 0)
+                ports[destination.get("port")] += 1
+        return {"shard_requests": len(targets), "packets": packets, "bytes": total_bytes, "top_ports": sorted(ports.items(), key=lambda item: (-item[1], str(item[0])))[:10]}
+
+
+def tenant_documents(tenants: int, documents: int, zipf: float, seed: int) -> List[tuple]:
+    """Zipf 분포 크기의 테넌트 문서 (doc_id, user_id, 문서) 목록"""
+    rng = random.Random(seed)
+    users = [f"tenant-{i:05d}" for i in range(tenants)]
+    weights = [1 / (rank + 1) ** zipf for rank in range(tenants)]
+    generator = PacketbeatGenerator(seed=seed)
+    rows = []
+    for user_id in rng.choices(users, weights=weights, k=documents):
+        doc = generator.document()
+        doc["user_id"] = user_id
+        rows.append(("%032x" % rng.getrandbits(128), user_id, doc))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=500)
+    parser.add_argument("--documents", type=int, default=500_000)
+    parser.add_argument("--shards", type=int, default=12)
+    parser.add_argument("--zipf", type=float, default=1.0, help="테넌트 크기 분포의 Zipf 지수 (0 이면 균등)")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--shard-overhead-ms", type=float, default=2.0, help="샤드 요청당 고정 비용 가정(ms)")
+    parser.add_argument("--search-threads", type=int, default=13, help="클러스터 검색 스레드 수 가정")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = tenant_documents(args.tenants, args.documents, args.zipf, args.seed)
+    rng = random.Random(args.seed)
+    users = sorted({user_id for _, user_id, _ in rows})
+    queries = [rng.choice(users) for _ in range(args.queries)]  # 테넌트마다 같은 빈도로 대시보드 조회
+    batches = [queries[i:i + args.batch_size] for i in range(0, len(queries), args.batch_size)]
+
+    results = {"tenants": len(users), "documents": len(rows), "shards": args.shards, "zipf": args.zipf,
+               "shard_overhead_ms": args.shard_overhead_ms, "search_threads": args.search_threads, "modes": {}}
+    summaries = {}
+    for mode, user_routing in (("id_hash", False), ("user_routing", True)):
+        manager = ESIndexManager(user_routing=user_routing)
+        index = ShardedIndex(args.shards)
+        for doc_id, user_id, doc in rows:
+            index.add(doc_id, manager.routing(user_id), doc)
+
+        query = lambda batch: [index.user_summary(user_id, manager.search_routing(user_id)) for user_id in batch]
+        latency = measure(query, batches, args.batch_size)
+        summaries[mode] = {user_id: index.user_summary(user_id, manager.search_routing(user_id)) for user_id in users}
+        shard_requests = sum(s["shard_requests"] for s in summaries[mode].values()) / len(users)
+        sizes = index.shard_sizes()
+        per_query_ms = latency["mean_ms"] / args.batch_size
+        results["modes"][mode] = {
+            "query": latency,
+            "shard_requests_per_query": shard_requests,
+            "estimated_query_ms": round(per_query_ms + shard_requests * args.shard_overhead_ms, 3),
+            "max_queries_per_sec": round(args.search_threads * 1000 / (shard_requests * args.shard_overhead_ms + per_query_ms), 1),
+            "shard_docs_max": max(sizes),
+            "shard_docs_min": min(sizes),
+            "shard_skew": round(max(sizes) / (sum(sizes) / len(sizes)), 3),
+        }
+
+    # routing 여부와 관계없이 사용자별 집계 결과가 같아야 함
+    strip = lambda summary: {key: value for key, value in summary.items() if key != "shard_requests"}
+    results["results_match"] = all(strip(summaries["id_hash"][u]) == strip(summaries["user_routing"][u]) for u in users)
+    base, routed = results["modes"]["id_hash"], results["modes"]["user_routing"]
+    results["shard_request_reduction"] = round(base["shard_requests_per_query"] / routed["shard_requests_per_query"], 2)
+    results["estimated_speedup"] = round(base["estimated_query_ms"] / routed["estimated_query_ms"], 2)
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"결과 저장: {write_results('user_routing', results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/common.py
+"""
+벤치마크 공통 유틸리티.
+
+- use_bundled_artifacts(): ml_training/model 의 번들 아티팩트를 사용하도록 환경 변수를 설정합니다.
+  (src.core.config.settings 가 import 되기 전에 호출해야 합니다.)
+- measure(): 배치 단위 호출 시간을 측정해 events/sec, p50/p99 지연 시간을 계산합니다.
+- write_results() / compare_results(): 실행 간 회귀 비교를 위한 JSON 결과 저장 및 비교.
+"""
+import os
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "ml_training", "model")
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+
+def use_bundled_artifacts():
+    """번들된 학습 결과물(ml_training/model)로 모델 경로를 덮어씁니다."""
+    os.environ.update({
+        "LOG_COLUMNS_PATH": os.path.join(MODEL_DIR, "log", "columns.json"),
+        "LOG_MODEL_PATH": os.path.join(MODEL_DIR, "log", "best_multiclass_model.joblib"),
+        "LOG_SCALER_PATH": os.path.join(MODEL_DIR, "log", "scaler.joblib"),
+        "TRAFFIC_MODEL_PATH": os.path.join(MODEL_DIR, "traffic", "traffic_model.joblib"),
+        "TRAFFIC_IMPUTER_PATH": os.path.join(MODEL_DIR, "traffic", "imputer.joblib"),
+        "TRAFFIC_SCALER_PATH": os.path.join(MODEL_DIR, "traffic", "scaler.joblib"),
+        "TRAFFIC_ENCODER_PATH": os.path.join(MODEL_DIR, "traffic", "label_encoder.joblib"),
+        "LOG_CASCADE_ENABLED": "false",
+        "INFERENCE_SERVER_ENABLED": "false",
+    })
+    os.chdir(BACKEND_DIR)  # .env 파일을 찾을 수 있도록 backend 디렉터리에서 실행
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def measure(fn: Callable[[Any], Any], batches: List[Any], batch_size: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    batches 의 각 배치에 대해 fn 을 호출하고 처리량과 배치 지연 시간을 측정합니다.
+    """
+    for batch in batches[:warmup]:
+        fn(batch)
+    latencies = []
+    for batch in batches:
+        start = time.perf_counter()
+        fn(batch)
+        latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+    events = batch_size * len(batches)
+    return {
+        "batch_size": batch_size,
+        "batches": len(batches),
+        "events_per_sec": events / total if total else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(name: str, results: Dict[str, Any], path: Optional[str] = None) -> str:
+    """결과를 메타데이터와 함께 JSON 파일로 저장하고 경로를 반환합니다."""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = os.path.join(RESULTS_DIR, f"{name}-{stamp}.json")
+    document = {
+        "benchmark": name,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def compare_results(current: Dict[str, Any], baseline_path: str, key: str = "events_per_sec") -> List[str]:
+    """
+    이전 실행 결과(JSON)와 비교하여 항목별 처리량 변화율을 문자열 목록으로 반환합니다.
+    results 는 {측정 대상: [measure() 결과, ...]} 형태여야 합니다.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    lines = []
+    for target, rows in current.items():
+        previous = {row["batch_size"]: row for row in baseline.get(target, [])}
+        for row in rows:
+            before = previous.get(row["batch_size"])
+            if not before or not before.get(key):
+                continue
+            change = (row[key] - before[key]) / before[key] * 100
+            lines.append(f"{target} (batch={row['batch_size']}): {before[key]:.1f} -> {row[key]:.1f} {key} ({change:+.1f}%)")
+    return lines
@@ -0,0 +1,211 @@
+# benchmarks/fake_es.py
+"""
+벤치마크용 인메모리 Elasticsearch 대역 (AsyncElasticsearch 인터페이스 일부).
+
+실행 중인 ES 없이 조회 로직(쿼리 구성, composite 페이징, PIT + search_after 루프, 결과 가공)의 비용과
+호출 횟수를 재현 가능하게 측정하기 위한 것으로, 서비스 코드가 사용하는 기능만 구현합니다.
+- 쿼리: bool(filter / should + minimum_should_match / must_not), term, terms, range, exists, match_all
+- 집계: composite(terms 소스, missing_bucket, after) + 하위 min / max / sum
+- 검색: open_point_in_time / close_point_in_time, sort + search_after, size
+
+문서는 add(base, docs) 로 기본 인덱스 이름별로 적재하며, index 인자의 각 이름이 `<base>` 또는 `<base>-...` 이면
+해당 문서 집합을 대상으로 합니다. 같은 쿼리의 필터 결과는 캐시합니다. (ES 의 필터 캐시와 유사)
+"""
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def get_field(doc: Dict[str, Any], path: str) -> Any:
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _epoch_ms(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp() * 1000
+
+
+def _ms_to_string(value: float) -> str:
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    # missing(None) 이 가장 앞, 숫자는 숫자 순서, 나머지는 문자열 순서
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (1, value)
+    return (2, str(value))
+
+
+class FakeElasticsearch:
+    def __init__(self):
+        self.corpora: Dict[str, List[Dict[str, Any]]] = {}
+        self._timestamps: Dict[int, float] = {}
+        self._positions: Dict[int, int] = {}  # 전체 문서의 적재 순번 (정렬 tiebreaker, _shard_doc 역할)
+        self._filter_cache: Dict[str, List[Tuple[float, int, Dict[str, Any]]]] = {}
+        self._group_cache: Dict[str, Tuple[Dict[tuple, List[Dict[str, Any]]], List[tuple]]] = {}
+        self._pits: Dict[str, Tuple[str, int]] = {}
+        self.calls = {"search": 0, "composite_pages": 0, "pit_pages": 0, "open_point_in_time": 0, "close_point_in_time": 0}
+
+    def add(self, base: str, docs: List[Dict[str, Any]]):
+        self.corpora.setdefault(base, []).extend(docs)
+        for doc in docs:
+            self._timestamps[id(doc)] = _epoch_ms(doc.get("@timestamp"))
+            self._positions[id(doc)] = len(self._positions)
+        self._filter_cache.clear()
+        self._group_cache.clear()
+
+    def reset_calls(self):
+        self.calls = {key: 0 for key in self.calls}
+
+    # --- 쿼리 평가 ---
+    def _matches(self, doc: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+        if not query:
+            return True
+        kind, body = next(iter(query.items()))
+        if kind == "match_all":
+            return True
+        if kind == "bool":
+            if not all(self._matches(doc, q) for q in body.get("filter", []) + body.get("must", [])):
+                return False
+            if any(self._matches(doc, q) for q in body.get("must_not", [])):
+                return False
+            should = body.get("should", [])
+            required = body.get("minimum_should_match", 0 if body.get("filter") or body.get("must") else 1)
+            return not should or sum(1 for q in should if self._matches(doc, q)) >= int(required)
+        field, condition = next(iter(body.items()))
+        value = get_field(doc, field)
+        if kind == "term":
+            expected = condition.get("value") if isinstance(condition, dict) else condition
+            return value is not None and str(value) == str(expected)
+        if kind == "terms":
+            return value is not None and str(value) in {str(v) for v in condition}
+        if kind == "exists":
+            return get_field(doc, body["field"]) is not None
+        if kind == "range":
+            if value is None:
+                return False
+            current = self._timestamps.get(id(doc)) if field == "@timestamp" else value
+            for op, bound in condition.items():
+                bound = _epoch_ms(bound) if field == "@timestamp" else bound
+                if (op == "gte" and current < bound) or (op == "gt" and current <= bound) \
+                        or (op == "lte" and current > bound) or (op == "lt" and current >= bound):
+                    return False
+            return True
+        raise NotImplementedError(f"FakeElasticsearch: 지원하지 않는 쿼리 {kind}")
+
+    def _docs(self, index: str, query: Optional[Dict[str, Any]]) -> Tuple[List[Tuple[float, int, Dict[str, Any]]], str]:
+        names = [name.strip() for name in index.split(",") if name.strip()]
+        bases = [base for base in self.corpora if any(name == base or name.startswith(base + "-") for name in names)]
+        cache_key = json.dumps([sorted(bases), query], sort_keys=True, default=str)
+        cached = self._filter_cache.get(cache_key)
+        if cached is None:
+            cached = [(self._timestamps[id(doc)] or 0.0, self._positions[id(doc)], doc)
+                      for base in sorted(bases) for doc in self.corpora[base] if self._matches(doc, query)]
+            cached.sort(key=lambda item: (item[0], item[1]))
+            self._filter_cache[cache_key] = cached
+        return cached, cache_key
+
+    # --- 집계 ---
+    def _metric(self, docs: List[Dict[str, Any]], spec: Dict[str, Any]) -> Dict[str, Any]:
+        kind, body = next(iter(spec.items()))
+        field = body["field"]
+        values = [self._timestamps[id(doc)] if field == "@timestamp" else get_field(doc, field) for doc in docs]
+        values = [v for v in values if isinstance(v, (int, float))]
+        if kind == "sum":
+            return {"value": float(sum(values))}
+        value = (min if kind == "min" else max)(values) if values else None
+        result = {"value": value}
+        if value is not None and field == "@timestamp":
+            result["value_as_string"] = _ms_to_string(value)
+        return result
+
+    def _composite(self, cache_key: str, docs: List[Dict[str, Any]], spec: Dict[str, Any]) -> Dict[str, Any]:
+        composite, sub_aggs = spec["composite"], spec.get("aggs", {})
+        sources = [(name, source["terms"]["field"], source["terms"].get("missing_bucket", False))
+                   for item in composite["sources"] for name, source in item.items()]
+        # 페이지(after)마다 다시 그룹화하지 않도록 그룹 결과를 캐시
+        group_key = cache_key + json.dumps(composite["sources"], sort_keys=True)
+        cached = self._group_cache.get(group_key)
+        if cached is None:
+            groups: Dict[tuple, List[Dict[str, Any]]] = {}
+            for doc in docs:
+                key = tuple(get_field(doc, field) for _, field, _ in sources)
+                if any(v is None and not missing for v, (_, _, missing) in zip(key, sources)):
+                    continue
+                groups.setdefault(key, []).append(doc)
+            cached = self._group_cache[group_key] = (groups, sorted(groups, key=lambda key: tuple(_sort_key(v) for v in key)))
+        groups, ordered = cached
+        after = composite.get("after")
+        if after:
+            after_key = tuple(_sort_key(after.get(name)) for name, _, _ in sources)
+            ordered = [key for key in ordered if tuple(_sort_key(v) for v in key) > after_key]
+        page = ordered[:composite.get("size", 10)]
+        buckets = []
+        for key in page:
+            bucket = {"key": {name: value for (name, _, _), value in zip(sources, key)}, "doc_count": len(groups[key])}
+            for name, metric in sub_aggs.items():
+                bucket[name] = self._metric(groups[key], metric)
+            buckets.append(bucket)
+        result = {"buckets": buckets}
+        if buckets:
+            result["after_key"] = buckets[-1]["key"]
+        return result
+
+    # --- AsyncElasticsearch 인터페이스 ---
+    async def open_point_in_time(self, index: str, keep_alive: str = "1m", **kwargs) -> Dict[str, Any]:
+        self.calls["open_point_in_time"] += 1
+        pit_id = f"pit-{self.calls['open_point_in_time']}"
+        self._pits[pit_id] = (index, 0)
+        return {"id": pit_id}
+
+    async def close_point_in_time(self, id: str, **kwargs) -> Dict[str, Any]:
+        self.calls["close_point_in_time"] += 1
+        self._pits.pop(id, None)
+        return {"succeeded": True}
+
+    async def search(self, index: Optional[str] = None, query: Optional[Dict[str, Any]] = None, size: int = 10,
+                     aggs: Optional[Dict[str, Any]] = None, pit: Optional[Dict[str, Any]] = None,
+                     search_after: Optional[List[Any]] = None, source: Any = True, **kwargs) -> Dict[str, Any]:
+        self.calls["search"] += 1
+        if pit is not None:
+            index = self._pits[pit["id"]][0]
+            self.calls["pit_pages"] += 1
+        matched, cache_key = self._docs(index, query)
+        response: Dict[str, Any] = {"hits": {"hits": []}}
+        if pit is not None:
+            response["pit_id"] = pit["id"]
+        if aggs:
+            docs = [doc for _, _, doc in matched]
+            response["aggregations"] = {}
+            for name, spec in aggs.items():
+                self.calls["composite_pages"] += 1
+                response["aggregations"][name] = self._composite(cache_key, docs, spec)
+        if size:
+            start = 0
+            if search_after is not None:
+                after = (float(search_after[0]), int(search_after[1]))
+                # (timestamp, position) 정렬 목록에서 search_after 다음 위치를 이진 탐색
+                lo, hi = 0, len(matched)
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if (matched[mid][0], matched[mid][1]) <= after:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                start = lo
+            response["hits"]["hits"] = [
+                {"_index": index.split(",")[0], "_id": str(position), "_source": doc, "sort": [timestamp, position]}
+                for timestamp, position, doc in matched[start:start + size]
+            ]
+        return response
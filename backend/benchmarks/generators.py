@@ -0,0 +1,229 @@
+# benchmarks/generators.py
+"""
+시드 고정 합성 이벤트 생성기.
+
+에이전트(winlogbeat.yml / packetbeat.yml)가 Kafka로 보내는 원본 문서와 같은 ECS 구조를 흉내 냅니다.
+- WinlogbeatGenerator: Sysmon / Security / System 채널 이벤트
+- PacketbeatGenerator: 주기적 업데이트(period 1s)와 종료(final) 이벤트를 포함한 flow 문서,
+  그리고 선택적으로 http / tls / dns 트랜잭션 문서
+"""
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+_BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+_HOSTS = [f"DESKTOP-{i:03d}" for i in range(1, 33)]
+_USERS = ["SYSTEM", "LOCAL SERVICE", "NETWORK SERVICE", "admin", "kim", "lee", "park"]
+_IMAGES = [
+    "C:\\Windows\\System32\\svchost.exe", "C:\\Windows\\explorer.exe", "C:\\Windows\\System32\\cmd.exe",
+    "C:\\Windows\\System32\\WindowsPowerShell\\v1.0\\powershell.exe", "C:\\Windows\\System32\\schtasks.exe",
+    "C:\\Windows\\Microsoft.NET\\Framework64\\v4.0.30319\\MSBuild.exe", "C:\\Windows\\System32\\wsmprovhost.exe",
+    "C:\\Windows\\System32\\wbem\\WmiPrvSE.exe", "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
+]
+_INTERNAL_NET = "192.168.0."
+_EXTERNAL_IPS = ["8.8.8.8", "1.1.1.1", "142.250.206.46", "20.190.160.1", "104.16.132.229", "45.33.32.156"]
+
+
+def _guid(rng: random.Random) -> str:
+    return "{" + str(uuid.UUID(int=rng.getrandbits(128))).upper() + "}"
+
+
+def _timestamp(offset_seconds: float) -> str:
+    return (_BASE_TIME + timedelta(seconds=offset_seconds)).isoformat().replace("+00:00", "Z")
+
+
+class WinlogbeatGenerator:
+    """Winlogbeat 원본 이벤트 생성기. (Sysmon 60%, Security 30%, System 10%)"""
+
+    SYSMON_EVENTS = [1, 3, 5, 7, 10, 11, 12, 13, 22]
+    SECURITY_EVENTS = [4624, 4625, 4634, 4672, 4688, 4698, 4720, 4776]
+    SYSTEM_EVENTS = [7036, 7040, 7045]
+
+    def __init__(self, seed: int = 42, user_id: str = "bench-user"):
+        self.rng = random.Random(seed)
+        self.user_id = user_id
+        self.record_id = 1000
+        self.clock = 0.0
+
+    def _common(self, channel: str, provider: str, event_id: int, keywords: List[str]) -> Dict[str, Any]:
+        rng = self.rng
+        self.record_id += 1
+        self.clock += rng.expovariate(200)
+        host = rng.choice(_HOSTS)
+        return {
+            "@timestamp": _timestamp(self.clock),
+            "agent": {"type": "winlogbeat", "version": "8.10.2", "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                      "ephemeral_id": str(uuid.UUID(int=rng.getrandbits(128))), "name": host},
+            "ecs": {"version": "8.0.0"},
+            "host": {"name": host, "hostname": host, "ip": [f"{_INTERNAL_NET}{rng.randint(2, 254)}"],
+                     "os": {"family": "windows", "name": "Windows 10 Pro", "build": "19045.3570"}},
+            "log": {"level": rng.choice(["information", "정보", "warning"])},
+            "event": {"code": str(event_id), "kind": "event", "provider": provider, "created": _timestamp(self.clock + 0.2)},
+            "message": f"Event {event_id} generated by {provider}. " + "detail " * rng.randint(5, 40),
+            "winlog": {
+                "channel": channel, "provider_name": provider, "event_id": str(event_id),
+                "computer_name": host, "record_id": self.record_id, "api": "wineventlog",
+                "opcode": rng.choice(["Info", "정보"]), "version": rng.randint(0, 5),
+                "keywords": keywords, "activity_id": _guid(rng) if rng.random() < 0.3 else None,
+                "process": {"pid": rng.randint(4, 9000), "thread": {"id": rng.randint(4, 9000)}},
+                "user": {"identifier": "S-1-5-18", "domain": "NT AUTHORITY", "name": "SYSTEM", "type": "User"},
+                "event_data": {},
+            },
+            "user_id": self.user_id,
+            "event_source": "winlogbeat",
+        }
+
+    def _sysmon(self) -> Dict[str, Any]:
+        rng = self.rng
+        event_id = rng.choice(self.SYSMON_EVENTS)
+        doc = self._common("Microsoft-Windows-Sysmon/Operational", "Microsoft-Windows-Sysmon", event_id, [])
+        image = rng.choice(_IMAGES)
+        data = {
+            "RuleName": rng.choice(["-", "technique_id=T1059,technique_name=Command-Line Interface", ""]),
+            "UtcTime": doc["@timestamp"], "ProcessGuid": _guid(rng), "ProcessId": str(rng.randint(4, 9000)),
+            "Image": image, "User": f"DESKTOP\\{rng.choice(_USERS)}",
+        }
+        if event_id == 1:
+            data.update({"CommandLine": f'"{image}" /c whoami', "ParentProcessGuid": _guid(rng),
+                         "ParentImage": rng.choice(_IMAGES), "IntegrityLevel": "High", "Hashes": "SHA256=" + "%064x" % rng.getrandbits(256)})
+        elif event_id == 3:
+            data.update({"Protocol": "tcp", "SourceIp": f"{_INTERNAL_NET}{rng.randint(2, 254)}", "SourcePort": str(rng.randint(1024, 65535)),
+                         "DestinationIp": rng.choice(_EXTERNAL_IPS), "DestinationPort": str(rng.choice([80, 443, 445, 3389, 5985, 135]))})
+        elif event_id == 10:
+            data.update({"SourceProcessGUID": _guid(rng), "SourceProcessId": str(rng.randint(4, 9000)), "SourceThreadId": str(rng.randint(4, 9000)),
+                         "SourceImage": image, "TargetImage": "C:\\Windows\\System32\\lsass.exe", "GrantedAccess": "0x1010"})
+        elif event_id in (12, 13):
+            data.update({"EventType": rng.choice(["SetValue", "CreateKey"]), "TargetObject": "HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Run\\x"})
+        doc["winlog"]["event_data"] = data
+        return doc
+
+    def _security(self) -> Dict[str, Any]:
+        rng = self.rng
+        event_id = rng.choice(self.SECURITY_EVENTS)
+        keywords = ["Audit Failure"] if event_id == 4625 else ["Audit Success"]
+        doc = self._common("Security", "Microsoft-Windows-Security-Auditing", event_id, keywords)
+        doc["winlog"]["event_data"] = {
+            "SubjectUserSid": "S-1-5-18", "SubjectUserName": rng.choice(_USERS), "SubjectDomainName": "WORKGROUP",
+            "SubjectLogonId": hex(rng.getrandbits(20)), "TargetUserSid": f"S-1-5-21-{rng.getrandbits(30)}-1001",
+            "TargetUserName": rng.choice(_USERS), "LogonType": str(rng.choice([2, 3, 5, 10])),
+            "IpAddress": rng.choice(["-", "::1", f"{_INTERNAL_NET}{rng.randint(2, 254)}", rng.choice(_EXTERNAL_IPS)]),
+            "IpPort": str(rng.randint(0, 65535)), "TargetProcessName": rng.choice(_IMAGES),
+        }
+        return doc
+
+    def _system(self) -> Dict[str, Any]:
+        rng = self.rng
+        event_id = rng.choice(self.SYSTEM_EVENTS)
+        doc = self._common("System", "Service Control Manager", event_id, ["Classic"])
+        doc["winlog"]["event_data"] = {"param1": rng.choice(["Windows Update", "Print Spooler", "PSEXESVC"]), "param2": "running"}
+        return doc
+
+    def event(self) -> Dict[str, Any]:
+        roll = self.rng.random()
+        if roll < 0.6:
+            return self._sysmon()
+        if roll < 0.9:
+            return self._security()
+        return self._system()
+
+    def events(self, count: int) -> List[Dict[str, Any]]:
+        return [self.event() for _ in range(count)]
+
+
+class PacketbeatGenerator:
+    """
+    Packetbeat 원본 문서 생성기.
+    long-lived 연결은 period(1초)마다 누적 카운터를 담은 flow 업데이트를 보내고, timeout 시 final 이벤트를 보냅니다.
+    """
+
+    def __init__(self, seed: int = 42, user_id: str = "bench-user", active_flows: int = 200,
+                 transaction_ratio: float = 0.0):
+        self.rng = random.Random(seed)
+        self.user_id = user_id
+        self.active_flows = active_flows
+        self.transaction_ratio = transaction_ratio
+        self.clock = 0.0
+        self._flows: List[Dict[str, Any]] = []
+
+    def _new_flow(self) -> Dict[str, Any]:
+        rng = self.rng
+        transport = rng.choice(["tcp", "tcp", "tcp", "udp"])
+        return {
+            "id": "%024x" % rng.getrandbits(96), "start": self.clock, "transport": transport,
+            "src_ip": f"{_INTERNAL_NET}{rng.randint(2, 254)}", "src_port": rng.randint(1024, 65535),
+            "dst_ip": rng.choice(_EXTERNAL_IPS + [f"{_INTERNAL_NET}1"]),
+            "dst_port": rng.choice([53, 80, 443, 445, 3389, 8080]) if transport == "tcp" else rng.choice([53, 123, 137]),
+            "src_packets": 0, "src_bytes": 0, "dst_packets": 0, "dst_bytes": 0,
+            "lifetime": rng.expovariate(1 / 8.0),
+        }
+
+    def _flow_doc(self, flow: Dict[str, Any], final: bool) -> Dict[str, Any]:
+        duration_ns = int((self.clock - flow["start"]) * 1_000_000_000)
+        return {
+            "@timestamp": _timestamp(self.clock),
+            "type": "flow",
+            "agent": {"type": "packetbeat", "version": "8.10.2", "name": "DESKTOP-001"},
+            "ecs": {"version": "8.0.0"},
+            "event": {"kind": "event", "category": ["network"], "type": ["connection"], "action": "network_flow",
+                      "dataset": "flow", "start": _timestamp(flow["start"]), "end": _timestamp(self.clock), "duration": duration_ns},
+            "flow": {"id": flow["id"], "final": final},
+            "source": {"ip": flow["src_ip"], "port": flow["src_port"], "packets": flow["src_packets"], "bytes": flow["src_bytes"]},
+            "destination": {"ip": flow["dst_ip"], "port": flow["dst_port"], "packets": flow["dst_packets"], "bytes": flow["dst_bytes"]},
+            "network": {"type": "ipv4", "transport": flow["transport"], "community_id": "1:" + flow["id"][:20]},
+            "host": {"name": "DESKTOP-001"},
+            "user_id": self.user_id,
+            "event_source": "packetbeat",
+        }
+
+    def _transaction_doc(self) -> Dict[str, Any]:
+        rng = self.rng
+        kind = rng.choice(["http", "tls", "dns"])
+        doc = {
+            "@timestamp": _timestamp(self.clock), "type": kind,
+            "event": {"kind": "event", "category": ["network"], "dataset": kind, "duration": rng.randint(10**5, 10**8)},
+            "source": {"ip": f"{_INTERNAL_NET}{rng.randint(2, 254)}", "port": rng.randint(1024, 65535), "bytes": rng.randint(60, 2000)},
+            "destination": {"ip": rng.choice(_EXTERNAL_IPS), "port": {"http": 80, "tls": 443, "dns": 53}[kind], "bytes": rng.randint(60, 50000)},
+            "network": {"type": "ipv4", "transport": "udp" if kind == "dns" else "tcp", "protocol": kind},
+            "status": "OK", "user_id": self.user_id, "event_source": "packetbeat",
+        }
+        if kind == "http":
+            doc["http"] = {"request": {"method": "GET"}, "response": {"status_code": 200}}
+            doc["url"] = {"full": "http://example.com/index.html"}
+        elif kind == "dns":
+            doc["dns"] = {"question": {"name": "example.com", "type": "A"}, "response_code": "NOERROR"}
+        else:
+            doc["tls"] = {"version": "1.3", "server": {"subject": "CN=example.com"}}
+        return doc
+
+    def document(self) -> Dict[str, Any]:
+        rng = self.rng
+        self.clock += rng.expovariate(self.active_flows)
+        if self.transaction_ratio and rng.random() < self.transaction_ratio:
+            return self._transaction_doc()
+
+        while len(self._flows) < self.active_flows:
+            self._flows.append(self._new_flow())
+        index = rng.randrange(len(self._flows))
+        flow = self._flows[index]
+        sent = rng.randint(0, 40)
+        flow["src_packets"] += sent
+        flow["src_bytes"] += sent * rng.randint(60, 1500)
+        received = rng.randint(0, 60)
+        flow["dst_packets"] += received
+        flow["dst_bytes"] += received * rng.randint(60, 1500)
+
+        final = self.clock - flow["start"] >= flow["lifetime"]
+        if final:
+            self._flows.pop(index)
+        return self._flow_doc(flow, final)
+
+    def documents(self, count: int) -> List[Dict[str, Any]]:
+        return [self.document() for _ in range(count)]
+
+    def stream(self, count: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        produced = 0
+        while count is None or produced < count:
+            yield self.document()
+            produced += 1
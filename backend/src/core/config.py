@@ -15,6 +15,44 @@ class Settings(BaseSettings):
     es_index_winlogbeat: str = Field(alias="ES_INDEX_WINLOGBEAT")
     es_index_packetbeat: str = Field(alias="ES_INDEX_PACKETBEAT")
     elasticsearch_request_timeout: int = Field(alias="ELASTICSEARCH_REQUEST_TIMEOUT", default=15)
+    es_connections_per_node: int = Field(alias="ES_CONNECTIONS_PER_NODE", default=32)  # 공유 연결 풀의 노드당 최대 연결 수
+    es_http_compress: bool = Field(alias="ES_HTTP_COMPRESS", default=True)  # 요청/응답 gzip 압축
+    es_dashboard_timeout: float = Field(alias="ES_DASHBOARD_TIMEOUT", default=5.0)  # 대시보드/사용자 API 조회 timeout(초)
+    es_llm_timeout: float = Field(alias="ES_LLM_TIMEOUT", default=60.0)  # LLM 에이전트 도구 조회 timeout(초)
+    es_incident_timeout: float = Field(alias="ES_INCIDENT_TIMEOUT", default=60.0)  # 인시던트 분석 조회 timeout(초)
+    es_index_rollover_enabled: bool = Field(alias="ES_INDEX_ROLLOVER_ENABLED", default=True)  # True면 <인덱스>-YYYY.MM.DD 일 단위 인덱스에 저장
+    es_index_retention_days: int = Field(alias="ES_INDEX_RETENTION_DAYS", default=30)  # ILM delete 단계까지의 보존 기간(일)
+    # 색인 전 _source 프로젝션 (필드 목록은 쉼표로 구분한 점(.) 경로, 비워 두면 es_projection 의 기본 목록)
+    es_source_projection_enabled: bool = Field(alias="ES_SOURCE_PROJECTION_ENABLED", default=True)
+    es_source_drop_fields: str = Field(alias="ES_SOURCE_DROP_FIELDS", default="")  # 항상 제거할 beat 메타데이터
+    es_raw_index_enabled: bool = Field(alias="ES_RAW_INDEX_ENABLED", default=False)  # True면 원본 이벤트를 <인덱스>-raw-YYYY.MM.DD 에 압축 보관
+    es_raw_only_fields: str = Field(alias="ES_RAW_ONLY_FIELDS", default="")  # 원본 보관 시 hot 인덱스에서 제거할 대용량 필드
+    es_raw_index_retention_days: int = Field(alias="ES_RAW_INDEX_RETENTION_DAYS", default=90)
+    # 사용자별 routing (user_id 를 routing 값으로 색인해 사용자 조회가 샤드 하나만 검색)
+    es_user_routing_enabled: bool = Field(alias="ES_USER_ROUTING_ENABLED", default=False)
+    es_user_routing_since: str = Field(alias="ES_USER_ROUTING_SINCE", default="")  # YYYY-MM-DD, 이 날짜 이전 구간은 routing 없이 조회 (재색인 후 비움)
+    # 원본 이벤트 NDJSON 내보내기 (PIT + search_after)
+    es_export_pit_keep_alive: str = Field(alias="ES_EXPORT_PIT_KEEP_ALIVE", default="2m")  # 페이지 사이 PIT 유지 시간
+    es_export_page_size: int = Field(alias="ES_EXPORT_PAGE_SIZE", default=1000)
+
+    # Elasticsearch bulk 색인 (대시보드 조회용 클라이언트와 별도의 timeout/재시도 설정)
+    es_writer_concurrency: int = Field(alias="ES_WRITER_CONCURRENCY", default=4)  # 동시에 전송할 bulk 요청 수
+    es_writer_chunk_docs: int = Field(alias="ES_WRITER_CHUNK_DOCS", default=500)
+    es_writer_chunk_bytes: int = Field(alias="ES_WRITER_CHUNK_BYTES", default=5 * 1024 * 1024)
+    es_writer_max_retries: int = Field(alias="ES_WRITER_MAX_RETRIES", default=3)  # 429/503 으로 거절된 문서 재시도 횟수
+    es_writer_initial_backoff: float = Field(alias="ES_WRITER_INITIAL_BACKOFF", default=0.2)
+    es_writer_max_backoff: float = Field(alias="ES_WRITER_MAX_BACKOFF", default=5.0)
+    es_writer_request_timeout: float = Field(alias="ES_WRITER_REQUEST_TIMEOUT", default=30.0)
+
+    # ES 장애/지연 시 디스크 spill 버퍼 (워커별 <ES_SPILL_DIR>/worker-<pid>/ 에 세그먼트 파일로 보관 후 재색인)
+    es_spill_enabled: bool = Field(alias="ES_SPILL_ENABLED", default=True)
+    es_spill_dir: str = Field(alias="ES_SPILL_DIR", default="data/es_spill")
+    es_spill_segment_bytes: int = Field(alias="ES_SPILL_SEGMENT_BYTES", default=64 * 1024 * 1024)
+    es_spill_quota_bytes: int = Field(alias="ES_SPILL_QUOTA_BYTES", default=2 * 1024 ** 3)  # 초과분은 버림
+    es_spill_fsync: bool = Field(alias="ES_SPILL_FSYNC", default=False)
+    es_spill_latency_threshold: float = Field(alias="ES_SPILL_LATENCY_THRESHOLD", default=5.0)  # 초, 넘으면 cooldown 동안 바로 spill
+    es_spill_cooldown_seconds: float = Field(alias="ES_SPILL_COOLDOWN_SECONDS", default=30.0)
+    es_spill_replay_interval: float = Field(alias="ES_SPILL_REPLAY_INTERVAL", default=5.0)
 
     # Kafka
     kafka_bootstrap_servers: str = Field(alias="KAFKA_BOOTSTRAP_SERVERS")
@@ -35,7 +73,78 @@ class Settings(BaseSettings):
     traffic_imputer_path: str = Field(alias="TRAFFIC_IMPUTER_PATH")
     traffic_scaler_path: str = Field(alias="TRAFFIC_SCALER_PATH")
     traffic_encoder_path: str = Field(alias="TRAFFIC_ENCODER_PATH")
-    
+    log_routing_enabled: bool = Field(alias="LOG_ROUTING_ENABLED", default=True)
+    log_routing_path: str = Field(alias="LOG_ROUTING_PATH", default="app/ml/log/routing.json")  # winlog.channel/event_id 별 탐지기 라우팅 표
+    rule_engine_enabled: bool = Field(alias="RULE_ENGINE_ENABLED", default=True)
+    rule_engine_rules_path: str = Field(alias="RULE_ENGINE_RULES_PATH", default="app/rules/winlog_rules.yml")  # ML 이전에 적용되는 탐지 규칙
+
+    # Inference Server (여러 워커의 예측 요청을 하나의 프로세스에서 배치로 처리)
+    inference_server_enabled: bool = Field(alias="INFERENCE_SERVER_ENABLED", default=False)
+    inference_socket_path: str = Field(alias="INFERENCE_SOCKET_PATH", default="/tmp/threat_inference.sock")
+    inference_max_batch_size: int = Field(alias="INFERENCE_MAX_BATCH_SIZE", default=4096)
+    inference_max_wait_ms: int = Field(alias="INFERENCE_MAX_WAIT_MS", default=10)
+    inference_request_timeout: float = Field(alias="INFERENCE_REQUEST_TIMEOUT", default=30.0)
+
+    # Winlogbeat 2단계(Cascade) 분류: 1단계 경량 모델이 확실한 정상 로그를 먼저 걸러냅니다.
+    log_cascade_enabled: bool = Field(alias="LOG_CASCADE_ENABLED", default=False)
+    log_cascade_model_path: str = Field(alias="LOG_CASCADE_MODEL_PATH", default="")
+    log_cascade_benign_threshold: float = Field(alias="LOG_CASCADE_BENIGN_THRESHOLD", default=0.98)
+
+    # Shadow 모드: 후보 모델을 운영 경로 밖에서 비교 평가합니다. (경로가 비어 있으면 비활성)
+    shadow_log_model_path: str = Field(alias="SHADOW_LOG_MODEL_PATH", default="")
+    shadow_traffic_model_path: str = Field(alias="SHADOW_TRAFFIC_MODEL_PATH", default="")
+    shadow_sample_rate: float = Field(alias="SHADOW_SAMPLE_RATE", default=0.1)
+    shadow_queue_size: int = Field(alias="SHADOW_QUEUE_SIZE", default=64)
+
+    # CPU 스레드 예산 (워커 수에 맞춰 모델/OpenMP/BLAS/Executor 스레드 수를 제한)
+    cpu_budget_enabled: bool = Field(alias="CPU_BUDGET_ENABLED", default=True)
+    cpu_total_cores: int = Field(alias="CPU_TOTAL_CORES", default=0)  # 0이면 사용 가능한 코어 수 자동 감지
+    cpu_worker_count: int = Field(alias="CPU_WORKER_COUNT", default=0)  # 0이면 WEB_CONCURRENCY(gunicorn 워커 수), 없으면 1
+    cpu_executor_workers: int = Field(alias="CPU_EXECUTOR_WORKERS", default=0)  # 0이면 model_threads + 2
+
+    # 슬라이딩 윈도우 집계 (source.ip / host.name 별 이벤트율, 바이트율, 고유 목적지 포트 수, 로그온 실패 수)
+    window_agg_enabled: bool = Field(alias="WINDOW_AGG_ENABLED", default=True)
+    window_seconds: int = Field(alias="WINDOW_SECONDS", default=60)
+    window_bucket_seconds: int = Field(alias="WINDOW_BUCKET_SECONDS", default=5)
+    window_max_keys: int = Field(alias="WINDOW_MAX_KEYS", default=100_000)  # 초과 시 가장 오래 사용되지 않은 키부터 제거
+    window_port_scan_threshold: int = Field(alias="WINDOW_PORT_SCAN_THRESHOLD", default=100)  # 0이면 규칙 비활성
+    window_failed_logon_threshold: int = Field(alias="WINDOW_FAILED_LOGON_THRESHOLD", default=20)  # 0이면 규칙 비활성
+    window_event_rate_threshold: float = Field(alias="WINDOW_EVENT_RATE_THRESHOLD", default=0)  # events/sec, 0이면 규칙 비활성
+
+    # Packetbeat flow 상태 병합 (flow.id 별 주기적 업데이트 중 일부만 예측)
+    flow_state_enabled: bool = Field(alias="FLOW_STATE_ENABLED", default=True)
+    flow_state_max_flows: int = Field(alias="FLOW_STATE_MAX_FLOWS", default=200_000)
+    flow_score_min_packets: int = Field(alias="FLOW_SCORE_MIN_PACKETS", default=10)
+    flow_score_min_bytes: int = Field(alias="FLOW_SCORE_MIN_BYTES", default=10_000)
+    flow_rescore_growth: float = Field(alias="FLOW_RESCORE_GROWTH", default=2.0)  # 마지막 예측 대비 카운터 증가 배수
+
+    # Packetbeat 문서 유형(type / event.dataset) 라우팅: flow 만 트래픽 모델로 예측하고, 트랜잭션(http/tls/dns)은 색인만 수행
+    packetbeat_split_index_by_type: bool = Field(alias="PACKETBEAT_SPLIT_INDEX_BY_TYPE", default=False)  # True면 트랜잭션을 <ES_INDEX_PACKETBEAT>-<type> 인덱스에 저장
+
+    # 위협 인텔리전스 차단 목록 (쉼표로 구분한 로컬 피드 파일 경로, 비어 있으면 비활성)
+    threat_intel_feed_paths: str = Field(alias="THREAT_INTEL_FEED_PATHS", default="")
+    threat_intel_reload_seconds: float = Field(alias="THREAT_INTEL_RELOAD_SECONDS", default=300)  # 피드 변경 확인 주기
+    threat_intel_bloom_error_rate: float = Field(alias="THREAT_INTEL_BLOOM_ERROR_RATE", default=0.001)
+    threat_intel_confirm_exact: bool = Field(alias="THREAT_INTEL_CONFIRM_EXACT", default=True)  # Bloom filter 양성 결과를 정확한 목록으로 확인
+
+    # 차단 금지(allowlist) IP 대역: 게이트웨이/DNS/백엔드 등 block_ip 명령을 발행하면 안 되는 주소 (루프백은 항상 포함)
+    ip_allowlist_cidrs: str = Field(alias="IP_ALLOWLIST_CIDRS", default="")  # 쉼표로 구분한 IP 또는 CIDR (예: 10.0.0.1,192.168.0.0/24)
+    ip_allowlist_path: str = Field(alias="IP_ALLOWLIST_PATH", default="")  # 한 줄에 IP 또는 CIDR 하나인 파일
+
+    # Sysmon 프로세스 트리 (ProcessGuid -> 부모/Image, 탐지 시 조상 체인을 AttackLog description 에 기록)
+    process_tree_enabled: bool = Field(alias="PROCESS_TREE_ENABLED", default=True)
+    process_tree_max_processes: int = Field(alias="PROCESS_TREE_MAX_PROCESSES", default=200_000)  # 초과 시 LRU 제거
+    process_tree_max_depth: int = Field(alias="PROCESS_TREE_MAX_DEPTH", default=16)
+    process_tree_snapshot_path: str = Field(alias="PROCESS_TREE_SNAPSHOT_PATH", default="data/process_tree.bin")  # 워커별로 <이름>.worker-<pid>.bin 에 저장, 비우면 영속화하지 않음
+    process_tree_snapshot_interval: float = Field(alias="PROCESS_TREE_SNAPSHOT_INTERVAL", default=60.0)
+
+    # 인시던트 조사 (/api/incidents/*)
+    incident_window_minutes: int = Field(alias="INCIDENT_WINDOW_MINUTES", default=30)  # 탐지 시각 전후 분석 구간(분)
+    incident_max_window_minutes: int = Field(alias="INCIDENT_MAX_WINDOW_MINUTES", default=360)  # 요청으로 지정할 수 있는 최대 구간(분)
+    incident_page_size: int = Field(alias="INCIDENT_PAGE_SIZE", default=1000)  # composite / search_after 페이지 크기
+    incident_max_events: int = Field(alias="INCIDENT_MAX_EVENTS", default=5000)  # 타임라인 최대 이벤트 수 (요청의 max_events 상한)
+    incident_max_nodes: int = Field(alias="INCIDENT_MAX_NODES", default=10000)  # 공격 경로 그래프 최대 노드 수
+
     # DB & JWT
     database_url: str = Field(alias="DATABASE_URL")
     secret_key: str = Field(alias="SECRET_KEY")
@@ -0,0 +1,44 @@
+# src/core/es_client.py
+"""
+app/ 과 src/ 가 함께 사용하는 Elasticsearch 클라이언트.
+
+프로세스마다 AsyncElasticsearch 하나(= 연결 풀 하나)만 만들고, 용도별로 timeout/재시도 설정만 다른
+클라이언트 뷰를 options() 로 만들어 공유합니다. (options() 는 같은 transport 와 연결 풀을 사용)
+
+- ingest    : 원본 로그 bulk 색인 (ES_WRITER_REQUEST_TIMEOUT, 재시도는 es_writer 가 직접 처리)
+- dashboard : 대시보드/사용자 API 조회 (ES_DASHBOARD_TIMEOUT)
+- llm       : LLM 에이전트 도구의 집계 조회 (ES_LLM_TIMEOUT)
+- incident  : 인시던트 분석의 composite 집계 / PIT 조회 (ES_INCIDENT_TIMEOUT)
+
+연결은 HTTP keep-alive 로 재사용되며, 노드당 최대 연결 수(ES_CONNECTIONS_PER_NODE)와
+요청/응답 gzip 압축(ES_HTTP_COMPRESS)을 설정으로 지정합니다.
+"""
+import logging
+
+from elasticsearch import AsyncElasticsearch
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def create_es_client() -> AsyncElasticsearch:
+    """공유 연결 풀을 가진 기본 클라이언트를 생성합니다."""
+    return AsyncElasticsearch(
+        hosts=settings.elasticsearch_hosts.split(','),
+        connections_per_node=settings.es_connections_per_node,
+        http_compress=settings.es_http_compress,
+        request_timeout=settings.es_dashboard_timeout,
+        max_retries=2,
+        retry_on_timeout=True,
+    )
+
+
+# 프로세스 전역 기본 클라이언트 (종료 시 이 클라이언트만 close 하면 모든 뷰의 연결이 정리됨)
+es_client = create_es_client()
+
+# 용도별 클라이언트 뷰
+ingest_es_client = es_client.options(request_timeout=settings.es_writer_request_timeout, max_retries=0)
+dashboard_es_client = es_client.options(request_timeout=settings.es_dashboard_timeout)
+llm_es_client = es_client.options(request_timeout=settings.es_llm_timeout)
+incident_es_client = es_client.options(request_timeout=settings.es_incident_timeout)
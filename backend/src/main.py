@@ -1,3 +1,7 @@
+# --- CPU 스레드 예산 (numpy/torch 등 네이티브 라이브러리가 로드되기 전에 적용) ---
+from app.core.cpu_budget import cpu_budget, apply_thread_limits
+apply_thread_limits(cpu_budget)
+
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse, Response # Response 임포트 추가
 from fastapi.exceptions import RequestValidationError
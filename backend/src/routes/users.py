@@ -1,16 +1,19 @@
 # src/routes/users.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Annotated # Python 3.9+에서 Depends와 함께 사용
-from elasticsearch import Elasticsearch
+from typing import Annotated, Literal, Optional # Python 3.9+에서 Depends와 함께 사용
+from datetime import datetime, timedelta, timezone
 
 # 상대 경로 임포트
 from ..schemas.user import UserResponse, UserUpdate # 사용자 응답/업데이트 스키마
 from ..models.models import User # ORM 모델 (user_model 대신 직접 User 임포트)
 from ..utils.auth import get_current_user # 현재 사용자 가져오는 의존성
 from ..core.database import get_db # DB 세션 의존성
+from ..core.es_client import dashboard_es_client # 공유 ES 클라이언트 (조회용 timeout)
 from ..services import user_service # 사용자 서비스 임포트
+from ..services import event_export_service # 원본 이벤트 NDJSON 내보내기
 
 # --- 설정 파일 임포트 ---
 from ..core.config import settings # Settings 객체 임포트
@@ -20,11 +23,6 @@ from ..core.config import settings # Settings 객체 임포트
 # APIRouter 인스턴스 생성 (중복 제거, prefix="/users" 유지)
 router = APIRouter(prefix="/users", tags=["Users"])
 
-es_client = Elasticsearch(
-    f"{settings.elasticsearch_host}:{settings.elasticsearch_port}",
-    request_timeout=settings.elasticsearch_request_timeout
-)
-
 # ----------------------------------------------------
 # 1. 현재 사용자 정보 조회 (GET /users/me)
 # ----------------------------------------------------
@@ -72,7 +70,7 @@ async def update_users_me(
 
 # ▼▼▼ [핵심] "나의 실시간 공격 현황"을 조회하는 새로운 API ▼▼▼
 @router.get("/me/attacks", summary="현재 사용자의 최근 공격 현황 조회")
-def get_my_recent_attacks(current_user: Annotated[User, Depends(get_current_user)]):
+async def get_my_recent_attacks(current_user: Annotated[User, Depends(get_current_user)]):
     """
     현재 로그인한 사용자와 관련된 최근 공격 데이터를 Elasticsearch에서 조회합니다.
     `user_id`를 기반으로 `attack_detections`, `winlogbeat-raw`, `packetbeat-raw` 인덱스를 검색합니다.
@@ -94,7 +92,7 @@ def get_my_recent_attacks(current_user: Annotated[User, Depends(get_current_user
 
     try:
         # attack_detections, winlogbeat-raw, packetbeat-raw 세 인덱스를 모두 검색
-        response = es_client.search(
+        response = await dashboard_es_client.search(
             index="attack_detections,winlogbeat-raw,packetbeat-raw", 
             body=query
         )
@@ -103,6 +101,53 @@ def get_my_recent_attacks(current_user: Annotated[User, Depends(get_current_user
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch data from Elasticsearch: {e}")
 
+# ----------------------------------------------------
+# 원본 이벤트 NDJSON 내보내기 (GET /users/me/events/export)
+# ----------------------------------------------------
+@router.get("/me/events/export", summary="현재 사용자의 원본 이벤트 NDJSON 내보내기")
+async def export_my_events(
+    current_user: Annotated[User, Depends(get_current_user)],
+    source: Literal["winlogbeat", "packetbeat"] = "winlogbeat",
+    start: Optional[datetime] = Query(None, description="시작 시각 (ISO 8601, 기본값: end 24시간 전)"),
+    end: Optional[datetime] = Query(None, description="종료 시각 (ISO 8601, 기본값: 현재)"),
+    fields: Optional[str] = Query(None, description="내보낼 _source 필드 (쉼표 구분, 와일드카드 가능. 예: @timestamp,winlog.event_id,source.*)"),
+    page_size: int = Query(settings.es_export_page_size, ge=1, le=10000),
+    limit: Optional[int] = Query(None, ge=1, description="최대 내보낼 문서 수 (기본값: 제한 없음)"),
+):
+    """
+    현재 로그인한 사용자의 원본 이벤트를 기간 제한 없이 NDJSON 으로 스트리밍합니다.
+    point-in-time + search_after 로 페이지를 넘기므로 건수와 관계없이 서버 메모리 사용량은 한 페이지 분량으로 일정합니다.
+    """
+    # 시간대가 없는 값은 UTC 로 간주 (aware 값과의 비교/날짜별 인덱스 계산 오류 방지)
+    end = event_export_service.to_utc(end) if end else datetime.now(timezone.utc)
+    start = event_export_service.to_utc(start) if start else end - timedelta(hours=24)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be earlier than end")
+
+    indices = event_export_service.export_indices(source, start, end)
+    try:
+        # PIT 을 먼저 열어 ES 오류는 스트리밍 시작 전에 HTTP 오류로 응답
+        pit_id = await event_export_service.open_export_pit(
+            dashboard_es_client, indices, routing=event_export_service.export_routing(current_user.user_id, start)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to open point-in-time on Elasticsearch: {e}")
+
+    stream = event_export_service.stream_events_ndjson(
+        dashboard_es_client,
+        pit_id,
+        event_export_service.build_export_query(current_user.user_id, start, end),
+        fields=[field.strip() for field in fields.split(",") if field.strip()] if fields else None,
+        page_size=page_size,
+        limit=limit,
+    )
+    filename = f"{source}-{start:%Y%m%dT%H%M%S}-{end:%Y%m%dT%H%M%S}.ndjson"
+    return StreamingResponse(
+        stream,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 # ----------------------------------------------------
 # (선택 사항) 특정 user_id를 가진 사용자 조회 (어드민용 등)
 # ----------------------------------------------------
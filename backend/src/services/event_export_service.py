@@ -0,0 +1,114 @@
+# src/services/event_export_service.py
+"""
+원본 이벤트(Winlogbeat / Packetbeat) NDJSON 내보내기.
+
+from/size 페이지네이션은 깊은 페이지로 갈수록 모든 샤드가 from+size 건을 정렬해야 하므로 큰 인덱스에서 쓸 수 없습니다.
+point-in-time(PIT)을 열어 내보내는 동안 같은 시점의 데이터를 보고, `@timestamp` + `_shard_doc`(tiebreaker)
+정렬 값으로 search_after 페이징하여 한 번에 한 페이지만 메모리에 올린 채 응답으로 흘려보냅니다.
+"""
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from elasticsearch import AsyncElasticsearch
+
+from ..core.config import settings
+from app.services.es_index_manager import es_index_manager, user_id_filter
+
+logger = logging.getLogger(__name__)
+
+EXPORT_SOURCES = {
+    "winlogbeat": lambda: settings.es_index_winlogbeat,
+    "packetbeat": lambda: settings.es_index_packetbeat,
+}
+
+# search_after 정렬 키: 타임스탬프 + PIT 전용 tiebreaker (같은 시각의 문서도 순서가 고정됨)
+EXPORT_SORT = [
+    {"@timestamp": {"order": "asc", "format": "strict_date_optional_time_nanos"}},
+    {"_shard_doc": "asc"},
+]
+
+
+def export_indices(source: str, start: datetime, end: datetime) -> str:
+    """내보낼 이벤트 종류와 기간에 해당하는 인덱스 목록을 반환합니다."""
+    return es_index_manager.indices_for_range(EXPORT_SOURCES[source](), start, end)
+
+
+def export_routing(user_id: str, start: datetime) -> Optional[str]:
+    """사용자별 routing 으로 색인된 구간이면 routing 값을 반환합니다. (PIT 이 사용자 문서가 있는 샤드만 대상으로 함)"""
+    return es_index_manager.search_routing(user_id, to_utc(start))
+
+
+def build_export_query(user_id: str, start: datetime, end: datetime) -> Dict[str, Any]:
+    return {
+        "bool": {
+            "filter": [
+                user_id_filter(user_id),
+                {"range": {"@timestamp": {"gte": to_utc(start).isoformat(), "lte": to_utc(end).isoformat()}}},
+            ]
+        }
+    }
+
+
+def to_utc(value: datetime) -> datetime:
+    """UTC datetime 으로 변환합니다. (시간대가 없는 값은 UTC 로 간주)"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+async def open_export_pit(es: AsyncElasticsearch, indices: str, routing: Optional[str] = None) -> str:
+    """내보내기용 PIT 을 열고 ID 를 반환합니다. (존재하지 않는 날짜 인덱스는 무시)"""
+    response = await es.open_point_in_time(
+        index=indices, keep_alive=settings.es_export_pit_keep_alive, routing=routing, ignore_unavailable=True
+    )
+    return response["id"]
+
+
+async def stream_events_ndjson(
+    es: AsyncElasticsearch,
+    pit_id: str,
+    query: Dict[str, Any],
+    fields: Optional[List[str]] = None,
+    page_size: int = 1000,
+    limit: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    PIT + search_after 로 이벤트를 페이지 단위로 조회해 NDJSON 바이트로 내보냅니다.
+    한 줄에 문서 하나({"_index", "_id", "_source"})이며, 종료 시(클라이언트 연결이 끊긴 경우 포함) PIT 을 닫습니다.
+    """
+    search_after, exported = None, 0
+    try:
+        while limit is None or exported < limit:
+            size = page_size if limit is None else min(page_size, limit - exported)
+            response = await es.search(
+                pit={"id": pit_id, "keep_alive": settings.es_export_pit_keep_alive},
+                query=query,
+                sort=EXPORT_SORT,
+                size=size,
+                source=fields if fields else True,
+                search_after=search_after,
+                track_total_hits=False,
+            )
+            pit_id = response.get("pit_id", pit_id)  # PIT ID 는 요청마다 바뀔 수 있음
+            hits = response["hits"]["hits"]
+            if not hits:
+                break
+            lines = [
+                json.dumps({"_index": hit["_index"], "_id": hit["_id"], "_source": hit.get("_source", {})}, ensure_ascii=False)
+                for hit in hits
+            ]
+            yield ("\n".join(lines) + "\n").encode()
+            exported += len(hits)
+            if len(hits) < size:
+                break
+            search_after = hits[-1]["sort"]
+        logger.info(f"✅ 이벤트 내보내기 완료: {exported}건")
+    except Exception as e:
+        # 응답 헤더는 이미 전송되었으므로 마지막 줄에 오류를 기록해 잘린 결과임을 알림
+        logger.error(f"❌ 이벤트 내보내기 중 오류 발생 ({exported}건 전송 후): {e}")
+        yield (json.dumps({"_error": str(e), "exported": exported}, ensure_ascii=False) + "\n").encode()
+    finally:
+        try:
+            await es.close_point_in_time(id=pit_id)
+        except Exception as e:
+            logger.warning(f"⚠️ 내보내기 PIT 닫기 실패 (keep_alive 후 자동 만료): {e}")
@@ -10,6 +10,7 @@ from elasticsearch import AsyncElasticsearch
 
 from src.core.config import settings
 from app.models.models import AttackLog
+from app.services.es_index_manager import es_index_manager, user_id_filter
 
 class LogDashboardService:
     """
@@ -25,13 +26,15 @@ class LogDashboardService:
                 "query": {
                     "bool": {
                         "filter": [
-                            {"match": {"user_id": user_id}},
+                            user_id_filter(user_id),
                             {"range": {"@timestamp": {"gte": f"now-{time_range}"}}}
                         ]
                     }
                 }
             }
-            response = await es.count(index=settings.es_index_winlogbeat, body=query)
+            indices = es_index_manager.indices_for_time_range(settings.es_index_winlogbeat, time_range)
+            routing = es_index_manager.search_routing_for_time_range(user_id, time_range)
+            response = await es.count(index=indices, body=query, routing=routing, ignore_unavailable=True)
             return {"log_count": response.get("count", 0)}
         except Exception as e:
             print(f"❌ ES 로그 수 집계 실패 (User: {user_id}, Range: {time_range}): {e}", flush=True)
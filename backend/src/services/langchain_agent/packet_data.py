@@ -9,6 +9,7 @@ from elasticsearch import AsyncElasticsearch, NotFoundError
 
 from src.core.config import settings
 from app.models.models import AttackTraffic
+from app.services.es_index_manager import es_index_manager, user_id_filter
 
 
 class TrafficDashboardService:
@@ -27,8 +28,10 @@ class TrafficDashboardService:
             "latest_data_timestamp": None
         }
         try:
+            indices = es_index_manager.indices_for_time_range(settings.es_index_packetbeat, time_range)
+            routing = es_index_manager.search_routing_for_time_range(user_id, time_range)
             query_filter = [
-                {"match": {"user_id": user_id}},
+                user_id_filter(user_id),
                 {"range": {"@timestamp": {"gte": f"now-{time_range}"}}}
             ]
 
@@ -42,7 +45,7 @@ class TrafficDashboardService:
                     "total_bwd_bytes": {"sum": {"field": "destination.bytes"}}
                 }
             }
-            total_response = await es.search(index=settings.es_index_packetbeat, body=total_stats_query, request_timeout=60)
+            total_response = await es.search(index=indices, body=total_stats_query, request_timeout=60, routing=routing, ignore_unavailable=True)
             aggs = total_response.get('aggregations', {})
             
             results["total_packets"] = int((aggs.get('total_fwd_packets', {}).get('value', 0) or 0) + (aggs.get('total_bwd_packets', {}).get('value', 0) or 0))
@@ -53,7 +56,7 @@ class TrafficDashboardService:
                 "query": {"bool": {"filter": query_filter}},
                 "sort": [{"@timestamp": "desc"}]
             }
-            latest_doc_response = await es.search(index=settings.es_index_packetbeat, body=latest_doc_query)
+            latest_doc_response = await es.search(index=indices, body=latest_doc_query, routing=routing, ignore_unavailable=True)
 
             if latest_doc_response['hits']['hits']:
                 results["latest_data_timestamp"] = latest_doc_response['hits']['hits'][0]['_source']['@timestamp']
@@ -72,18 +75,20 @@ class TrafficDashboardService:
         """
         empty_result = {"timestamps": [], "packets_per_second": [], "bytes_per_second": []}
         try:
+            indices = es_index_manager.indices_for_time_range(settings.es_index_packetbeat, time_range)
+            routing = es_index_manager.search_routing_for_time_range(user_id, time_range)
             # [핵심 수정] 먼저 해당 기간에 데이터가 있는지 확인합니다.
             check_query = {
                 "query": {
                     "bool": {
                         "filter": [
-                            {"match": {"user_id": user_id}},
+                            user_id_filter(user_id),
                             {"range": {"@timestamp": {"gte": f"now-{time_range}", "lte": "now"}}}
                         ]
                     }
                 }
             }
-            count_response = await es.count(index=settings.es_index_packetbeat, body=check_query)
+            count_response = await es.count(index=indices, body=check_query, routing=routing, ignore_unavailable=True)
             if count_response.get('count', 0) == 0:
                 print(f"No traffic data found for user {user_id} in the last {time_range}. Returning empty time series.")
                 return empty_result
@@ -104,7 +109,7 @@ class TrafficDashboardService:
                 "query": {
                     "bool": {
                         "filter": [
-                            {"match": {"user_id": user_id}},
+                            user_id_filter(user_id),
                             {"range": {"@timestamp": {"gte": start_time.isoformat(), "lte": end_time.isoformat()}}}
                         ]
                     }
@@ -126,7 +131,7 @@ class TrafficDashboardService:
                     }
                 }
             }
-            response = await es.search(index=settings.es_index_packetbeat, body=query)
+            response = await es.search(index=indices, body=query, routing=routing, ignore_unavailable=True)
             buckets = response.get('aggregations', {}).get('traffic_over_time', {}).get('buckets', [])
 
             return {
@@ -146,19 +151,21 @@ class TrafficDashboardService:
         특정 사용자의 지정된 시간 동안 상위 목적지 포트를 반환합니다.
         """
         try:
+            indices = es_index_manager.indices_for_time_range(settings.es_index_packetbeat, time_range)
+            routing = es_index_manager.search_routing_for_time_range(user_id, time_range)
             query = {
                 "size": 0,
                 "query": {
                     "bool": {
                         "filter": [
-                            {"match": {"user_id": user_id}},
+                            user_id_filter(user_id),
                             {"range": {"@timestamp": {"gte": f"now-{time_range}"}}}
                         ]
                     }
                 },
                 "aggs": {"top_ports": {"terms": {"field": "destination.port", "size": top_n}}}
             }
-            response = await es.search(index=settings.es_index_packetbeat, body=query)
+            response = await es.search(index=indices, body=query, routing=routing, ignore_unavailable=True)
             buckets = response.get('aggregations', {}).get('top_ports', {}).get('buckets', [])
             return [{"port": b['key'], "count": b['doc_count']} for b in buckets]
         except NotFoundError:
@@ -173,19 +180,24 @@ class TrafficDashboardService:
         특정 사용자의 IP별 트래픽을 요약하여 상위 N개를 반환합니다.
         """
         try:
+            indices = es_index_manager.indices_for_time_range(settings.es_index_packetbeat, time_range)
+            routing = es_index_manager.search_routing_for_time_range(user_id, time_range)
+            # 동적 매핑 고정 인덱스가 있으면 source.ip / source.ip.keyword 를 합친 runtime 필드로 집계
+            ip_field, runtime_mappings = es_index_manager.source_ip_aggregation(settings.es_index_packetbeat)
             query = {
                 "size": 0,
+                "runtime_mappings": runtime_mappings,
                 "query": {
                     "bool": {
                         "filter": [
-                            {"match": {"user_id": user_id}},
+                            user_id_filter(user_id),
                             {"range": {"@timestamp": {"gte": f"now-{time_range}"}}}
                         ]
                     }
                 },
                 "aggs": {
                     "ip_summary": {
-                        "terms": {"field": "source.ip.keyword", "size": top_n},
+                        "terms": {"field": ip_field, "size": top_n},
                         "aggs": {
                             "total_fwd_packets": {"sum": {"field": "source.packets"}},
                             "total_bwd_packets": {"sum": {"field": "destination.packets"}},
@@ -195,7 +207,7 @@ class TrafficDashboardService:
                     }
                 }
             }
-            response = await es.search(index=settings.es_index_packetbeat, body=query)
+            response = await es.search(index=indices, body=query, routing=routing, ignore_unavailable=True)
             buckets = response.get('aggregations', {}).get('ip_summary', {}).get('buckets', [])
             
             results = []
@@ -26,7 +26,6 @@ from langchain_community.utilities import SQLDatabase
 from langchain_ollama.chat_models import ChatOllama
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from elasticsearch import AsyncElasticsearch
 
 # RAG 도구를 위한 import
 from langchain.chains import RetrievalQA, create_sql_query_chain
@@ -36,6 +35,7 @@ from langchain_huggingface import HuggingFaceEmbeddings
 # 프로젝트 내부 모듈 import
 from ...core.database import AsyncSessionLocal
 from ...core.config import settings
+from ...core.es_client import llm_es_client
 # (사용자 제공 파일명에 맞춰 log_data.py로 가정)
 from .log_data import log_user_service
 from .packet_data import traffic_user_service
@@ -45,10 +45,8 @@ from ...models.models import AttackLog, AttackTraffic
 # --- 1. 공통 LLM 및 클라이언트 초기화 ---
 llm = ChatOllama(model="llama3:latest")
 
-es_client = AsyncElasticsearch(
-    f"{settings.elasticsearch_host}:{settings.elasticsearch_port}",
-    request_timeout=settings.elasticsearch_request_timeout
-)
+# 공유 연결 풀의 LLM 도구용 클라이언트 (ES_LLM_TIMEOUT 적용)
+es_client = llm_es_client
 
 # --- 2. 헬퍼 함수 ---
 def _parse_input(question_with_context: str) -> tuple[str, str] | None:
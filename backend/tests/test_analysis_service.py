@@ -0,0 +1,123 @@
+# tests/test_analysis_service.py
+"""
+AnalysisService 배치 처리 테스트.
+
+ES/Redis/DB/모델은 가짜 객체로 바꾸고, 배치 처리 결과로 만들어지는 AttackTraffic 행과 대응 명령만 확인합니다.
+
+    cd backend
+    python -m pytest -q tests
+"""
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from app.services import analysis_service as module
+from app.core.ip_allowlist import IpAllowlist
+from app.services.analysis_service import AnalysisService, get_ip_from_log
+from app.services.es_writer import BulkResult
+
+INTEL_IP = "203.0.113.7"
+MODEL_IP = "198.51.100.20"
+
+
+class FakeWriter:
+    async def write(self, actions):
+        return BulkResult(total=len(actions), succeeded=len(actions))
+
+
+class FakeThreatIntel:
+    enabled = True
+
+    def lookup(self, ip):
+        return "blocklist.txt" if ip == INTEL_IP else None
+
+
+class FakeSession:
+    def __init__(self):
+        self.added = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def add_all(self, rows):
+        self.added.extend(rows)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    async def hincrby(self, *args):
+        pass
+
+    async def publish(self, channel, message):
+        self.published.append(json.loads(message))
+
+
+def _flow(source_ip: str, port: int) -> dict:
+    return {"traffic_data": {
+        "@timestamp": "2024-05-01T00:00:00Z", "type": "flow",
+        "source": {"ip": source_ip, "packets": 10, "bytes": 1000},
+        "destination": {"ip": "10.0.0.5", "port": port, "packets": 8, "bytes": 4000},
+        "network": {"transport": "tcp", "duration": 1_000_000},
+    }}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    session, redis = FakeSession(), FakeRedis()
+    monkeypatch.setattr(module, "es_writer", FakeWriter())
+    monkeypatch.setattr(module, "threat_intel", FakeThreatIntel())
+    monkeypatch.setattr(module, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(module, "redis_client", redis)
+    monkeypatch.setattr(module.settings, "flow_state_enabled", False)
+    monkeypatch.setattr(module.settings, "window_agg_enabled", False)
+    service = AnalysisService()
+
+    async def predict(batch_df):
+        # Predictor.predict_traffic_threat_batch 와 같이 np.ndarray 를 반환
+        return np.array(["DDoS"] * len(batch_df))
+
+    monkeypatch.setattr(service, "_predict_traffic_batch", predict)
+    return service, session, redis
+
+
+def test_packetbeat_batch_with_model_and_threat_intel_hits(service):
+    """모델 예측(np.ndarray)과 위협 인텔리전스 적중이 섞인 배치도 두 결과를 모두 처리해야 함"""
+    service, session, redis = service
+    asyncio.run(service.process_packetbeat_traffic_batch([_flow(MODEL_IP, 80), _flow(INTEL_IP, 443)]))
+
+    assert sorted(row.src_ip for row in session.added) == sorted([MODEL_IP, INTEL_IP])
+    blocked = {message["ip"] for message in redis.published if message["action"] == "block_ip"}
+    assert blocked == {MODEL_IP, INTEL_IP}
+
+
+def test_packetbeat_batch_with_only_threat_intel_hits(service):
+    service, session, redis = service
+    asyncio.run(service.process_packetbeat_traffic_batch([_flow(INTEL_IP, 443)]))
+
+    assert [row.src_ip for row in session.added] == [INTEL_IP]
+    assert {"action": "block_ip", "ip": INTEL_IP} in redis.published
+
+
+def test_get_ip_from_log_keeps_allowlisted_source(monkeypatch):
+    """차단 금지 대역이어도 공격 출처로는 그대로 선택하고, 차단 명령만 발행하지 않아야 함"""
+    monkeypatch.setattr(module, "ip_allowlist", IpAllowlist([MODEL_IP]))
+    flat = {"source.ip": MODEL_IP, "winlog.event_data.IpAddress": INTEL_IP}
+    assert get_ip_from_log(flat, ["source.ip", "winlog.event_data.IpAddress"]) == MODEL_IP
+
+    redis = FakeRedis()
+    monkeypatch.setattr(module, "redis_client", redis)
+    asyncio.run(AnalysisService()._publish_block_ip(MODEL_IP))
+    assert redis.published == []